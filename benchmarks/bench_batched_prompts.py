@@ -0,0 +1,118 @@
+"""Compare Bedrock calls and tokens per 1,000 transcripts for different ENRICH_BATCH_SIZE values.
+
+Reads the JSON lines written by data-generation/generate_transcripts.py. By default token
+counts are estimated at ~4 characters per token from the exact prompts process_transcripts
+would send; --live sends the prompts to Bedrock and uses the usage block of each response.
+
+    cd data-generation && python generate_transcripts.py && cd ..
+    python benchmarks/bench_batched_prompts.py --batch-sizes 1,5,10,20
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import math
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESS_TRANSCRIPTS_DIR = os.path.join(ROOT, "pipelines", "lambda", "process_transcripts")
+# shared modules such as snowflake_session, under /opt/python in Lambda
+LAYER_DIR = os.path.join(ROOT, "pipelines", "lambda", "layer")
+
+CHARS_PER_TOKEN = 4
+# typical reply sizes, used only when estimating offline
+SINGLE_REPLY = '{"sentiment_score": -0.6, "complaint_category": "performance"}'
+BATCH_ENTRY = '{"interaction_id": "INT-00001", "sentiment_score": -0.6, "complaint_category": "performance"},\n'
+
+
+def load_process_transcripts():
+    # the Lambda imports preclassifier from its own directory and snowflake_session from the layer
+    sys.path.insert(0, PROCESS_TRANSCRIPTS_DIR)
+    sys.path.append(LAYER_DIR)
+    spec = importlib.util.spec_from_file_location("process_transcripts", os.path.join(PROCESS_TRANSCRIPTS_DIR, "lambda_function.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_records(transcripts_dir):
+    records = []
+    for path in sorted(glob.glob(os.path.join(transcripts_dir, "**", "*.json"), recursive=True)):
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def estimate(pt, records, batch_size):
+    calls = input_tokens = output_tokens = 0
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        if len(batch) == 1:
+            prompt = pt.PROMPT_TEMPLATE.format(transcript=batch[0]["transcript_body"])
+            reply = SINGLE_REPLY
+        else:
+            prompt = pt.build_batch_prompt([(r["interaction_id"], r["transcript_body"]) for r in batch])
+            reply = "[" + BATCH_ENTRY * len(batch) + "]"
+        calls += 1
+        input_tokens += math.ceil(len(prompt) / CHARS_PER_TOKEN)
+        output_tokens += math.ceil(len(reply) / CHARS_PER_TOKEN)
+    return calls, input_tokens, output_tokens, 0
+
+
+def measure(pt, records, batch_size):
+    calls = input_tokens = output_tokens = fallbacks = 0
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        if len(batch) == 1:
+            prompt, max_tokens = pt.PROMPT_TEMPLATE.format(transcript=batch[0]["transcript_body"]), 150
+        else:
+            items = [(r["interaction_id"], r["transcript_body"]) for r in batch]
+            prompt, max_tokens = pt.build_batch_prompt(items), 50 + 60 * len(batch)
+
+        result = pt.invoke_bedrock(json.dumps({
+            "messages": [{"role": "user", "content": [{"text": prompt}]}],
+            "inferenceConfig": {"maxTokens": max_tokens, "temperature": 0.1}
+        }))
+        calls += 1
+        input_tokens += result["usage"]["inputTokens"]
+        output_tokens += result["usage"]["outputTokens"]
+
+        if len(batch) > 1:
+            text = result["output"]["message"]["content"][0]["text"]
+            parsed = pt.parse_batch_analysis(text, {r["interaction_id"] for r in batch})
+            # each missing entry costs one extra single-record call in the Lambda
+            fallbacks += len(batch) - len(parsed)
+    return calls, input_tokens, output_tokens, fallbacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcripts-dir", default=os.path.join(ROOT, "data-generation", "transcripts"))
+    parser.add_argument("--batch-sizes", default="1,5,10,20")
+    parser.add_argument("--limit", type=int, default=1000, help="number of transcripts to use")
+    parser.add_argument("--live", action="store_true", help="call Bedrock and report real token usage")
+    args = parser.parse_args()
+
+    records = load_records(args.transcripts_dir)[:args.limit]
+    if not records:
+        raise SystemExit(f"No transcripts found under {args.transcripts_dir}, run generate_transcripts.py first")
+
+    pt = load_process_transcripts()
+    run = measure if args.live else estimate
+    per_1k = 1000 / len(records)
+
+    print(f"{len(records)} transcripts, {'measured' if args.live else 'estimated'} per 1,000 transcripts\n")
+    print(f"{'K':>4} {'calls':>8} {'input tok':>11} {'output tok':>11} {'total tok':>11} {'relative':>9} {'fallbacks':>10}")
+
+    baseline = None
+    for batch_size in [int(k) for k in args.batch_sizes.split(",")]:
+        calls, input_tokens, output_tokens, fallbacks = run(pt, records, batch_size)
+        total = (input_tokens + output_tokens) * per_1k
+        baseline = baseline or total
+        print(f"{batch_size:>4} {calls * per_1k:>8.0f} {input_tokens * per_1k:>11.0f} {output_tokens * per_1k:>11.0f} "
+              f"{total:>11.0f} {total / baseline:>9.0%} {fallbacks * per_1k:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
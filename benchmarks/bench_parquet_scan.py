@@ -0,0 +1,162 @@
+"""Compare scanning the raw JSON-lines lake with the compacted Parquet under curated/.
+
+Compacts the generated data with pipelines/glue/compact_to_parquet.py into a
+temporary directory (or uses --curated-dir), then runs the same three scans over
+both formats and reports the best wall time of --repeat runs and the bytes read:
+
+    full       every column of every partition
+    columns    only the columns a reader needs
+    pruned     those columns, from the partitions matching --since only
+
+JSON has to be read and parsed whole, so it can only skip partitions. Parquet reads
+just the needed column chunks (bytes counted at the file object), and takes its
+file list from _manifest.json.
+
+    cd data-generation && python generate_usage_logs.py && python generate_transcripts.py && cd ..
+    python benchmarks/bench_parquet_scan.py --since 2024-07
+
+Needs pyarrow.
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import tempfile
+import time
+
+import pyarrow.parquet as pq
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPACTION_PATH = os.path.join(ROOT, "pipelines", "glue", "compact_to_parquet.py")
+
+# the columns each downstream reader actually uses
+COLUMNS = {
+    "usage_logs": ["account_id", "session_duration_seconds", "error_codes_encountered"],
+    "transcripts": ["interaction_id", "timestamp", "interaction_type"]
+}
+
+
+def load_compaction():
+    spec = importlib.util.spec_from_file_location("compact_to_parquet", COMPACTION_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class CountingFile:
+    """Read-only file wrapper that counts the bytes pyarrow actually reads."""
+
+    def __init__(self, path):
+        self.f = open(path, "rb")
+        self.bytes_read = 0
+        self.closed = False
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        return self.f.seek(offset, whence)
+
+    def tell(self):
+        return self.f.tell()
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def close(self):
+        self.f.close()
+        self.closed = True
+
+
+def partition_of(path):
+    parts = dict(p.split("=", 1) for p in path.replace(os.sep, "/").split("/") if "=" in p)
+    return f"{parts['year']}-{parts['month']}"
+
+
+def scan_json(source_dir, dataset, columns, since):
+    # columns can't be skipped in JSON lines, every line is parsed whole
+    rows = bytes_read = 0
+    for path in sorted(glob.glob(os.path.join(source_dir, dataset, "year=*", "month=*", "*.json"))):
+        if since and partition_of(path) < since:
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        bytes_read += len(data)
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            json.loads(line)
+            rows += 1
+    return rows, bytes_read
+
+
+def scan_parquet(curated_dir, dataset, columns, since):
+    with open(os.path.join(curated_dir, dataset, "_manifest.json")) as f:
+        manifest = json.load(f)
+    rows = bytes_read = 0
+    for partition, entry in sorted(manifest["partitions"].items()):
+        if since and partition_of(partition) < since:
+            continue
+        for file in entry["files"]:
+            source = CountingFile(os.path.join(curated_dir, file["key"]))
+            table = pq.ParquetFile(source).read(columns=columns)
+            source.close()
+            bytes_read += source.bytes_read
+            rows += table.num_rows
+    return rows, bytes_read
+
+
+def best_of(repeat, fn, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source-dir", default=os.path.join(ROOT, "data-generation"),
+                        help="directory holding usage_logs/ and transcripts/ JSON lines")
+    parser.add_argument("--curated-dir", help="existing compacted output, compacted into a temp dir when omitted")
+    parser.add_argument("--datasets", default="usage_logs,transcripts")
+    parser.add_argument("--since", default="2024-07", help="YYYY-MM, first partition kept by the pruned scan")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    datasets = args.datasets.split(",")
+    curated_dir = args.curated_dir
+    if not curated_dir:
+        curated_dir = tempfile.mkdtemp(prefix="curated-")
+        compaction = load_compaction()
+        source, dest = compaction.LocalStore(args.source_dir), compaction.LocalStore(curated_dir)
+        for dataset in datasets:
+            compaction.compact_dataset(source, dest, dataset, 128 * 1024 * 1024)
+
+    print(f"\n{'dataset':<12} {'scan':<8} {'format':<8} {'rows':>7} {'read KiB':>9} {'best ms':>8}")
+    for dataset in datasets:
+        for scan, columns, since in (("full", None, None),
+                                     ("columns", COLUMNS[dataset], None),
+                                     ("pruned", COLUMNS[dataset], args.since)):
+            json_s, (json_rows, json_bytes) = best_of(args.repeat, scan_json, args.source_dir, dataset, columns, since)
+            pq_s, (pq_rows, pq_bytes) = best_of(args.repeat, scan_parquet, curated_dir, dataset, columns, since)
+            print(f"{dataset:<12} {scan:<8} {'json':<8} {json_rows:>7} {json_bytes / 1024:>9.0f} {json_s * 1000:>8.1f}")
+            print(f"{'':<12} {'':<8} {'parquet':<8} {pq_rows:>7} {pq_bytes / 1024:>9.0f} {pq_s * 1000:>8.1f}"
+                  f"   {json_bytes / max(pq_bytes, 1):.1f}x fewer bytes")
+            if json_rows != pq_rows:
+                print(f"  row count mismatch: json {json_rows}, parquet {pq_rows} (rejected lines?)")
+
+
+if __name__ == "__main__":
+    main()
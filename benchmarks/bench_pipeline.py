@@ -0,0 +1,534 @@
+"""End-to-end benchmark of the pipeline Lambdas against in-process S3, Bedrock and Snowflake.
+
+A dataset is generated with data-generation/generate.py at --scale (or read from
+--data-dir). Its transcripts are uploaded to a FakeS3 under raw/transcripts/ and
+the handlers run in process, in the order production chains them:
+
+    list_transcripts          plan the work units (and again once they are processed)
+    process_transcripts       one invocation per unit: enrich through FakeBedrock, MERGE
+    (dbt)                     ACCOUNT_HEALTH_SCORE rebuilt in DuckDB, not timed
+    get_dashboard_data        a matrix of filters, sorts and both formats, plus deep pages
+    get_account_transcripts   list pages and one body for the busiest accounts
+    rag_query                 a fixed set of questions
+
+Snowflake is DuckDB (stubs.DuckDBSnowflake), so the Lambdas' own SQL runs against
+real tables. FakeBedrock labels transcripts with the preclassifier and sleeps
+--bedrock-latency per call plus --token-delay per output word; BEDROCK_MAX_RPS
+still paces enrichment, raise it to time the Lambda alone. The dashboard and
+RAG request sets are replayed --repeat more times against warm caches and reported
+as ":cached". Each Lambda module is loaded once, like one warm container.
+
+For each handler the baseline records invocations, records per second,
+p50/p95/p99 latency and S3, Bedrock and SQL call counts, plus the traced Python
+heap peak of the stage with --trace-memory, which slows the handlers down. The
+process memory high-water mark only ever grows across stages, so it is recorded
+once for the whole run. Lambda settings such as ENRICH_CONCURRENCY are read
+from the environment as in production and saved with the baseline.
+
+    python benchmarks/bench_pipeline.py --scale 5 --out before.json
+    python benchmarks/bench_pipeline.py --scale 5 --out after.json
+    python benchmarks/bench_pipeline.py --compare before.json after.json
+
+--compare exits 1 when a handler got slower at p95, lost throughput or grew
+its traced heap peak (when both runs traced memory) by more than --threshold,
+when the run's peak RSS grew by more than --threshold, or when a handler makes
+more S3, Bedrock or SQL calls.
+Needs numpy, pandas, duckdb, boto3 and snowflake-connector-python.
+"""
+import argparse
+import base64
+import contextlib
+import gzip
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUCKET = "vantagepoint-data-lake"
+MARKER_KEY = "markers/dbt/run_results.json"
+
+sys.path.insert(0, os.path.join(ROOT, "pipelines", "local"))
+
+from check_health_score_parity import events_sql, mart_score_sql  # noqa: E402
+from stubs import DuckDBSnowflake, FakeBedrock, FakeS3, load_lambda  # noqa: E402
+
+# Lambda settings worth recording with a baseline, a change in any of them changes the numbers
+SETTINGS = ["ENRICH_CONCURRENCY", "ENRICH_BATCH_SIZE", "BEDROCK_MAX_RPS", "LOAD_BATCH_SIZE",
+            "STREAM_CHUNK_RECORDS", "PRECLASSIFY_THRESHOLD", "CACHE_BUCKET", "CACHE_MEMORY_ITEMS",
+            "RECORDS_PER_SHARD", "DASHBOARD_PAGE_SIZE", "DASHBOARD_CACHE_ITEMS", "TRANSCRIPTS_PAGE_SIZE",
+            "RAG_MAX_TRANSCRIPTS", "RAG_CACHE_ITEMS", "RAG_CACHE_SIMILARITY"]
+
+QUESTIONS = [
+    "Which industries have the most at-risk accounts?",
+    "What are customers complaining about most in support tickets?",
+    "How does sentiment differ between enterprise and standard accounts?",
+    "Why are churned accounts leaving?",
+    "Which accounts have not been active in the last 90 days?",
+    "Is error rate related to low health scores?"
+]
+
+RAG_ANSWER = ("Most of the risk sits in a handful of industries where sentiment has turned negative and "
+              "support tickets are climbing. Performance and billing complaints dominate the at-risk tier, "
+              "and accounts inactive for more than 90 days rarely recover. Prioritise outreach to at-risk "
+              "accounts with rising ticket counts and review the billing issues behind recent escalations.")
+
+TRANSCRIPTS_DDL = """
+    CREATE TABLE INTERACTION_TRANSCRIPTS (
+        INTERACTION_ID VARCHAR, ACCOUNT_ID VARCHAR, OPPORTUNITY_ID VARCHAR, TIMESTAMP TIMESTAMP,
+        INTERACTION_TYPE VARCHAR, TRANSCRIPT_BODY VARCHAR, SENTIMENT_SCORE DOUBLE, COMPLAINT_CATEGORY VARCHAR,
+        LOADED_AT TIMESTAMPTZ
+    )
+"""
+
+# the mart over the loaded tables: the same inputs as the dbt models, and the mart's own score expression
+MART_SQL = """
+    CREATE OR REPLACE TABLE ACCOUNT_HEALTH_SCORE AS
+    WITH u AS (
+        SELECT
+            account_id,
+            count(DISTINCT session_id) AS total_sessions,
+            count(DISTINCT user_id) AS active_users,
+            count(DISTINCT feature_used) AS features_adopted,
+            round(avg(session_duration_seconds), 2) AS avg_session_duration,
+            round(
+                sum(CASE WHEN error_codes_encountered IS NOT NULL THEN 1 ELSE 0 END)::double
+                / nullif(count(*), 0), 4
+            ) AS error_rate,
+            date_diff('day', max(timestamp)::date, DATE '{as_of}') AS days_since_last_active
+        FROM USAGE_LOGS
+        GROUP BY account_id
+    ),
+    complaint_ranked AS (
+        SELECT
+            account_id,
+            complaint_category,
+            row_number() OVER (
+                PARTITION BY account_id
+                ORDER BY count(*) DESC, min(sentiment_score) ASC, max(timestamp) DESC
+            ) AS rn
+        FROM INTERACTION_TRANSCRIPTS
+        WHERE account_id IS NOT NULL AND complaint_category IS NOT NULL
+        GROUP BY account_id, complaint_category
+    ),
+    t AS (
+        SELECT
+            i.account_id,
+            round(avg(i.sentiment_score), 3) AS avg_sentiment,
+            sum(CASE WHEN i.interaction_type = 'support_ticket' THEN 1 ELSE 0 END) AS support_ticket_count,
+            sum(CASE WHEN i.sentiment_score < -0.3 THEN 1 ELSE 0 END) AS negative_interaction_count,
+            any_value(c.complaint_category) AS top_complaint_category
+        FROM INTERACTION_TRANSCRIPTS i
+        LEFT JOIN complaint_ranked c ON i.account_id = c.account_id AND c.rn = 1
+        WHERE i.account_id IS NOT NULL
+        GROUP BY i.account_id
+    )
+    SELECT
+        a.account_id,
+        a.industry,
+        a.annual_revenue,
+        a.tier,
+        a.is_churned,
+        date_diff('day', a.subscription_start_date, coalesce(a.subscription_end_date, DATE '{as_of}')) AS tenure_days,
+        a.account_owner_id,
+        coalesce(u.total_sessions, 0) AS total_sessions,
+        coalesce(u.active_users, 0) AS active_users,
+        coalesce(u.features_adopted, 0) AS features_adopted,
+        coalesce(u.avg_session_duration, 0) AS avg_session_duration,
+        coalesce(u.error_rate, 0) AS error_rate,
+        coalesce(u.days_since_last_active, 999) AS days_since_last_active,
+        coalesce(t.avg_sentiment, 0) AS avg_sentiment,
+        coalesce(t.support_ticket_count, 0) AS support_ticket_count,
+        coalesce(t.negative_interaction_count, 0) AS negative_interaction_count,
+        coalesce(t.top_complaint_category, 'none') AS top_complaint_category,
+        {score} AS health_score
+    FROM ACCOUNTS a
+    LEFT JOIN u ON a.account_id = u.account_id
+    LEFT JOIN t ON a.account_id = t.account_id
+"""
+
+
+def generate(scale, seed):
+    data_dir = tempfile.mkdtemp(prefix="vp-bench-")
+    subprocess.run([sys.executable, os.path.join(ROOT, "data-generation", "generate.py"),
+                    "--scale", str(scale), "--seed", str(seed), "--out", data_dir, "--format", "json",
+                    "--datasets", "accounts,usage_logs,transcripts"],
+                   check=True, stdout=subprocess.DEVNULL, cwd=os.path.join(ROOT, "data-generation"))
+    return data_dir
+
+
+def load_tables(snowflake, data_dir):
+    # straight into DuckDB, not counted as Lambda SQL
+    db = snowflake.db
+    db.execute(f"CREATE TABLE ACCOUNTS AS SELECT * FROM read_csv_auto('{data_dir}/crm/accounts.csv')")
+    db.execute(f"""
+        CREATE TABLE USAGE_LOGS AS
+        SELECT session_id, account_id, user_id, feature_used, session_duration_seconds,
+               error_codes_encountered, timestamp::timestamp AS timestamp
+        FROM ({events_sql(data_dir, 'usage_logs')})
+    """)
+    db.execute(TRANSCRIPTS_DDL)
+    return {
+        "accounts": db.execute("SELECT count(*) FROM ACCOUNTS").fetchone()[0],
+        "sessions": db.execute("SELECT count(*) FROM USAGE_LOGS").fetchone()[0]
+    }
+
+
+def bedrock_responder(preclassify):
+    # classification prompts get preclassifier labels, so sentiment and categories vary like real enrichment
+    def label(body):
+        score, category, _ = preclassify(body)
+        return {"sentiment_score": score, "complaint_category": category}
+
+    def respond(prompt):
+        if prompt.startswith("Analyze each"):
+            items = json.loads(prompt.split("Transcripts:\n", 1)[1])
+            return json.dumps([{"interaction_id": item["interaction_id"], **label(item["transcript"])} for item in items])
+        if prompt.startswith("Analyze the following"):
+            return json.dumps(label(prompt.split("Transcript:\n", 1)[1]))
+        return RAG_ANSWER
+
+    return respond
+
+
+def counters(s3, bedrock, snowflake):
+    return {"s3": dict(s3.calls), "bedrock": bedrock.calls, "sql": dict(snowflake.calls)}
+
+
+def count_diff(before, after):
+    if isinstance(after, dict):
+        diff = {key: value - before.get(key, 0) for key, value in after.items()}
+        return {key: value for key, value in sorted(diff.items()) if value}
+    return after - before
+
+
+def rss_mb():
+    # high-water mark of the whole process, ru_maxrss is in KiB on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2 ** 20 if sys.platform == "darwin" else maxrss / 1024
+
+
+class Stage:
+    """Times every handler call made inside the with block and summarizes them."""
+
+    def __init__(self, name, clients, args):
+        self.name = name
+        self.clients = clients
+        self.trace_memory = args.trace_memory
+        self.verbose = args.verbose
+        self.latencies = []
+        self.records = 0
+
+    def __enter__(self):
+        self.output = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+        self.before = counters(*self.clients)
+        if self.trace_memory:
+            tracemalloc.start()
+        return self
+
+    def call(self, handler, event):
+        with self.output:
+            start = time.perf_counter()
+            response = handler(event, None)
+            self.latencies.append((time.perf_counter() - start) * 1000)
+        return response
+
+    def __exit__(self, *exc):
+        self.traced_peak_mb = None
+        if self.trace_memory:
+            self.traced_peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        self.after = counters(*self.clients)
+        if not self.verbose:
+            self.output._new_target.close()
+
+    def summary(self):
+        latencies = np.array(self.latencies)
+        total_ms = latencies.sum()
+        calls = {name: count_diff(self.before[name], self.after[name]) for name in self.after}
+        return {
+            "invocations": len(latencies),
+            "records": self.records,
+            "records_per_sec": round(self.records / (total_ms / 1000), 1) if total_ms else None,
+            "total_ms": round(total_ms, 1),
+            **{f"p{q}_ms": round(float(np.percentile(latencies, q)), 2) for q in (50, 95, 99)},
+            "max_ms": round(float(latencies.max()), 2),
+            "calls": calls,
+            "traced_peak_mb": None if self.traced_peak_mb is None else round(self.traced_peak_mb, 1)
+        }
+
+
+def dashboard_rows(response):
+    if response["statusCode"] != 200:
+        raise RuntimeError(f"dashboard returned {response['statusCode']}: {response['body']}")
+    if response.get("isBase64Encoded"):
+        body = json.loads(gzip.decompress(base64.b64decode(response["body"])))
+        return body["accounts"]["rows"], body["next_cursor"]
+    body = json.loads(response["body"])
+    return len(body["accounts"]), body["next_cursor"]
+
+
+def dashboard_queries(risk_tiers):
+    for risk in ["all"] + risk_tiers:
+        for sort, direction in [("HEALTH_SCORE", "asc"), ("ANNUAL_REVENUE", "desc"), ("RISK", "asc")]:
+            for fmt in ("json", "columnar"):
+                yield {"risk": risk, "sort": sort, "dir": direction, "format": fmt}
+    yield {"industry": "Technology", "sort": "DAYS_SINCE_LAST_ACTIVE", "dir": "desc"}
+    yield {"search": "ACC-00", "format": "columnar"}
+
+
+def run_dashboard(stage, dashboard, pages):
+    events = []
+    for query in dashboard_queries(dashboard.RISK_TIERS):
+        query = dict(query)
+        for _ in range(pages if query.get("risk") == "all" else 1):
+            event = {"queryStringParameters": dict(query), "headers": {}}
+            rows, next_cursor = dashboard_rows(stage.call(dashboard.lambda_handler, event))
+            stage.records += rows
+            events.append(event)
+            if not next_cursor:
+                break
+            query["cursor"] = next_cursor
+    return events
+
+
+def run_account_transcripts(stage, transcripts, accounts, limit):
+    for account_id in accounts:
+        path = {"account_id": account_id}
+        query = {"limit": str(limit)}
+        first_id = None
+        for _ in range(2):
+            response = stage.call(transcripts.lambda_handler, {"pathParameters": path, "queryStringParameters": query})
+            body = json.loads(response["body"])
+            stage.records += len(body["transcripts"])
+            first_id = first_id or (body["transcripts"][0]["INTERACTION_ID"] if body["transcripts"] else None)
+            if not body["next_cursor"]:
+                break
+            query = dict(query, cursor=body["next_cursor"])
+        if first_id:
+            stage.call(transcripts.lambda_handler, {"pathParameters": dict(path, interaction_id=first_id)})
+            stage.records += 1
+
+
+def run_rag(stage, rag):
+    for question in QUESTIONS:
+        response = stage.call(rag.lambda_handler, {"body": json.dumps({"query": question})})
+        if response["statusCode"] != 200:
+            raise RuntimeError(f"rag_query returned {response['statusCode']}: {response['body']}")
+        stage.records += 1
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(args):
+    os.environ.setdefault("DATA_LAKE_BUCKET", BUCKET)
+    os.environ.setdefault("CACHE_BUCKET", BUCKET)
+
+    data_dir = args.data_dir or generate(args.scale, args.seed)
+    s3 = FakeS3()
+    snowflake = DuckDBSnowflake()
+    dataset = load_tables(snowflake, data_dir)
+    s3.upload_dir(BUCKET, "raw/transcripts/", os.path.join(data_dir, "transcripts"))
+
+    bedrock = FakeBedrock(first_token_delay=args.bedrock_latency, token_delay=args.token_delay)
+    lister = load_lambda("list_transcripts", s3=s3)
+    processor = load_lambda("process_transcripts", s3=s3, bedrock=bedrock,
+                            get_connection=snowflake.get_connection, reset_connection=snowflake.reset_connection)
+    dashboard = load_lambda("get_dashboard_data", s3=s3, execute=snowflake.execute)
+    transcripts = load_lambda("get_account_transcripts", execute=snowflake.execute)
+    rag = load_lambda("rag_query", bedrock=bedrock, execute=snowflake.execute)
+    # the layer module the dashboard and RAG Lambdas read the dbt marker through
+    import data_version
+    data_version.s3 = s3
+    bedrock.responder = bedrock_responder(processor.preclassify)
+    s3.calls.clear()
+
+    clients = (s3, bedrock, snowflake)
+    handlers = {}
+
+    def record(stage):
+        handlers[stage.name] = stage.summary()
+        print(f"  {stage.name}: {len(stage.latencies)} calls, {stage.records} records")
+
+    print(f"Benchmarking {dataset['accounts']} accounts, {dataset['sessions']} sessions from {data_dir}")
+
+    with Stage("list_transcripts", clients, args) as stage:
+        for _ in range(args.repeat):
+            units = stage.call(lister.lambda_handler, {"full_refresh": True})["files"]
+            stage.records += len(units)
+    record(stage)
+
+    with Stage("process_transcripts", clients, args) as stage:
+        for unit in units:
+            stage.records += stage.call(processor.lambda_handler, unit)["records_processed"]
+    record(stage)
+    dataset["transcripts"] = stage.records
+    dataset["work_units"] = len(units)
+
+    with Stage("list_transcripts:incremental", clients, args) as stage:
+        for _ in range(args.repeat):
+            stage.records += len(stage.call(lister.lambda_handler, {})["files"])
+    record(stage)
+
+    # what `dbt run` and the marker upload would do, outside any timing
+    snowflake.db.execute(MART_SQL.format(as_of=args.as_of, score=mart_score_sql()))
+    s3.put_object(Bucket=BUCKET, Key=MARKER_KEY, Body=json.dumps({"generated_at": args.as_of}))
+    s3.calls.clear()
+
+    with Stage("get_dashboard_data", clients, args) as stage:
+        events = run_dashboard(stage, dashboard, args.pages)
+    record(stage)
+    with Stage("get_dashboard_data:cached", clients, args) as stage:
+        for _ in range(args.repeat):
+            for event in events:
+                stage.records += dashboard_rows(stage.call(dashboard.lambda_handler, event))[0]
+    record(stage)
+
+    busiest = [row[0] for row in snowflake.db.execute("""
+        SELECT account_id FROM INTERACTION_TRANSCRIPTS WHERE account_id IS NOT NULL
+        GROUP BY account_id ORDER BY count(*) DESC, account_id LIMIT ?
+    """, [args.accounts]).fetchall()]
+    with Stage("get_account_transcripts", clients, args) as stage:
+        run_account_transcripts(stage, transcripts, busiest, args.limit)
+    record(stage)
+
+    with Stage("rag_query", clients, args) as stage:
+        run_rag(stage, rag)
+    record(stage)
+    with Stage("rag_query:cached", clients, args) as stage:
+        for _ in range(args.repeat):
+            run_rag(stage, rag)
+    record(stage)
+
+    return {
+        "label": args.label or git_commit(),
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "scale": None if args.data_dir else args.scale,
+            "seed": None if args.data_dir else args.seed,
+            "data_dir": args.data_dir,
+            "repeat": args.repeat,
+            "pages": args.pages,
+            "accounts": args.accounts,
+            "limit": args.limit,
+            "bedrock_latency": args.bedrock_latency,
+            "token_delay": args.token_delay,
+            "trace_memory": args.trace_memory,
+            "settings": {name: os.environ[name] for name in SETTINGS if name in os.environ}
+        },
+        "dataset": dataset,
+        "handlers": handlers,
+        "rss_high_water_mb": round(rss_mb(), 1)
+    }
+
+
+def total_calls(calls):
+    return sum(calls.values()) if isinstance(calls, dict) else calls
+
+
+def print_summary(result):
+    print(f"{result['label']}: {json.dumps(result['dataset'])}, peak RSS {result['rss_high_water_mb']} MB")
+    print(f"  {'handler':<30} {'calls':>6} {'records/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          f" {'s3':>6} {'bedrock':>7} {'sql':>6}")
+    for name, h in result["handlers"].items():
+        print(f"  {name:<30} {h['invocations']:>6} {h['records_per_sec'] or 0:>10.1f} {h['p50_ms']:>8.2f}"
+              f" {h['p95_ms']:>8.2f} {h['p99_ms']:>8.2f} {total_calls(h['calls']['s3']):>6}"
+              f" {h['calls']['bedrock']:>7} {total_calls(h['calls']['sql']):>6}")
+
+
+def regressions(before, after, threshold, min_delta_ms):
+    found = []
+    for name, b in before["handlers"].items():
+        a = after["handlers"].get(name)
+        if a is None:
+            found.append(f"{name}: missing from the new run")
+            continue
+        if a["p95_ms"] > b["p95_ms"] * (1 + threshold) and a["p95_ms"] - b["p95_ms"] > min_delta_ms:
+            found.append(f"{name}: p95 {b['p95_ms']:.2f} -> {a['p95_ms']:.2f} ms")
+        slower_ms = a["total_ms"] / a["invocations"] - b["total_ms"] / b["invocations"]
+        if (b["records_per_sec"] and (a["records_per_sec"] or 0) < b["records_per_sec"] * (1 - threshold)
+                and slower_ms > min_delta_ms):
+            found.append(f"{name}: {b['records_per_sec']:.1f} -> {a['records_per_sec'] or 0:.1f} records/s")
+        if a["traced_peak_mb"] is not None and b["traced_peak_mb"] is not None:
+            if a["traced_peak_mb"] > b["traced_peak_mb"] * (1 + threshold):
+                found.append(f"{name}: traced heap peak {b['traced_peak_mb']} -> {a['traced_peak_mb']} MB")
+        for client in ("s3", "bedrock", "sql"):
+            calls_before, calls_after = total_calls(b["calls"][client]), total_calls(a["calls"][client])
+            if calls_after > calls_before:
+                found.append(f"{name}: {client} calls {calls_before} -> {calls_after}")
+    if after["rss_high_water_mb"] > before["rss_high_water_mb"] * (1 + threshold):
+        found.append(f"peak RSS {before['rss_high_water_mb']} -> {after['rss_high_water_mb']} MB")
+    return found
+
+
+def compare(before_path, after_path, threshold, min_delta_ms):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print_summary(before)
+    print_summary(after)
+    if before["config"] != after["config"]:
+        print("WARNING: the runs used different settings, the numbers are not directly comparable")
+    for name, b in before["handlers"].items():
+        a = after["handlers"].get(name)
+        if a and b["p50_ms"]:
+            print(f"{name}: p50 x{a['p50_ms'] / b['p50_ms']:.2f}, p95 x{a['p95_ms'] / max(b['p95_ms'], 0.01):.2f}")
+
+    found = regressions(before, after, threshold, min_delta_ms)
+    for line in found:
+        print(f"  REGRESSION {line}")
+    if found:
+        print(f"FAILED: {len(found)} regressions beyond {threshold:.0%}")
+        sys.exit(1)
+    print("OK: no regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="generate.py scale, 1 = 200 accounts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="JSON output of data-generation/generate.py, generated at --scale when omitted")
+    parser.add_argument("--as-of", default="2025-01-01", help="date the mart counts days_since_last_active and tenure to")
+    parser.add_argument("--bedrock-latency", type=float, default=0.0, help="seconds FakeBedrock waits before answering")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds per output word on top")
+    parser.add_argument("--repeat", type=int, default=3, help="replays of the list, dashboard and RAG request sets")
+    parser.add_argument("--pages", type=int, default=5, help="dashboard pages followed for the unfiltered queries")
+    parser.add_argument("--accounts", type=int, default=20, help="busiest accounts whose transcripts are listed")
+    parser.add_argument("--limit", type=int, default=50, help="transcripts page size")
+    parser.add_argument("--trace-memory", action="store_true", help="also record the traced Python heap peak per handler")
+    parser.add_argument("--verbose", action="store_true", help="show the handlers' own log lines")
+    parser.add_argument("--label", help="name of the run, defaults to the current git commit")
+    parser.add_argument("--out", default="pipeline_benchmark.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown before --compare fails")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="latency changes smaller than this, at p95 or per call, are noise")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare, args.threshold, args.min_delta_ms)
+        return
+
+    result = benchmark(args)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print_summary(result)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
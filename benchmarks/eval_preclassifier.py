@@ -0,0 +1,97 @@
+"""Measure how well the local keyword tier agrees with Bedrock labels.
+
+Takes transcripts that already carry Bedrock labels, e.g. an export of INTERACTION_TRANSCRIPTS
+as JSON lines (interaction_id, transcript_body, sentiment_score, complaint_category; column
+names in any case). With --live the generated corpus is labelled through Bedrock instead, one
+call per distinct body, using the same code path as process_transcripts.
+
+For each threshold it reports the share of Bedrock calls saved and, on the records the local
+tier would have kept, category agreement, sentiment sign agreement and mean absolute error.
+
+    python benchmarks/eval_preclassifier.py --labels interaction_transcripts.jsonl
+    python benchmarks/eval_preclassifier.py --live --transcripts-dir data-generation/transcripts
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESS_TRANSCRIPTS_DIR = os.path.join(ROOT, "pipelines", "lambda", "process_transcripts")
+# shared modules such as snowflake_session, under /opt/python in Lambda
+LAYER_DIR = os.path.join(ROOT, "pipelines", "lambda", "layer")
+
+sys.path.insert(0, PROCESS_TRANSCRIPTS_DIR)
+sys.path.append(LAYER_DIR)
+from preclassifier import preclassify  # noqa: E402
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+
+
+def sign(x, dead_zone=0.1):
+    return 0 if abs(x) < dead_zone else (1 if x > 0 else -1)
+
+
+def load_labelled(path):
+    records = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = {k.lower(): v for k, v in json.loads(line).items()}
+                row["sentiment_score"] = float(row["sentiment_score"])
+                records.append(row)
+    return records
+
+
+def label_live(transcripts_dir):
+    spec = importlib.util.spec_from_file_location("process_transcripts", os.path.join(PROCESS_TRANSCRIPTS_DIR, "lambda_function.py"))
+    pt = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(pt)
+
+    records = []
+    for path in sorted(glob.glob(os.path.join(transcripts_dir, "**", "*.json"), recursive=True)):
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+
+    labels = {}
+    for record in records:
+        body = record["transcript_body"]
+        if body not in labels:
+            labels[body] = pt.analyze_transcript(body)
+        record["sentiment_score"], record["complaint_category"] = labels[body]
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--labels", help="JSON lines file of Bedrock-labelled transcripts")
+    parser.add_argument("--live", action="store_true", help="label the generated corpus with Bedrock")
+    parser.add_argument("--transcripts-dir", default=os.path.join(ROOT, "data-generation", "transcripts"))
+    args = parser.parse_args()
+
+    if args.labels:
+        records = load_labelled(args.labels)
+    elif args.live:
+        records = label_live(args.transcripts_dir)
+    else:
+        parser.error("pass --labels FILE or --live")
+
+    scored = [(record, preclassify(record["transcript_body"])) for record in records]
+    print(f"{len(records)} labelled transcripts\n")
+    print(f"{'threshold':>9} {'calls saved':>12} {'category':>9} {'sign':>7} {'MAE':>6}")
+
+    for threshold in THRESHOLDS:
+        kept = [(record, local) for record, local in scored if local[2] >= threshold]
+        if not kept:
+            print(f"{threshold:>9.2f} {0:>11.1%} {'-':>9} {'-':>7} {'-':>6}")
+            continue
+        category = sum(r["complaint_category"] == local[1] for r, local in kept) / len(kept)
+        signs = sum(sign(r["sentiment_score"]) == sign(local[0]) for r, local in kept) / len(kept)
+        mae = sum(abs(r["sentiment_score"] - local[0]) for r, local in kept) / len(kept)
+        print(f"{threshold:>9.2f} {len(kept) / len(records):>11.1%} {category:>9.1%} {signs:>7.1%} {mae:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
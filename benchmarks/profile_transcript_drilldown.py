@@ -0,0 +1,169 @@
+"""Profile the transcript drill-down queries to see whether clustering pays off.
+
+Runs the same list-page and single-body queries get_account_transcripts issues,
+with the result cache off. For each one it reads the query profile: partitions
+scanned vs total from GET_QUERY_OPERATOR_STATS, and elapsed time and bytes
+scanned from QUERY_HISTORY_BY_SESSION. It also records
+SYSTEM$CLUSTERING_INFORMATION for the clustering key.
+
+Capture a run before and after the cluster_by on INTERACTION_TRANSCRIPTS is
+applied (and Automatic Clustering has caught up, see average_depth), then compare:
+
+    python benchmarks/profile_transcript_drilldown.py --label before --out before.json
+    python benchmarks/profile_transcript_drilldown.py --label after --out after.json
+    python benchmarks/profile_transcript_drilldown.py --compare before.json after.json
+
+Needs AWS credentials for the Snowflake secret (SECRET_NAME, default
+vantagepoint/snowflake/config) and the snowflake-connector layer packages.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, "pipelines", "lambda")
+CLUSTERING_KEY = "(ACCOUNT_ID, TO_DATE(TIMESTAMP))"
+
+
+def load_transcripts_lambda():
+    sys.path.insert(0, os.path.join(LAMBDA_DIR, "layer"))
+    path = os.path.join(LAMBDA_DIR, "get_account_transcripts", "lambda_function.py")
+    spec = importlib.util.spec_from_file_location("get_account_transcripts", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def last_query_id(execute):
+    cursor = execute("SELECT LAST_QUERY_ID()")
+    query_id = cursor.fetchone()[0]
+    cursor.close()
+    return query_id
+
+
+def query_profile(execute, query_id):
+    cursor = execute("""
+        SELECT operator_statistics:pruning:partitions_scanned::int,
+               operator_statistics:pruning:partitions_total::int
+        FROM TABLE(GET_QUERY_OPERATOR_STATS(%s))
+        WHERE operator_type = 'TableScan'
+    """, (query_id,))
+    scans = cursor.fetchall()
+    cursor.close()
+
+    cursor = execute("""
+        SELECT total_elapsed_time, bytes_scanned
+        FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => 1000))
+        WHERE query_id = %s
+    """, (query_id,))
+    elapsed_ms, bytes_scanned = cursor.fetchone()
+    cursor.close()
+
+    return {
+        "query_id": query_id,
+        "partitions_scanned": sum(s[0] or 0 for s in scans),
+        "partitions_total": sum(s[1] or 0 for s in scans),
+        "elapsed_ms": elapsed_ms,
+        "bytes_scanned": bytes_scanned
+    }
+
+
+def pick_accounts(execute, count):
+    # the accounts with the most history are the ones drill-downs struggle with
+    cursor = execute("""
+        SELECT account_id FROM INTERACTION_TRANSCRIPTS
+        GROUP BY account_id ORDER BY COUNT(*) DESC LIMIT %s
+    """, (count,))
+    accounts = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return accounts
+
+
+def profile(args):
+    transcripts = load_transcripts_lambda()
+    execute = transcripts.execute
+
+    execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE").close()
+    cursor = execute(f"SELECT SYSTEM$CLUSTERING_INFORMATION('INTERACTION_TRANSCRIPTS', '{CLUSTERING_KEY}')")
+    clustering = json.loads(cursor.fetchone()[0])
+    cursor.close()
+
+    accounts = args.account or pick_accounts(execute, args.accounts)
+    runs = []
+    for account_id in accounts:
+        for _ in range(args.repeat):
+            page, _ = transcripts.list_transcripts(account_id, transcripts.parse_params({"limit": str(args.limit)}))
+            runs.append({"query": "list_page", "account_id": account_id, **query_profile(execute, last_query_id(execute))})
+            if page:
+                transcripts.get_transcript(account_id, page[0]["INTERACTION_ID"])
+                runs.append({"query": "single_body", "account_id": account_id, **query_profile(execute, last_query_id(execute))})
+
+    result = {
+        "label": args.label,
+        "clustering_key": CLUSTERING_KEY,
+        "clustering": {k: clustering.get(k) for k in ("total_partition_count", "average_overlaps", "average_depth")},
+        "runs": runs
+    }
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2, default=str)
+    print_summary(result)
+
+
+def summarize(result, query):
+    runs = [r for r in result["runs"] if r["query"] == query]
+    if not runs:
+        return None
+    return {
+        "partitions_scanned": statistics.mean(r["partitions_scanned"] for r in runs),
+        "partitions_total": statistics.mean(r["partitions_total"] for r in runs),
+        "elapsed_ms_p50": statistics.median(r["elapsed_ms"] for r in runs),
+        "bytes_scanned": statistics.mean(r["bytes_scanned"] for r in runs)
+    }
+
+
+def print_summary(result):
+    print(f"{result['label']}: clustering {result['clustering']}")
+    for query in ("list_page", "single_body"):
+        s = summarize(result, query)
+        if s:
+            print(f"  {query:<12} partitions {s['partitions_scanned']:.1f}/{s['partitions_total']:.1f}  "
+                  f"p50 {s['elapsed_ms_p50']:.0f} ms  {s['bytes_scanned'] / 1024:.0f} KiB scanned")
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print_summary(before)
+    print_summary(after)
+    for query in ("list_page", "single_body"):
+        b, a = summarize(before, query), summarize(after, query)
+        if b and a and b["partitions_scanned"]:
+            print(f"{query}: partitions scanned x{a['partitions_scanned'] / b['partitions_scanned']:.2f}, "
+                  f"p50 elapsed x{a['elapsed_ms_p50'] / max(b['elapsed_ms_p50'], 1):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--out", default="drilldown_profile.json")
+    parser.add_argument("--account", action="append", help="account to profile, repeatable")
+    parser.add_argument("--accounts", type=int, default=5, help="busiest accounts to profile when --account is not given")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_NAME", "vantagepoint/snowflake/config")
+    if args.compare:
+        compare(*args.compare)
+    else:
+        profile(args)
+
+
+if __name__ == "__main__":
+    main()
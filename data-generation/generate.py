@@ -0,0 +1,339 @@
+"""Generate the synthetic dataset at any scale, for load-testing the pipeline.
+
+--scale 1 matches the size of the per-table scripts (200 accounts, ~275
+opportunities, 7,500 sessions, 650 transcripts) with the same distributions;
+--scale 1000 gives 200k accounts, 7.5M sessions and 650k transcripts.
+
+    python generate.py --scale 100 --out /tmp/vp --format parquet
+
+Output under --out:
+
+    usage_logs/year=/month=/usage_logs_<year>_<month>.json|.parquet
+    transcripts/year=/month=/transcripts_<year>_<month>.json|.parquet
+    crm/accounts.csv, crm/opportunities.csv
+    crm/copy_into.sql     PUT + COPY INTO for the two CRM tables (run with snowsql)
+
+Sampling is vectorized with NumPy. Each year=/month= partition is generated by
+a worker process in fixed-size chunks and streamed to its file, so memory stays
+flat whatever the scale. Every chunk draws from its own SeedSequence keyed by
+(dataset, partition, chunk), so the output depends only on --seed and --scale,
+not on --workers.
+
+Needs numpy, and pyarrow for --format parquet.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import date
+from multiprocessing import Pool
+
+import numpy as np
+
+from transcript_templates import (support_templates, sales_templates, email_templates, features as transcript_features,
+                                  products, interaction_types, type_weights)
+
+BASE_ACCOUNTS = 200
+BASE_SESSIONS = 7500
+BASE_TRANSCRIPTS = 650
+
+# activity spans 2023-01-01 to 2024-12-31, like the per-table scripts
+ACTIVITY_START = np.datetime64("2023-01-01")
+ACTIVITY_DAYS = 731
+# churned accounts end before this date, fixed so reruns stay identical
+AS_OF = date(2025, 1, 1)
+
+CHUNK_ROWS = 200000
+
+# spawn keys, so every dataset draws from its own streams
+DATASET_KEYS = {"accounts": 0, "opportunities": 1, "usage_logs": 2, "transcripts": 3}
+
+industries = ["Technology", "Healthcare", "Finance", "Retail", "Manufacturing",
+              "Education", "Media", "Logistics", "Energy", "Real Estate"]
+tiers = ["standard", "enterprise"]
+stages = ["prospecting", "closed-won", "closed-lost"]
+lead_sources = ["Organic", "Referral", "Outbound", "Partner", "Event", "Paid Ads"]
+usage_features = ["Dashboard", "Reports", "User Management", "Billing",
+                  "API Console", "Integrations", "Notifications", "Data Export",
+                  "Workflow Builder", "Search", "Settings", "Audit Log"]
+error_codes = [None, None, None, None, None, "ERR_TIMEOUT", "ERR_AUTH_FAIL", "ERR_RATE_LIMIT"]
+
+# same column types as SCHEMAS in pipelines/glue/compact_to_parquet.py, so Parquet output loads like curated/
+PARQUET_COLUMNS = {
+    "usage_logs": [("session_id", "string"), ("account_id", "string"), ("user_id", "string"),
+                   ("feature_used", "string"), ("session_duration_seconds", "int32"),
+                   ("error_codes_encountered", "string"), ("timestamp", "timestamp")],
+    "transcripts": [("interaction_id", "string"), ("account_id", "string"), ("opportunity_id", "string"),
+                    ("timestamp", "timestamp"), ("interaction_type", "string"), ("transcript_body", "string")]
+}
+
+
+def rng_for(seed, *key):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=key))
+
+
+def month_partitions():
+    # (year, month, first day offset, number of days) inside the activity window
+    days = ACTIVITY_START + np.arange(ACTIVITY_DAYS)
+    months = days.astype("datetime64[M]")
+    partitions = []
+    for month in np.unique(months):
+        offsets = np.nonzero(months == month)[0]
+        year, month_num = str(month).split("-")
+        partitions.append((int(year), int(month_num), int(offsets[0]), len(offsets)))
+    return partitions
+
+
+def plan_partitions(seed, dataset, total):
+    # split the rows across months in proportion to their days, then give each a contiguous id range
+    partitions = month_partitions()
+    weights = np.array([p[3] for p in partitions]) / ACTIVITY_DAYS
+    counts = rng_for(seed, DATASET_KEYS[dataset]).multinomial(total, weights)
+    tasks, first_id = [], 1
+    for index, ((year, month, first_day, num_days), count) in enumerate(zip(partitions, counts)):
+        if count:
+            tasks.append({"dataset": dataset, "index": index, "year": year, "month": month,
+                          "first_day": first_day, "num_days": num_days, "rows": int(count), "first_id": first_id})
+        first_id += int(count)
+    return tasks
+
+
+def timestamps(rng, task, n, first_hour, last_hour):
+    day = task["first_day"] + rng.integers(0, task["num_days"], n)
+    seconds = day * 86400 + rng.integers(first_hour, last_hour + 1, n) * 3600 + rng.integers(0, 60, n) * 60
+    return ACTIVITY_START.astype("datetime64[s]") + seconds
+
+
+def usage_chunk(rng, task, first_id, n, num_accounts):
+    account = rng.integers(1, num_accounts + 1, n)
+    user = rng.integers(1, 6, n)
+    ts = timestamps(rng, task, n, 6, 22)
+    feature = rng.integers(0, len(usage_features), n)
+    duration = rng.integers(10, 3601, n)
+    error = rng.integers(0, len(error_codes), n)
+    return {
+        "session_id": [f"SES-{i:06d}" for i in range(first_id, first_id + n)],
+        "account_id": [f"ACC-{a:04d}" for a in account.tolist()],
+        "user_id": [f"USR-ACC-{a:04d}-{u}" for a, u in zip(account.tolist(), user.tolist())],
+        "feature_used": np.array(usage_features, dtype=object)[feature].tolist(),
+        "session_duration_seconds": duration.tolist(),
+        "error_codes_encountered": np.array(error_codes, dtype=object)[error].tolist(),
+        "timestamp": ts
+    }
+
+
+def transcript_bodies():
+    # every template filled with every feature and product, indexed [type][template, feature, product]
+    return [np.array([[[t.format(feature=f, product=p) for p in products] for f in transcript_features]
+                      for t in templates], dtype=object)
+            for templates in (support_templates, sales_templates, email_templates)]
+
+
+def transcript_chunk(rng, task, first_id, n, num_accounts, num_opportunities, bodies):
+    kind = rng.choice(len(interaction_types), n, p=type_weights)
+    account = rng.integers(1, num_accounts + 1, n)
+    ts = timestamps(rng, task, n, 8, 18)
+    feature = rng.integers(0, len(transcript_features), n)
+    product = rng.integers(0, len(products), n)
+    template = (rng.random(n) * np.array([len(b) for b in bodies])[kind]).astype(np.int64)
+    opportunity = rng.integers(1, max(num_opportunities, 1) + 1, n)
+    # support tickets belong to an account, sales calls to an opportunity, emails to either
+    has_account = (kind == 0) | ((kind == 2) & (rng.random(n) < 0.5))
+
+    body = np.empty(n, dtype=object)
+    for k, table in enumerate(bodies):
+        rows = kind == k
+        body[rows] = table[template[rows], feature[rows], product[rows]]
+    return {
+        "interaction_id": [f"INT-{i:05d}" for i in range(first_id, first_id + n)],
+        "account_id": [f"ACC-{a:04d}" if h else None for a, h in zip(account.tolist(), has_account.tolist())],
+        "opportunity_id": [None if h else f"OPP-{o:05d}" for o, h in zip(opportunity.tolist(), has_account.tolist())],
+        "timestamp": ts,
+        "interaction_type": np.array(interaction_types, dtype=object)[kind].tolist(),
+        "transcript_body": body.tolist()
+    }
+
+
+def json_lines(columns, dataset):
+    columns = dict(columns, timestamp=[t + "Z" for t in np.datetime_as_string(columns["timestamp"], unit="s").tolist()])
+    names = [name for name, _ in PARQUET_COLUMNS[dataset]]
+    lines = []
+    for values in zip(*(columns[name] for name in names)):
+        record = dict(zip(names, values))
+        if dataset == "transcripts":
+            # same keys as generate_transcripts.py: only the id the interaction actually has
+            record = {k: v for k, v in record.items() if v is not None or k not in ("account_id", "opportunity_id")}
+        lines.append(json.dumps(record))
+    return "\n".join(lines) + "\n"
+
+
+def parquet_schema(dataset):
+    import pyarrow as pa
+    types = {"string": pa.string(), "int32": pa.int32(), "timestamp": pa.timestamp("us", tz="UTC")}
+    return pa.schema([pa.field(name, types[kind]) for name, kind in PARQUET_COLUMNS[dataset]])
+
+
+def write_partition(args):
+    task, seed, out_dir, fmt, num_accounts, num_opportunities = args
+    dataset = task["dataset"]
+    path = os.path.join(out_dir, dataset, f"year={task['year']}", f"month={task['month']:02d}")
+    os.makedirs(path, exist_ok=True)
+    filepath = os.path.join(path, f"{dataset}_{task['year']}_{task['month']:02d}.{fmt}")
+
+    bodies = transcript_bodies() if dataset == "transcripts" else None
+    writer, f = None, None
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = parquet_schema(dataset)
+        writer = pq.ParquetWriter(filepath, schema, compression="zstd")
+    else:
+        f = open(filepath, "w")
+
+    for chunk, start in enumerate(range(0, task["rows"], CHUNK_ROWS)):
+        n = min(CHUNK_ROWS, task["rows"] - start)
+        rng = rng_for(seed, DATASET_KEYS[dataset], task["index"], chunk)
+        first_id = task["first_id"] + start
+        if dataset == "usage_logs":
+            columns = usage_chunk(rng, task, first_id, n, num_accounts)
+        else:
+            columns = transcript_chunk(rng, task, first_id, n, num_accounts, num_opportunities, bodies)
+        if writer:
+            writer.write_table(pa.table(dict(columns, timestamp=columns["timestamp"].astype("datetime64[us]")),
+                                        schema=schema))
+        else:
+            f.write(json_lines(columns, dataset))
+
+    if writer:
+        writer.close()
+    else:
+        f.close()
+    return filepath, task["rows"]
+
+
+def generate_accounts(seed, num_accounts):
+    rng = rng_for(seed, DATASET_KEYS["accounts"])
+    start = np.datetime64("2021-01-01") + rng.integers(0, 1201, num_accounts)
+    churned = rng.random(num_accounts) < 0.27
+    end = start + rng.integers(60, 801, num_accounts)
+    # churn dates in the future are pulled back to shortly before AS_OF
+    as_of = np.datetime64(AS_OF)
+    end = np.where(end > as_of, as_of - rng.integers(1, 91, num_accounts), end)
+    return {
+        "account_id": [f"ACC-{i:04d}" for i in range(1, num_accounts + 1)],
+        "industry": np.array(industries, dtype=object)[rng.integers(0, len(industries), num_accounts)].tolist(),
+        "annual_revenue": np.round(rng.uniform(50000, 5000000, num_accounts), 2).tolist(),
+        "subscription_start_date": np.datetime_as_string(start).tolist(),
+        "subscription_end_date": [e if c else None for e, c in zip(np.datetime_as_string(end).tolist(), churned.tolist())],
+        "is_churned": ["TRUE" if c else "FALSE" for c in churned.tolist()],
+        "tier": np.array(tiers, dtype=object)[rng.choice(2, num_accounts, p=[0.6, 0.4])].tolist(),
+        "account_owner_id": [f"AO-{o:03d}" for o in rng.integers(1, 16, num_accounts).tolist()]
+    }
+
+
+def generate_opportunities(seed, num_accounts):
+    rng = rng_for(seed, DATASET_KEYS["opportunities"])
+    # some accounts have no opportunities at all
+    per_account = rng.choice(4, num_accounts, p=[0.15, 0.45, 0.28, 0.12])
+    account = np.repeat(np.arange(1, num_accounts + 1), per_account)
+    n = len(account)
+    close = np.datetime64("2021-06-01") + rng.integers(0, 1401, n)
+    return {
+        "opportunity_id": [f"OPP-{i:05d}" for i in range(1, n + 1)],
+        "account_id": [f"ACC-{a:04d}" for a in account.tolist()],
+        "product_code": np.array(products, dtype=object)[rng.integers(0, len(products), n)].tolist(),
+        "stage": np.array(stages, dtype=object)[rng.choice(3, n, p=[0.25, 0.45, 0.30])].tolist(),
+        "amount_gbp": np.round(rng.uniform(5000, 250000, n), 2).tolist(),
+        "close_date": np.datetime_as_string(close).tolist(),
+        "lead_source": np.array(lead_sources, dtype=object)[rng.integers(0, len(lead_sources), n)].tolist()
+    }
+
+
+def write_csv(path, columns):
+    # empty fields load as NULL (see copy_into.sql)
+    with open(path, "w", newline="") as f:
+        out = csv.writer(f)
+        out.writerow([name.upper() for name in columns])
+        rows = zip(*columns.values())
+        while True:
+            batch = [r for _, r in zip(range(CHUNK_ROWS), rows)]
+            if not batch:
+                break
+            out.writerows(batch)
+    return len(next(iter(columns.values())))
+
+
+def write_copy_into(crm_dir, tables):
+    sql = "USE WAREHOUSE VANTAGEPOINT_WH;\n"
+    sql += "USE DATABASE VANTAGEPOINT_PROD;\n"
+    sql += "USE SCHEMA B2BSAAS;\n\n"
+    sql += ("CREATE OR REPLACE TEMPORARY FILE FORMAT CRM_CSV TYPE = CSV SKIP_HEADER = 1\n"
+            "    FIELD_OPTIONALLY_ENCLOSED_BY = '\"' EMPTY_FIELD_AS_NULL = TRUE;\n\n")
+    for table, filename, columns in tables:
+        # each table's own stage, PUT compresses the file and COPY INTO loads it in parallel
+        sql += f"PUT file://{os.path.abspath(os.path.join(crm_dir, filename))} @%{table} OVERWRITE = TRUE;\n"
+        sql += f"COPY INTO {table} ({', '.join(c.upper() for c in columns)})\n"
+        sql += f"    FROM @%{table} FILE_FORMAT = (FORMAT_NAME = CRM_CSV) PURGE = TRUE;\n\n"
+    path = os.path.join(crm_dir, "copy_into.sql")
+    with open(path, "w") as f:
+        f.write(sql)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on 200 accounts / 7,500 sessions / 650 transcripts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=".", help="output directory")
+    parser.add_argument("--format", choices=["json", "parquet"], default="json",
+                        help="usage logs and transcripts as JSON lines or zstd Parquet")
+    parser.add_argument("--datasets", default="accounts,opportunities,usage_logs,transcripts")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    datasets = [d.strip() for d in args.datasets.split(",")]
+    num_accounts = max(1, round(BASE_ACCOUNTS * args.scale))
+    started = time.perf_counter()
+
+    # CRM tables are small next to the event data, generated in this process
+    opportunities = generate_opportunities(args.seed, num_accounts)
+    num_opportunities = len(opportunities["opportunity_id"])
+    crm_tables = []
+    crm_dir = os.path.join(args.out, "crm")
+    if "accounts" in datasets or "opportunities" in datasets:
+        os.makedirs(crm_dir, exist_ok=True)
+    if "accounts" in datasets:
+        accounts = generate_accounts(args.seed, num_accounts)
+        rows = write_csv(os.path.join(crm_dir, "accounts.csv"), accounts)
+        crm_tables.append(("ACCOUNTS", "accounts.csv", list(accounts)))
+        print(f"  {os.path.join(crm_dir, 'accounts.csv')} -> {rows} records")
+    if "opportunities" in datasets:
+        rows = write_csv(os.path.join(crm_dir, "opportunities.csv"), opportunities)
+        crm_tables.append(("OPPORTUNITIES", "opportunities.csv", list(opportunities)))
+        print(f"  {os.path.join(crm_dir, 'opportunities.csv')} -> {rows} records")
+    if crm_tables:
+        print(f"  {write_copy_into(crm_dir, crm_tables)}")
+
+    tasks = []
+    if "usage_logs" in datasets:
+        tasks += plan_partitions(args.seed, "usage_logs", round(BASE_SESSIONS * args.scale))
+    if "transcripts" in datasets:
+        tasks += plan_partitions(args.seed, "transcripts", round(BASE_TRANSCRIPTS * args.scale))
+    # biggest partitions first so no worker is left with a long tail
+    tasks.sort(key=lambda t: -t["rows"])
+    work = [(t, args.seed, args.out, args.format, num_accounts, num_opportunities) for t in tasks]
+
+    totals = {}
+    with Pool(max(1, args.workers)) as pool:
+        for (filepath, rows), task in zip(pool.imap(write_partition, work), tasks):
+            totals[task["dataset"]] = totals.get(task["dataset"], 0) + rows
+            print(f"  {filepath} -> {rows} records")
+
+    print(f"\nTotal: {num_accounts} accounts, {num_opportunities} opportunities, "
+          + ", ".join(f"{rows} {dataset}" for dataset, rows in totals.items())
+          + f" in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+{% macro recency_points(days_since_last_active) %}
+    (case
+        when {{ days_since_last_active }} <= 7 then 20
+        when {{ days_since_last_active }} <= 30 then 15
+        when {{ days_since_last_active }} <= 90 then 8
+        else 0
+    end)
+{% endmacro %}
@@ -0,0 +1,44 @@
+{{ config(
+    materialized='incremental',
+    unique_key=['account_id', 'interaction_date'],
+    incremental_strategy='delete+insert'
+) }}
+
+-- one row per account, day and complaint category; incremental runs rebuild only the days that got
+-- new or updated interactions. the category grain keeps the top-complaint tie-breakers mergeable
+with interactions as (
+    select
+        *,
+        coalesce(to_date(timestamp), '1900-01-01'::date) as interaction_date
+    from {{ ref('stg_interaction_transcripts') }}
+    where account_id is not null
+)
+
+{% if is_incremental() %}
+, changed_days as (
+    select distinct account_id, interaction_date
+    from interactions
+    where _loaded_at > (select max(_loaded_at) from {{ this }})
+)
+{% endif %}
+
+select
+    t.account_id,
+    t.interaction_date,
+    t.complaint_category,
+    count(*) as interactions,
+    sum(t.sentiment_score) as sentiment_sum,
+    count(t.sentiment_score) as sentiment_count,
+    min(t.sentiment_score) as worst_sentiment,
+    sum(case when t.interaction_type = 'support_ticket' then 1 else 0 end) as support_ticket_count,
+    sum(case when t.interaction_type = 'sales_call' then 1 else 0 end) as sales_call_count,
+    sum(case when t.interaction_type = 'email' then 1 else 0 end) as email_count,
+    sum(case when t.sentiment_score < -0.3 then 1 else 0 end) as negative_interaction_count,
+    max(t.timestamp) as most_recent,
+    max(t._loaded_at) as _loaded_at
+from interactions t
+{% if is_incremental() %}
+inner join changed_days d
+    on t.account_id = d.account_id and t.interaction_date = d.interaction_date
+{% endif %}
+group by t.account_id, t.interaction_date, t.complaint_category
@@ -0,0 +1,42 @@
+{{ config(
+    materialized='incremental',
+    unique_key=['account_id', 'activity_date'],
+    incremental_strategy='delete+insert'
+) }}
+
+-- one row per account per day; incremental runs rebuild only the days that got new or updated sessions.
+-- distinct users and features are kept as exact sets so int_usage_metrics can union them across days
+with sessions as (
+    select
+        *,
+        coalesce(to_date(timestamp), '1900-01-01'::date) as activity_date
+    from {{ ref('stg_usage_logs') }}
+    where account_id is not null
+)
+
+{% if is_incremental() %}
+, changed_days as (
+    select distinct account_id, activity_date
+    from sessions
+    where _loaded_at > (select max(_loaded_at) from {{ this }})
+)
+{% endif %}
+
+select
+    s.account_id,
+    s.activity_date,
+    count(*) as session_rows,
+    count(distinct s.session_id) as sessions,
+    array_unique_agg(s.user_id) as user_ids,
+    array_unique_agg(s.feature_used) as features_used,
+    sum(s.session_duration_seconds) as session_duration_sum,
+    count(s.session_duration_seconds) as session_duration_count,
+    sum(case when s.error_codes_encountered is not null then 1 else 0 end) as error_sessions,
+    max(s.timestamp) as last_active_at,
+    max(s._loaded_at) as _loaded_at
+from sessions s
+{% if is_incremental() %}
+inner join changed_days d
+    on s.account_id = d.account_id and s.activity_date = d.activity_date
+{% endif %}
+group by s.account_id, s.activity_date
@@ -1,17 +1,19 @@
 {{ config(materialized='table') }}
 
+-- rolled up from int_usage_daily, one row per account per day instead of every session
 select
     account_id,
-    count(distinct session_id) as total_sessions,
-    count(distinct user_id) as active_users,
-    count(distinct feature_used) as features_adopted,
-    round(avg(session_duration_seconds), 2) as avg_session_duration,
-    sum(case when error_codes_encountered is not null then 1 else 0 end) as total_errors,
+    sum(sessions) as total_sessions,
+    array_size(array_union_agg(user_ids)) as active_users,
+    array_size(array_union_agg(features_used)) as features_adopted,
+    round(sum(session_duration_sum) / nullif(sum(session_duration_count), 0), 2) as avg_session_duration,
+    sum(error_sessions) as total_errors,
     round(
-        sum(case when error_codes_encountered is not null then 1 else 0 end)::float 
-        / nullif(count(*), 0), 4
+        sum(error_sessions)::float 
+        / nullif(sum(session_rows), 0), 4
     ) as error_rate,
-    max(timestamp) as last_active_at,
-    datediff('day', max(timestamp), current_timestamp()) as days_since_last_active
-from {{ ref('stg_usage_logs') }}
-group by account_id
\ No newline at end of file
+    max(last_active_at) as last_active_at,
+    datediff('day', max(last_active_at), current_timestamp()) as days_since_last_active,
+    max(_loaded_at) as last_loaded_at
+from {{ ref('int_usage_daily') }}
+group by account_id
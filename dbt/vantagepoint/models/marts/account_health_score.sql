@@ -4,6 +4,34 @@
     on_schema_change='sync_all_columns'
 ) }}
 
+{% set crm_hash %}
+    hash(a.industry, a.annual_revenue, a.tier, a.is_churned, a.account_owner_id,
+         a.subscription_start_date, a.subscription_end_date)
+{% endset %}
+
+{% if is_incremental() %}
+-- only accounts whose inputs changed since they were last scored are recomputed and merged
+with changed_accounts as (
+    select a.account_id
+    from {{ ref('stg_accounts') }} a
+    left join {{ this }} p on a.account_id = p.account_id
+    left join {{ ref('int_usage_metrics') }} u on a.account_id = u.account_id
+    left join {{ ref('int_transcript_metrics') }} t on a.account_id = t.account_id
+    where p.account_id is null
+       -- safeguard: every account is rescored at least every health_refresh_days, which also
+       -- refreshes the day counts that drift without changing the score
+       or p.computed_at is null
+       or p.computed_at < dateadd('day', -{{ var('health_refresh_days', 7) }}, current_timestamp())
+       -- CRM changes
+       or p.crm_hash is distinct from {{ crm_hash }}
+       -- new usage or transcripts
+       or u.last_loaded_at > p.computed_at
+       or t.last_loaded_at > p.computed_at
+       -- days_since_last_active crossed a recency bucket
+       or {{ recency_points('coalesce(u.days_since_last_active, 999)') }} != {{ recency_points('p.days_since_last_active') }}
+)
+{% endif %}
+
 select
     a.account_id,
     a.industry,
@@ -25,25 +53,28 @@ select
     coalesce(t.negative_interaction_count, 0) as negative_interaction_count,
     coalesce(t.top_complaint_category, 'none') as top_complaint_category,
 
+    -- pipelines/lambda/layer/health_score.py computes the same score for what-if questions, change both together.
+    -- the divisions are in double precision: as NUMBER, 5 / 12.0 rounds to scale 6 and moves .x5 ties
     round(
-        (least(coalesce(u.total_sessions, 0), 100) / 100.0) * 15 +
-        (least(coalesce(u.features_adopted, 0), 12) / 12.0) * 15 +
-        (1 - least(coalesce(u.error_rate, 0), 1)) * 10 +
-        (case
-            when coalesce(u.days_since_last_active, 999) <= 7 then 20
-            when coalesce(u.days_since_last_active, 999) <= 30 then 15
-            when coalesce(u.days_since_last_active, 999) <= 90 then 8
-            else 0
-        end) +
-        ((coalesce(t.avg_sentiment, 0) + 1) / 2.0) * 25 +
+        (least(coalesce(u.total_sessions, 0), 100)::double / 100) * 15 +
+        (least(coalesce(u.features_adopted, 0), 12)::double / 12) * 15 +
+        (1 - least(coalesce(u.error_rate, 0), 1)::double) * 10 +
+        {{ recency_points('coalesce(u.days_since_last_active, 999)') }} +
+        ((coalesce(t.avg_sentiment, 0)::double + 1) / 2) * 25 +
         (case
             when coalesce(t.support_ticket_count, 0) = 0 then 15
             when coalesce(t.support_ticket_count, 0) <= 3 then 10
             when coalesce(t.support_ticket_count, 0) <= 7 then 5
             else 0
         end)
-    , 1) as health_score
+    , 1) as health_score,
+
+    {{ crm_hash }} as crm_hash,
+    current_timestamp() as computed_at
 
 from {{ ref('stg_accounts') }} a
 left join {{ ref('int_usage_metrics') }} u on a.account_id = u.account_id
-left join {{ ref('int_transcript_metrics') }} t on a.account_id = t.account_id
\ No newline at end of file
+left join {{ ref('int_transcript_metrics') }} t on a.account_id = t.account_id
+{% if is_incremental() %}
+where a.account_id in (select account_id from changed_accounts)
+{% endif %}
@@ -1,13 +1,45 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='interaction_id',
+    incremental_strategy='merge'
+) }}
+
+-- incremental runs re-read only the source rows loaded since the last run, by LOADED_AT and not by event time,
+-- because re-ingested months and re-enriched files carry old timestamps. the overlap covers loads still committing
+with source as (
+    select
+        interaction_id,
+        account_id,
+        opportunity_id,
+        timestamp,
+        interaction_type,
+        transcript_body,
+        sentiment_score,
+        complaint_category,
+        loaded_at
+    from {{ source('b2bsaas', 'interaction_transcripts') }}
+    {% if is_incremental() %}
+    where loaded_at >= (select dateadd('hour', -{{ var('staging_lookback_hours', 1) }}, max(loaded_at)) from {{ this }})
+    {% endif %}
+    qualify row_number() over (partition by interaction_id order by timestamp desc) = 1
+)
 
 select
-    interaction_id,
-    account_id,
-    opportunity_id,
-    timestamp,
-    interaction_type,
-    transcript_body,
-    sentiment_score,
-    complaint_category
-from {{ source('b2bsaas', 'interaction_transcripts') }}
-qualify row_number() over (partition by interaction_id order by timestamp desc) = 1
\ No newline at end of file
+    s.*,
+    current_timestamp() as _loaded_at
+from source s
+{% if is_incremental() %}
+-- unchanged rows keep their _loaded_at, so downstream models only see real changes
+where not exists (
+    select 1
+    from {{ this }} t
+    where t.interaction_id = s.interaction_id
+      and equal_null(t.account_id, s.account_id)
+      and equal_null(t.opportunity_id, s.opportunity_id)
+      and equal_null(t.timestamp, s.timestamp)
+      and equal_null(t.interaction_type, s.interaction_type)
+      and equal_null(t.transcript_body, s.transcript_body)
+      and equal_null(t.sentiment_score, s.sentiment_score)
+      and equal_null(t.complaint_category, s.complaint_category)
+)
+{% endif %}
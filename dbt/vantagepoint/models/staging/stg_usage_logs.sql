@@ -1,12 +1,43 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='session_id',
+    incremental_strategy='merge'
+) }}
+
+-- incremental runs re-read only the source rows loaded since the last run, by LOADED_AT and not by event time,
+-- because re-ingested months and re-enriched files carry old timestamps. the overlap covers loads still committing
+with source as (
+    select
+        session_id,
+        account_id,
+        user_id,
+        feature_used,
+        session_duration_seconds,
+        error_codes_encountered,
+        timestamp,
+        loaded_at
+    from {{ source('b2bsaas', 'usage_logs') }}
+    {% if is_incremental() %}
+    where loaded_at >= (select dateadd('hour', -{{ var('staging_lookback_hours', 1) }}, max(loaded_at)) from {{ this }})
+    {% endif %}
+    qualify row_number() over (partition by session_id order by timestamp desc) = 1
+)
 
 select
-    session_id,
-    account_id,
-    user_id,
-    feature_used,
-    session_duration_seconds,
-    error_codes_encountered,
-    timestamp
-from {{ source('b2bsaas', 'usage_logs') }}
-qualify row_number() over (partition by session_id order by timestamp desc) = 1
\ No newline at end of file
+    s.*,
+    current_timestamp() as _loaded_at
+from source s
+{% if is_incremental() %}
+-- unchanged rows keep their _loaded_at, so downstream models only see real changes
+where not exists (
+    select 1
+    from {{ this }} t
+    where t.session_id = s.session_id
+      and equal_null(t.account_id, s.account_id)
+      and equal_null(t.user_id, s.user_id)
+      and equal_null(t.feature_used, s.feature_used)
+      and equal_null(t.session_duration_seconds, s.session_duration_seconds)
+      and equal_null(t.error_codes_encountered, s.error_codes_encountered)
+      and equal_null(t.timestamp, s.timestamp)
+)
+{% endif %}
@@ -2,6 +2,8 @@ import { useState, useEffect } from "react";
 import { CognitoUserPool, CognitoUser, AuthenticationDetails } from "amazon-cognito-identity-js";
 
 const API = "https://6odxcq4waj.execute-api.us-east-1.amazonaws.com/api";
+// function URL of the streaming rag_query; without it recommendations use the buffered POST /api/rag
+const RAG_STREAM_URL = import.meta.env.VITE_RAG_STREAM_URL;
 
 const COGNITO_USER_POOL_ID = "us-east-1_KvDkfPdr3";
 const COGNITO_CLIENT_ID = "6pf0reahbicimes0m8gcb1jjn5";
@@ -22,6 +24,22 @@ function authFetch(url, token, options = {}) {
   });
 }
 
+// POSTs to the streaming endpoint and calls onText with the answer so far as chunks arrive
+async function streamText(url, token, body, onText) {
+  const response = await authFetch(url, token, { method: "POST", body: JSON.stringify(body) });
+  if (!response.ok) throw new Error(`HTTP ${response.status}`);
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let text = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    text += decoder.decode(value, { stream: true });
+    onText(text);
+  }
+  return text;
+}
+
 function LoginScreen({ onLogin }) {
   const [email, setEmail] = useState("");
   const [password, setPassword] = useState("");
@@ -101,51 +119,76 @@ const tierBadge = {
 };
 const tierLabel = { healthy: "Healthy", at_risk: "At Risk", critical: "Critical", churned: "Churned" };
 
+const TRANSCRIPT_PAGE_SIZE = 25;
+
 function ExpandedRow({ account, token }) {
   const [transcripts, setTranscripts] = useState([]);
+  const [txCursor, setTxCursor] = useState(null);
   const [loadingTx, setLoadingTx] = useState(true);
+  const [loadingMoreTx, setLoadingMoreTx] = useState(false);
+  const [openTx, setOpenTx] = useState(null);
+  const [bodies, setBodies] = useState({});
   const [recommendation, setRecommendation] = useState(null);
   const [loadingRec, setLoadingRec] = useState(true);
   const [txSummary, setTxSummary] = useState(null);
   const [loadingTxSum, setLoadingTxSum] = useState(true);
 
+  const transcriptsUrl = `${API}/account/${account.ACCOUNT_ID}/transcripts`;
+
   useEffect(() => {
-    authFetch(`${API}/account/${account.ACCOUNT_ID}/transcripts`, token)
+    // the list leaves bodies out, they are fetched one at a time when a row is opened
+    authFetch(`${transcriptsUrl}?limit=${TRANSCRIPT_PAGE_SIZE}`, token)
       .then((r) => r.json())
       .then((data) => {
-        const list = Array.isArray(data) ? data : data.transcripts || [];
-        setTranscripts(list);
+        setTranscripts(data.transcripts || []);
+        setTxCursor(data.next_cursor);
         setLoadingTx(false);
-
-        const bodies = list.filter((t) => t.TRANSCRIPT_BODY).map((t) => `[${t.INTERACTION_TYPE} | ${t.TIMESTAMP || "unknown date"} | Sentiment: ${t.SENTIMENT_SCORE}]\n${t.TRANSCRIPT_BODY}`);
-        if (bodies.length > 0) {
-          authFetch(`${API}/rag`, token, {
-            method: "POST",
-            body: JSON.stringify({
-              query: `Summarize the following customer interaction transcripts for account ${account.ACCOUNT_ID} (${account.INDUSTRY}, ${account.TIER} tier). Highlight the key themes, recurring issues, tone shifts over time, and overall customer experience trajectory. Keep it to 3-4 sentences. Be specific about what the customer complained about or discussed.\n\nTRANSCRIPTS:\n${bodies.join("\n\n")}`
-            }),
-          })
-            .then((r) => r.json())
-            .then((data) => { setTxSummary(data.answer || "Unable to summarize."); setLoadingTxSum(false); })
-            .catch(() => { setTxSummary("Unable to summarize."); setLoadingTxSum(false); });
-        } else {
-          setTxSummary(null);
-          setLoadingTxSum(false);
-        }
       })
-      .catch(() => { setLoadingTx(false); setLoadingTxSum(false); });
-
-    authFetch(`${API}/rag`, token, {
-      method: "POST",
-      body: JSON.stringify({
-        query: `Give a brief, actionable recommendation for account ${account.ACCOUNT_ID}. This is a ${account.TIER} tier ${account.INDUSTRY} account with a health score of ${account.HEALTH_SCORE}, sentiment of ${account.AVG_SENTIMENT}, ${account.SUPPORT_TICKET_COUNT} support tickets, ${account.DAYS_SINCE_LAST_ACTIVE} days inactive, and top complaint category: ${account.TOP_COMPLAINT_CATEGORY || "none"}. ${account.IS_CHURNED ? "This account has already churned." : ""} What specific steps should the customer success team take? Keep it to 2-3 sentences.`
-      }),
-    })
+      .catch(() => setLoadingTx(false));
+
+    // built and cached server-side, regenerated only when the account has new interactions
+    authFetch(`${API}/account/${account.ACCOUNT_ID}/summary`, token)
       .then((r) => r.json())
-      .then((data) => { setRecommendation(data.answer || "Unable to generate recommendation."); setLoadingRec(false); })
-      .catch(() => { setRecommendation("Unable to generate recommendation."); setLoadingRec(false); });
+      .then((data) => { setTxSummary(data.summary || null); setLoadingTxSum(false); })
+      .catch(() => { setTxSummary("Unable to summarize."); setLoadingTxSum(false); });
+
+    const recQuery = {
+      query: `Give a brief, actionable recommendation for account ${account.ACCOUNT_ID}. This is a ${account.TIER} tier ${account.INDUSTRY} account with a health score of ${account.HEALTH_SCORE}, sentiment of ${account.AVG_SENTIMENT}, ${account.SUPPORT_TICKET_COUNT} support tickets, ${account.DAYS_SINCE_LAST_ACTIVE} days inactive, and top complaint category: ${account.TOP_COMPLAINT_CATEGORY || "none"}. ${account.IS_CHURNED ? "This account has already churned." : ""} What specific steps should the customer success team take? Keep it to 2-3 sentences.`
+    };
+    if (RAG_STREAM_URL) {
+      streamText(RAG_STREAM_URL, token, recQuery, (text) => { setRecommendation(text); setLoadingRec(false); })
+        .then((text) => { if (!text) setRecommendation("Unable to generate recommendation."); setLoadingRec(false); })
+        .catch(() => { setRecommendation("Unable to generate recommendation."); setLoadingRec(false); });
+    } else {
+      authFetch(`${API}/rag`, token, { method: "POST", body: JSON.stringify(recQuery) })
+        .then((r) => r.json())
+        .then((data) => { setRecommendation(data.answer || "Unable to generate recommendation."); setLoadingRec(false); })
+        .catch(() => { setRecommendation("Unable to generate recommendation."); setLoadingRec(false); });
+    }
   }, [account.ACCOUNT_ID]);
 
+  const loadMoreTranscripts = () => {
+    setLoadingMoreTx(true);
+    authFetch(`${transcriptsUrl}?limit=${TRANSCRIPT_PAGE_SIZE}&cursor=${encodeURIComponent(txCursor)}`, token)
+      .then((r) => r.json())
+      .then((data) => {
+        setTranscripts((prev) => [...prev, ...(data.transcripts || [])]);
+        setTxCursor(data.next_cursor);
+        setLoadingMoreTx(false);
+      })
+      .catch(() => setLoadingMoreTx(false));
+  };
+
+  const toggleTranscript = (id) => {
+    setOpenTx(openTx === id ? null : id);
+    if (openTx === id || bodies[id] !== undefined) return;
+    setBodies((prev) => ({ ...prev, [id]: null }));
+    authFetch(`${transcriptsUrl}/${encodeURIComponent(id)}`, token)
+      .then((r) => r.json())
+      .then((data) => setBodies((prev) => ({ ...prev, [id]: data.transcript?.TRANSCRIPT_BODY || "No transcript text." })))
+      .catch(() => setBodies((prev) => ({ ...prev, [id]: "Unable to load transcript." })));
+  };
+
   const risk = getRisk(account);
 
   return (
@@ -233,80 +276,129 @@ function ExpandedRow({ account, token }) {
                 </thead>
                 <tbody className="divide-y divide-gray-700/50">
                   {transcripts.map((t) => (
-                    <tr key={t.INTERACTION_ID} className="hover:bg-gray-800/50">
-                      <td className="px-3 py-2 text-gray-300">{t.INTERACTION_ID}</td>
-                      <td className="px-3 py-2 text-gray-300 capitalize">{t.INTERACTION_TYPE}</td>
-                      <td className="px-3 py-2 text-gray-400">{t.TIMESTAMP || "—"}</td>
-                      <td className={`px-3 py-2 font-medium ${(t.SENTIMENT_SCORE ?? 0) >= 0 ? "text-emerald-400" : "text-red-400"}`}>
-                        {t.SENTIMENT_SCORE != null ? t.SENTIMENT_SCORE.toFixed(2) : "—"}
-                      </td>
-                      <td className="px-3 py-2 text-gray-300">{t.COMPLAINT_CATEGORY || "—"}</td>
-                    </tr>
+                    <>
+                      <tr key={t.INTERACTION_ID} onClick={() => toggleTranscript(t.INTERACTION_ID)}
+                        className={`cursor-pointer ${openTx === t.INTERACTION_ID ? "bg-gray-800/50" : "hover:bg-gray-800/50"}`}>
+                        <td className="px-3 py-2 text-gray-300">{t.INTERACTION_ID}</td>
+                        <td className="px-3 py-2 text-gray-300 capitalize">{t.INTERACTION_TYPE}</td>
+                        <td className="px-3 py-2 text-gray-400">{t.TIMESTAMP || "—"}</td>
+                        <td className={`px-3 py-2 font-medium ${(t.SENTIMENT_SCORE ?? 0) >= 0 ? "text-emerald-400" : "text-red-400"}`}>
+                          {t.SENTIMENT_SCORE != null ? t.SENTIMENT_SCORE.toFixed(2) : "—"}
+                        </td>
+                        <td className="px-3 py-2 text-gray-300">{t.COMPLAINT_CATEGORY || "—"}</td>
+                      </tr>
+                      {openTx === t.INTERACTION_ID && (
+                        <tr key={`${t.INTERACTION_ID}-body`}>
+                          <td colSpan={5} className="px-3 py-3 bg-gray-900/60 text-gray-300 text-sm leading-relaxed whitespace-pre-wrap">
+                            {bodies[t.INTERACTION_ID] ?? <span className="text-gray-500 italic">Loading transcript...</span>}
+                          </td>
+                        </tr>
+                      )}
+                    </>
                   ))}
                 </tbody>
               </table>
             </div>
           )}
+          {txCursor && (
+            <button onClick={loadMoreTranscripts} disabled={loadingMoreTx}
+              className="mt-3 px-3 py-1.5 bg-gray-800 border border-gray-700 rounded-lg text-xs text-gray-300 hover:bg-gray-700 disabled:opacity-50 transition-colors">
+              {loadingMoreTx ? "Loading..." : "Load more transcripts"}
+            </button>
+          )}
         </div>
       </td>
     </tr>
   );
 }
 
+const PAGE_SIZE = 100;
+
+// columnar pages are {columns, rows, data: {COLUMN: [values]}}, the table wants row objects
+function columnarToRows(page) {
+  return Array.from({ length: page.rows }, (_, i) =>
+    Object.fromEntries(page.columns.map((col) => [col, page.data[col][i]])));
+}
+
 function Dashboard({ token }) {
   const [accounts, setAccounts] = useState([]);
+  const [summary, setSummary] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [sortCol, setSortCol] = useState("HEALTH_SCORE");
   const [sortAsc, setSortAsc] = useState(true);
   const [search, setSearch] = useState("");
+  const [debouncedSearch, setDebouncedSearch] = useState("");
   const [filterRisk, setFilterRisk] = useState("all");
   const [filterIndustry, setFilterIndustry] = useState("all");
   const [expanded, setExpanded] = useState(null);
 
   useEffect(() => {
-    authFetch(`${API}/dashboard`, token)
-      .then((r) => r.json())
-      .then((data) => { setAccounts(Array.isArray(data) ? data : data.accounts || []); setLoading(false); })
-      .catch((err) => { setError(err.message); setLoading(false); });
-  }, []);
+    const timer = setTimeout(() => setDebouncedSearch(search.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  // filtering, sorting and paging all happen in Snowflake
+  const fetchPage = (cursor) => {
+    const params = new URLSearchParams({
+      risk: filterRisk,
+      industry: filterIndustry,
+      sort: sortCol,
+      dir: sortAsc ? "asc" : "desc",
+      limit: PAGE_SIZE,
+      format: "columnar",
+    });
+    if (debouncedSearch) params.set("search", debouncedSearch);
+    if (cursor) params.set("cursor", cursor);
+    return authFetch(`${API}/dashboard?${params}`, token).then((r) => {
+      if (!r.ok) throw new Error(`HTTP ${r.status}`);
+      return r.json();
+    });
+  };
+
+  useEffect(() => {
+    let cancelled = false;
+    fetchPage(null)
+      .then((data) => {
+        if (cancelled) return;
+        setAccounts(columnarToRows(data.accounts));
+        setSummary(data.summary);
+        setNextCursor(data.next_cursor);
+        setLoading(false);
+      })
+      .catch((err) => { if (!cancelled) { setError(err.message); setLoading(false); } });
+    return () => { cancelled = true; };
+  }, [sortCol, sortAsc, debouncedSearch, filterRisk, filterIndustry]);
+
+  const loadMore = () => {
+    setLoadingMore(true);
+    fetchPage(nextCursor)
+      .then((data) => {
+        setAccounts((prev) => [...prev, ...columnarToRows(data.accounts)]);
+        setNextCursor(data.next_cursor);
+        setLoadingMore(false);
+      })
+      .catch((err) => { setError(err.message); setLoadingMore(false); });
+  };
 
   if (loading) return <div className="min-h-screen bg-gray-950 flex items-center justify-center"><p className="text-gray-500 text-lg">Loading dashboard...</p></div>;
   if (error) return <div className="min-h-screen bg-gray-950 flex items-center justify-center"><p className="text-red-400 text-lg">Error: {error}</p></div>;
 
-  const industries = [...new Set(accounts.map((a) => a.INDUSTRY))].sort();
-
-  const filtered = accounts.filter((a) => {
-    if (filterRisk !== "all" && getRisk(a) !== filterRisk) return false;
-    if (filterIndustry !== "all" && a.INDUSTRY !== filterIndustry) return false;
-    if (search && !a.ACCOUNT_ID.toLowerCase().includes(search.toLowerCase())) return false;
-    return true;
-  });
+  const industries = summary.industries;
 
   const handleSort = (col) => {
     if (sortCol === col) setSortAsc(!sortAsc);
     else { setSortCol(col); setSortAsc(true); }
   };
 
-  const sorted = [...filtered].sort((a, b) => {
-    let valA = a[sortCol], valB = b[sortCol];
-    if (valA == null) return 1;
-    if (valB == null) return -1;
-    if (typeof valA === "string") return sortAsc ? valA.localeCompare(valB) : valB.localeCompare(valA);
-    return sortAsc ? valA - valB : valB - valA;
-  });
-
-  const healthy = accounts.filter((a) => getRisk(a) === "healthy").length;
-  const atRisk = accounts.filter((a) => getRisk(a) === "at_risk").length;
-  const critical = accounts.filter((a) => getRisk(a) === "critical").length;
-  const churned = accounts.filter((a) => getRisk(a) === "churned").length;
-
   const cards = [
-    { label: "Total Accounts", value: accounts.length, style: "from-blue-600/20 to-blue-900/20 border-blue-700/40 text-blue-400" },
-    { label: "Healthy", value: healthy, style: "from-emerald-600/20 to-emerald-900/20 border-emerald-700/40 text-emerald-400" },
-    { label: "At Risk", value: atRisk, style: "from-yellow-600/20 to-yellow-900/20 border-yellow-700/40 text-yellow-400" },
-    { label: "Critical", value: critical, style: "from-red-600/20 to-red-900/20 border-red-700/40 text-red-400" },
-    { label: "Churned", value: churned, style: "from-gray-600/20 to-gray-800/20 border-gray-700/40 text-gray-500" },
+    { label: "Total Accounts", value: summary.total, style: "from-blue-600/20 to-blue-900/20 border-blue-700/40 text-blue-400" },
+    { label: "Healthy", value: summary.tiers.healthy, style: "from-emerald-600/20 to-emerald-900/20 border-emerald-700/40 text-emerald-400" },
+    { label: "At Risk", value: summary.tiers.at_risk, style: "from-yellow-600/20 to-yellow-900/20 border-yellow-700/40 text-yellow-400" },
+    { label: "Critical", value: summary.tiers.critical, style: "from-red-600/20 to-red-900/20 border-red-700/40 text-red-400" },
+    { label: "Churned", value: summary.tiers.churned, style: "from-gray-600/20 to-gray-800/20 border-gray-700/40 text-gray-500" },
   ];
 
   return (
@@ -345,7 +437,7 @@ function Dashboard({ token }) {
             <option value="all">All Industries</option>
             {industries.map((ind) => <option key={ind} value={ind}>{ind}</option>)}
           </select>
-          <span className="text-sm text-gray-500 ml-auto">{sorted.length} accounts</span>
+          <span className="text-sm text-gray-500 ml-auto">{summary.matched} accounts</span>
         </div>
 
         <div className="mt-4 overflow-x-auto rounded-xl border border-gray-800">
@@ -363,7 +455,7 @@ function Dashboard({ token }) {
               </tr>
             </thead>
             <tbody className="divide-y divide-gray-800/50">
-              {sorted.map((a) => {
+              {accounts.map((a) => {
                 const risk = getRisk(a);
                 const isOpen = expanded === a.ACCOUNT_ID;
                 return (
@@ -400,6 +492,15 @@ function Dashboard({ token }) {
             </tbody>
           </table>
         </div>
+
+        {nextCursor && (
+          <div className="mt-4 flex justify-center">
+            <button onClick={loadMore} disabled={loadingMore}
+              className="px-4 py-2 bg-gray-900 border border-gray-700 rounded-lg text-sm text-gray-300 hover:bg-gray-800 disabled:opacity-50 transition-colors">
+              {loadingMore ? "Loading..." : `Load more (${accounts.length} of ${summary.matched})`}
+            </button>
+          </div>
+        )}
       </main>
     </div>
   );
@@ -0,0 +1,297 @@
+"""Compact the raw JSON-lines lake into typed, compressed Parquet under curated/.
+
+For each dataset, every year=/month= partition under raw/<dataset>/ is parsed
+against a fixed schema, sorted, and written as zstd Parquet files of roughly
+TARGET_FILE_MB to curated/<dataset>/year=/month=/. Lines that don't fit the
+schema (bad JSON, missing required fields, wrong types) are written to
+curated/_rejected/ instead of failing the run.
+
+curated/<dataset>/_manifest.json lists the current files of every partition with
+row counts and the source files (ETag, size) they were built from. Only
+partitions whose sources changed are rewritten. A partition is replaced by
+writing new files, then the manifest, then deleting the old files, so readers
+that take file lists from the manifest never see a half-written partition.
+
+Runs as a Glue Python shell job against S3 (--DATA_LAKE_BUCKET), or locally
+between two directories:
+
+    python pipelines/glue/compact_to_parquet.py --source-dir data-generation --dest-dir /tmp/curated
+"""
+import argparse
+import io
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+import boto3
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SCHEMAS = {
+    "usage_logs": pa.schema([
+        pa.field("session_id", pa.string(), nullable=False),
+        pa.field("account_id", pa.string(), nullable=False),
+        pa.field("user_id", pa.string()),
+        pa.field("feature_used", pa.string()),
+        pa.field("session_duration_seconds", pa.int32()),
+        pa.field("error_codes_encountered", pa.string()),
+        pa.field("timestamp", pa.timestamp("us", tz="UTC"), nullable=False)
+    ]),
+    "transcripts": pa.schema([
+        pa.field("interaction_id", pa.string(), nullable=False),
+        pa.field("account_id", pa.string()),
+        pa.field("opportunity_id", pa.string()),
+        pa.field("timestamp", pa.timestamp("us", tz="UTC")),
+        pa.field("interaction_type", pa.string()),
+        pa.field("transcript_body", pa.string())
+    ])
+}
+
+# sort order inside a partition, so row-group min/max stats prune on the common filters
+SORT_KEYS = {
+    "usage_logs": [("account_id", "ascending"), ("timestamp", "ascending")],
+    "transcripts": [("timestamp", "ascending"), ("interaction_id", "ascending")]
+}
+
+ROW_GROUP_ROWS = 100000
+COMPRESSION = "zstd"
+PARTITION_PATTERN = re.compile(r"^(year=\d{4}/month=\d{2})/[^/]+\.json$")
+
+
+class LocalStore:
+    def __init__(self, root):
+        self.root = root
+
+    def list(self, prefix):
+        # (key, version, size), the version plays the role of the S3 ETag
+        objects = []
+        for directory, _, files in os.walk(os.path.join(self.root, prefix)):
+            for name in files:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                objects.append((key, f"{stat.st_mtime_ns}-{stat.st_size}", stat.st_size))
+        return sorted(objects)
+
+    def read(self, key):
+        with open(os.path.join(self.root, key), "rb") as f:
+            return f.read()
+
+    def write(self, key, data):
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def delete(self, key):
+        path = os.path.join(self.root, key)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class S3Store:
+    def __init__(self, bucket, root):
+        self.s3 = boto3.client("s3")
+        self.bucket = bucket
+        self.root = root
+
+    def list(self, prefix):
+        objects = []
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.root + prefix):
+            for obj in page.get("Contents", []):
+                objects.append((obj["Key"][len(self.root):], obj["ETag"].strip('"'), obj["Size"]))
+        return objects
+
+    def read(self, key):
+        try:
+            return self.s3.get_object(Bucket=self.bucket, Key=self.root + key)["Body"].read()
+        except self.s3.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def write(self, key, data):
+        self.s3.put_object(Bucket=self.bucket, Key=self.root + key, Body=data)
+
+    def delete(self, key):
+        self.s3.delete_object(Bucket=self.bucket, Key=self.root + key)
+
+
+def coerce(value, field):
+    if value is None:
+        if not field.nullable:
+            raise ValueError(f"{field.name} is required")
+        return None
+    if pa.types.is_string(field.type):
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"{field.name} must be a string")
+        return str(value)
+    if pa.types.is_integer(field.type):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)) or int(float(value)) != float(value):
+            raise ValueError(f"{field.name} must be an integer")
+        return int(float(value))
+    if pa.types.is_timestamp(field.type):
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    raise TypeError(f"unsupported type {field.type}")
+
+
+def parse_partition(data, schema):
+    # schema enforcement: every line becomes a typed row or a rejected line with the reason
+    columns = {field.name: [] for field in schema}
+    rejected = []
+    unexpected = set()
+    for line in data.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("not a JSON object")
+            row = {field.name: coerce(record.get(field.name), field) for field in schema}
+        except (ValueError, TypeError, OverflowError) as e:
+            rejected.append({"line": line, "error": str(e)})
+            continue
+        unexpected.update(set(record) - set(schema.names))
+        for name, value in row.items():
+            columns[name].append(value)
+    table = pa.table({field.name: pa.array(columns[field.name], type=field.type) for field in schema}, schema=schema)
+    return table, rejected, sorted(unexpected)
+
+
+def write_files(table, target_bytes):
+    # yields Parquet file bodies of about target_bytes, closing a file after the row group that crosses it
+    sink, writer = None, None
+    for start in range(0, max(table.num_rows, 1), ROW_GROUP_ROWS):
+        if writer is None:
+            sink = pa.BufferOutputStream()
+            writer = pq.ParquetWriter(sink, table.schema, compression=COMPRESSION)
+        writer.write_table(table.slice(start, ROW_GROUP_ROWS), row_group_size=ROW_GROUP_ROWS)
+        if sink.tell() >= target_bytes:
+            writer.close()
+            yield sink.getvalue().to_pybytes()
+            sink, writer = None, None
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue().to_pybytes()
+
+
+def schema_description(schema):
+    return [{"name": f.name, "type": str(f.type), "nullable": f.nullable} for f in schema]
+
+
+def load_manifest(dest, dataset):
+    try:
+        return json.loads(dest.read(f"{dataset}/_manifest.json"))
+    except FileNotFoundError:
+        return None
+
+
+def compact_dataset(source, dest, dataset, target_bytes, full_refresh=False):
+    schema = SCHEMAS[dataset]
+    manifest = load_manifest(dest, dataset)
+    if manifest and manifest.get("schema") != schema_description(schema):
+        print(f"{dataset}: schema changed, rewriting every partition")
+        full_refresh = True
+    previous = (manifest or {}).get("partitions", {})
+
+    sources = {}
+    for key, version, size in source.list(f"{dataset}/"):
+        match = PARTITION_PATTERN.match(key[len(dataset) + 1:])
+        if match:
+            sources.setdefault(match.group(1), []).append({"key": key, "etag": version, "size": size})
+
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    partitions = {}
+    stale_keys = []
+    rewritten = 0
+    for partition, files in sorted(sources.items()):
+        if not full_refresh and partition in previous and previous[partition]["source"] == files:
+            partitions[partition] = previous[partition]
+            continue
+
+        tables, rejected, unexpected = [], [], set()
+        for f in files:
+            table, bad, extra = parse_partition(source.read(f["key"]), schema)
+            tables.append(table)
+            rejected.extend(bad)
+            unexpected.update(extra)
+        table = pa.concat_tables(tables).sort_by(SORT_KEYS[dataset])
+
+        outputs = []
+        for i, body in enumerate(write_files(table, target_bytes)):
+            key = f"{dataset}/{partition}/part-{run_id}-{i:04d}.parquet"
+            dest.write(key, body)
+            outputs.append({"key": key, "bytes": len(body), "rows": pq.ParquetFile(io.BytesIO(body)).metadata.num_rows})
+
+        rejected_key = None
+        if rejected:
+            rejected_key = f"_rejected/{dataset}/{partition}/rejected-{run_id}.jsonl"
+            dest.write(rejected_key, "\n".join(json.dumps(r) for r in rejected).encode("utf-8"))
+            print(f"{dataset}/{partition}: rejected {len(rejected)} lines, e.g. {rejected[0]['error']}")
+
+        partitions[partition] = {
+            "files": outputs,
+            "rows": table.num_rows,
+            "rejected": len(rejected),
+            "rejected_key": rejected_key,
+            "unexpected_fields": sorted(unexpected),
+            "source": files,
+            "compacted_at": run_id
+        }
+        old = previous.get(partition)
+        if old:
+            stale_keys.extend(f["key"] for f in old["files"])
+            if old.get("rejected_key"):
+                stale_keys.append(old["rejected_key"])
+        rewritten += 1
+
+    # partitions whose raw files are gone are dropped too
+    for partition in set(previous) - set(sources):
+        stale_keys.extend(f["key"] for f in previous[partition]["files"])
+
+    manifest = {
+        "dataset": dataset,
+        "format": "parquet",
+        "compression": COMPRESSION,
+        "schema": schema_description(schema),
+        "sort_keys": [name for name, _ in SORT_KEYS[dataset]],
+        "updated_at": run_id,
+        "partitions": partitions
+    }
+    dest.write(f"{dataset}/_manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+    for key in stale_keys:
+        dest.delete(key)
+
+    rows = sum(p["rows"] for p in partitions.values())
+    print(f"{dataset}: {len(partitions)} partitions, {rewritten} rewritten, {rows} rows")
+    return manifest
+
+
+def main():
+    # parse_known_args: Glue passes its own --JOB_NAME, --TempDir, ... arguments as well
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--DATA_LAKE_BUCKET", help="compact s3://bucket/raw/ into s3://bucket/curated/")
+    parser.add_argument("--source-dir", help="local directory holding <dataset>/year=/month=/*.json")
+    parser.add_argument("--dest-dir", help="local output directory")
+    # transcripts can be compacted too, but the transcript pipeline reads raw/ JSON lines (byte-range shards,
+    # .json notifications), so nothing reads curated/transcripts/ yet
+    parser.add_argument("--DATASETS", default="usage_logs")
+    parser.add_argument("--TARGET_FILE_MB", type=float, default=128)
+    parser.add_argument("--FULL_REFRESH", default="false")
+    args, _ = parser.parse_known_args()
+
+    if args.DATA_LAKE_BUCKET:
+        source, dest = S3Store(args.DATA_LAKE_BUCKET, "raw/"), S3Store(args.DATA_LAKE_BUCKET, "curated/")
+    elif args.source_dir and args.dest_dir:
+        source, dest = LocalStore(args.source_dir), LocalStore(args.dest_dir)
+    else:
+        parser.error("either --DATA_LAKE_BUCKET or --source-dir and --dest-dir are required")
+
+    for dataset in args.DATASETS.split(","):
+        compact_dataset(source, dest, dataset.strip(), int(args.TARGET_FILE_MB * 1024 * 1024),
+                        args.FULL_REFRESH.lower() == "true")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import sys
 import json
+from datetime import datetime
 import boto3
 from awsglue.transforms import *
 from awsglue.utils import getResolvedOptions
@@ -9,7 +10,9 @@ from awsglue.dynamicframe import DynamicFrame
 from pyspark.context import SparkContext
 from pyspark.sql.functions import col, to_timestamp
 
-args = getResolvedOptions(sys.argv, ["JOB_NAME", "SECRET_NAME", "DATA_LAKE_BUCKET"])
+args = getResolvedOptions(sys.argv, [
+    "JOB_NAME", "SECRET_NAME", "DATA_LAKE_BUCKET", "LOOKBACK_MONTHS", "FULL_REFRESH", "SOURCE_FORMAT"
+])
 
 sc = SparkContext()
 glueContext = GlueContext(sc)
@@ -17,8 +20,20 @@ spark = glueContext.spark_session
 job = Job(glueContext)
 job.init(args["JOB_NAME"], args)
 
+# json reads raw/, parquet reads the typed files compact_to_parquet.py writes to curated/ (same year=/month= layout)
+SOURCE_FORMAT = args["SOURCE_FORMAT"].lower()
+SOURCE_PREFIX = "raw/usage_logs/"
+# parquet files are taken from the compaction manifest, never from a listing of curated/
+CURATED_MANIFEST_KEY = "curated/usage_logs/_manifest.json"
+# last year=/month= partition loaded into USAGE_LOGS
+WATERMARK_KEY = "checkpoints/glue/usage_logs_watermark.json"
+# months before the watermark that are re-listed for late files, bookmarks skip what was already read
+LOOKBACK_MONTHS = int(args["LOOKBACK_MONTHS"])
+FULL_REFRESH = args["FULL_REFRESH"].lower() == "true"
+
 # fetch snowflake creds from secrets manager
 sm = boto3.client("secretsmanager", region_name="us-east-1")
+s3 = boto3.client("s3")
 secret = json.loads(sm.get_secret_value(SecretId=args["SECRET_NAME"])["SecretString"])
 
 sf_options = {
@@ -30,42 +45,164 @@ sf_options = {
     "sfWarehouse": "VANTAGEPOINT_WH"
 }
 
-# read usage logs from S3 as DynamicFrame
+# upsert the staged batch, keeping one row per session so reruns and late duplicates don't double count.
+# LOADED_AT is when the row was last written, dbt's incremental staging filters on it since re-ingested months
+# carry old timestamps
+MERGE_SQL = """
+MERGE INTO USAGE_LOGS t
+USING (
+    SELECT * FROM USAGE_LOGS_STAGE
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY SESSION_ID ORDER BY TIMESTAMP DESC) = 1
+) s
+ON t.SESSION_ID = s.SESSION_ID
+WHEN MATCHED THEN UPDATE SET
+    ACCOUNT_ID = s.ACCOUNT_ID,
+    USER_ID = s.USER_ID,
+    FEATURE_USED = s.FEATURE_USED,
+    SESSION_DURATION_SECONDS = s.SESSION_DURATION_SECONDS,
+    ERROR_CODES_ENCOUNTERED = s.ERROR_CODES_ENCOUNTERED,
+    TIMESTAMP = s.TIMESTAMP,
+    LOADED_AT = CURRENT_TIMESTAMP
+WHEN NOT MATCHED THEN INSERT
+    (SESSION_ID, ACCOUNT_ID, USER_ID, FEATURE_USED, SESSION_DURATION_SECONDS, ERROR_CODES_ENCOUNTERED, TIMESTAMP, LOADED_AT)
+VALUES
+    (s.SESSION_ID, s.ACCOUNT_ID, s.USER_ID, s.FEATURE_USED, s.SESSION_DURATION_SECONDS, s.ERROR_CODES_ENCOUNTERED, s.TIMESTAMP,
+     CURRENT_TIMESTAMP)
+"""
+
+
+def list_prefixes(bucket, prefix):
+    prefixes = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        prefixes.extend(p["Prefix"] for p in page.get("CommonPrefixes", []))
+    return prefixes
+
+
+def list_partitions(bucket):
+    # (year, month) -> [s3 path] for every year=/month= folder under raw/usage_logs/
+    partitions = {}
+    for year_prefix in list_prefixes(bucket, SOURCE_PREFIX):
+        year = year_prefix.rstrip("/").split("year=")[-1]
+        for month_prefix in list_prefixes(bucket, year_prefix):
+            month = month_prefix.rstrip("/").split("month=")[-1]
+            partitions[(int(year), int(month))] = [f"s3://{bucket}/{month_prefix}"]
+    return partitions
+
+
+def manifest_partitions(bucket):
+    # (year, month) -> [s3 path] of the files in the current manifest. Compaction writes new files before
+    # the manifest and deletes the old ones after it, so a listing could mix generations.
+    try:
+        body = s3.get_object(Bucket=bucket, Key=CURATED_MANIFEST_KEY)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        print(f"No {CURATED_MANIFEST_KEY} yet, nothing has been compacted")
+        return {}
+    partitions = {}
+    for partition, entry in json.loads(body)["partitions"].items():
+        year, month = (int(part.split("=")[1]) for part in partition.split("/"))
+        partitions[(year, month)] = [f"s3://{bucket}/curated/{f['key']}" for f in entry["files"]]
+    return partitions
+
+
+def read_watermark(bucket):
+    try:
+        body = s3.get_object(Bucket=bucket, Key=WATERMARK_KEY)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+    year, month = json.loads(body)["last_partition"].split("/")
+    return int(year), int(month)
+
+
+def write_watermark(bucket, partition, rows):
+    s3.put_object(
+        Bucket=bucket,
+        Key=WATERMARK_KEY,
+        Body=json.dumps({
+            "last_partition": f"{partition[0]}/{partition[1]:02d}",
+            "rows_staged": rows,
+            "updated_at": datetime.utcnow().isoformat() + "Z"
+        }).encode("utf-8"),
+        ContentType="application/json"
+    )
+
+
+def months_before(partition, months):
+    index = partition[0] * 12 + partition[1] - 1 - months
+    return index // 12, index % 12 + 1
+
+
 bucket = args["DATA_LAKE_BUCKET"]
-source_path = f"s3://{bucket}/raw/usage_logs/"
-
-dynamic_frame = glueContext.create_dynamic_frame.from_options(
-    connection_type="s3",
-    connection_options={"paths": [source_path], "recurse": True},
-    format="json"
-)
-
-# convert to pyspark dataframe for transformations
-df = dynamic_frame.toDF()
-
-# transform and rename columns to match Snowflake table
-df = df.select(
-    col("session_id").alias("SESSION_ID"),
-    col("account_id").alias("ACCOUNT_ID"),
-    col("user_id").alias("USER_ID"),
-    col("feature_used").alias("FEATURE_USED"),
-    col("session_duration_seconds").cast("int").alias("SESSION_DURATION_SECONDS"),
-    col("error_codes_encountered").alias("ERROR_CODES_ENCOUNTERED"),
-    to_timestamp(col("timestamp")).alias("TIMESTAMP")
-)
-
-# deduplicate on session_id
-df = df.dropDuplicates(["SESSION_ID"])
-
-# drop rows missing required fields
-df = df.filter(col("SESSION_ID").isNotNull() & col("ACCOUNT_ID").isNotNull())
-
-# write to snowflake
-df.write \
-    .format("net.snowflake.spark.snowflake") \
-    .options(**sf_options) \
-    .option("dbtable", "USAGE_LOGS") \
-    .mode("append") \
-    .save()
-
-job.commit()
\ No newline at end of file
+partitions = manifest_partitions(bucket) if SOURCE_FORMAT == "parquet" else list_partitions(bucket)
+watermark = None if FULL_REFRESH else read_watermark(bucket)
+
+# partition pruning: only the folders at or after the lookback point are read
+if watermark:
+    start = months_before(watermark, LOOKBACK_MONTHS)
+    selected = sorted(p for p in partitions if p >= start)
+else:
+    selected = sorted(partitions)
+print(f"Watermark {watermark}, reading {len(selected)} of {len(partitions)} partitions")
+
+paths = [path for p in selected for path in partitions[p]]
+if paths:
+    read_options = {
+        "connection_type": "s3",
+        "connection_options": {"paths": paths, "recurse": True},
+        "format": SOURCE_FORMAT
+    }
+    # bookmarks skip files already read in the re-listed partitions; a full refresh reads everything again
+    if not FULL_REFRESH:
+        read_options["transformation_ctx"] = "usage_logs_source"
+    dynamic_frame = glueContext.create_dynamic_frame.from_options(**read_options)
+
+    # convert to pyspark dataframe for transformations
+    df = dynamic_frame.toDF()
+else:
+    df = None
+
+rows = 0
+# a read that found no new files has no columns
+if df is not None and df.columns:
+    # transform and rename columns to match Snowflake table
+    df = df.select(
+        col("session_id").alias("SESSION_ID"),
+        col("account_id").alias("ACCOUNT_ID"),
+        col("user_id").alias("USER_ID"),
+        col("feature_used").alias("FEATURE_USED"),
+        col("session_duration_seconds").cast("int").alias("SESSION_DURATION_SECONDS"),
+        col("error_codes_encountered").alias("ERROR_CODES_ENCOUNTERED"),
+        to_timestamp(col("timestamp")).alias("TIMESTAMP")
+    )
+
+    # drop rows missing required fields, dedupe within the batch
+    df = df.filter(col("SESSION_ID").isNotNull() & col("ACCOUNT_ID").isNotNull())
+    df = df.dropDuplicates(["SESSION_ID"])
+
+    # cached so the count and the Snowflake write share one read of S3 and one dedupe
+    df.cache()
+    rows = df.count()
+
+if rows:
+    # stage the batch, then MERGE into USAGE_LOGS in the same session
+    df.write \
+        .format("net.snowflake.spark.snowflake") \
+        .options(**sf_options) \
+        .option("dbtable", "USAGE_LOGS_STAGE") \
+        .option("truncate_table", "on") \
+        .option("usestagingtable", "off") \
+        .option("postactions", MERGE_SQL) \
+        .mode("overwrite") \
+        .save()
+    print(f"Merged {rows} sessions into USAGE_LOGS")
+else:
+    print("No new usage log files")
+
+if df is not None and df.columns:
+    df.unpersist()
+
+# advance only after the MERGE succeeded, a failed run re-reads the same partitions
+if selected:
+    write_watermark(bucket, max(selected + ([watermark] if watermark else [])), rows)
+
+job.commit()
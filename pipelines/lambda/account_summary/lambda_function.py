@@ -0,0 +1,247 @@
+import json
+import os
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from snowflake_session import execute, get_connection
+
+SUMMARY_MAX_TRANSCRIPTS = int(os.environ.get("SUMMARY_MAX_TRANSCRIPTS", "20"))
+SUMMARY_MAX_BODY_CHARS = int(os.environ.get("SUMMARY_MAX_BODY_CHARS", "1500"))
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "4"))
+# upper bound per precompute run so one invocation fits in the Lambda timeout
+PRECOMPUTE_MAX_ACCOUNTS = int(os.environ.get("PRECOMPUTE_MAX_ACCOUNTS", "200"))
+BEDROCK_MAX_RETRIES = int(os.environ.get("BEDROCK_MAX_RETRIES", "5"))
+
+bedrock = boto3.client(
+    "bedrock-runtime",
+    region_name="us-east-1",
+    config=Config(max_pool_connections=max(10, SUMMARY_CONCURRENCY))
+)
+
+MODEL_ID = "amazon.nova-micro-v1:0"
+# bump when the prompt changes so every cached summary is regenerated
+PROMPT_VERSION = "v1"
+
+THROTTLE_ERRORS = ("ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException")
+
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+
+PROMPT_TEMPLATE = """Summarize the following customer interaction transcripts for account {account_id} ({industry}, {tier} tier).
+Highlight the key themes, recurring issues, tone shifts over time, and overall customer experience trajectory.
+Keep it to 3-4 sentences. Be specific about what the customer complained about or discussed.
+
+TRANSCRIPTS (most recent {count} of {total}, newest first):
+{transcripts}"""
+
+# the newest interaction and the cached row for it, in one round trip
+LOOKUP_SQL = """
+    SELECT t.latest_interaction_at, t.transcript_count, s.summary, s.generated_at
+    FROM (
+        SELECT MAX(timestamp) AS latest_interaction_at, COUNT(*) AS transcript_count
+        FROM INTERACTION_TRANSCRIPTS
+        WHERE account_id = %s
+    ) t
+    LEFT JOIN ACCOUNT_TRANSCRIPT_SUMMARIES s
+      ON s.account_id = %s
+     AND EQUAL_NULL(s.latest_interaction_at, t.latest_interaction_at)
+     AND s.prompt_version = %s
+"""
+
+STALE_ACCOUNTS_SQL = """
+    SELECT t.account_id, t.latest_interaction_at, t.transcript_count
+    FROM (
+        SELECT account_id, MAX(timestamp) AS latest_interaction_at, COUNT(*) AS transcript_count
+        FROM INTERACTION_TRANSCRIPTS
+        -- sales calls and many emails load without an account, they never get a summary
+        WHERE account_id IS NOT NULL
+        GROUP BY account_id
+    ) t
+    LEFT JOIN ACCOUNT_TRANSCRIPT_SUMMARIES s
+      ON s.account_id = t.account_id
+     AND EQUAL_NULL(s.latest_interaction_at, t.latest_interaction_at)
+     AND s.prompt_version = %s
+    WHERE s.account_id IS NULL
+    ORDER BY t.latest_interaction_at DESC NULLS LAST
+    LIMIT {limit}
+"""
+
+# newest transcripts of each requested account, used to build the prompts
+CONTEXT_SQL = """
+    SELECT t.account_id, a.industry, a.tier, t.interaction_type, t.timestamp, t.sentiment_score, t.transcript_body
+    FROM INTERACTION_TRANSCRIPTS t
+    LEFT JOIN ACCOUNTS a ON a.account_id = t.account_id
+    WHERE t.account_id IN ({placeholders})
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY t.account_id ORDER BY t.timestamp DESC NULLS LAST, t.interaction_id DESC
+    ) <= {limit}
+    ORDER BY t.account_id, t.timestamp DESC NULLS LAST, t.interaction_id DESC
+"""
+
+MERGE_SQL = """
+    MERGE INTO ACCOUNT_TRANSCRIPT_SUMMARIES t
+    USING (
+        SELECT %s AS account_id, %s::TIMESTAMP_NTZ AS latest_interaction_at, %s AS transcript_count,
+               %s AS summary, %s AS model_id, %s AS prompt_version
+    ) s
+    ON t.account_id = s.account_id
+    WHEN MATCHED THEN UPDATE SET
+        latest_interaction_at = s.latest_interaction_at,
+        transcript_count = s.transcript_count,
+        summary = s.summary,
+        model_id = s.model_id,
+        prompt_version = s.prompt_version,
+        generated_at = CURRENT_TIMESTAMP()::TIMESTAMP_NTZ
+    WHEN NOT MATCHED THEN INSERT
+        (account_id, latest_interaction_at, transcript_count, summary, model_id, prompt_version, generated_at)
+    VALUES
+        (s.account_id, s.latest_interaction_at, s.transcript_count, s.summary, s.model_id, s.prompt_version,
+         CURRENT_TIMESTAMP()::TIMESTAMP_NTZ)
+"""
+
+
+def respond(status, payload):
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": "application/json", **CORS_HEADERS},
+        "body": json.dumps(payload, default=str)
+    }
+
+
+def invoke_bedrock(prompt):
+    body = json.dumps({
+        "messages": [{"role": "user", "content": [{"text": prompt}]}],
+        "inferenceConfig": {"maxTokens": 400, "temperature": 0.3}
+    })
+    for attempt in range(BEDROCK_MAX_RETRIES + 1):
+        try:
+            response = bedrock.invoke_model(
+                modelId=MODEL_ID,
+                contentType="application/json",
+                accept="application/json",
+                body=body
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in THROTTLE_ERRORS or attempt == BEDROCK_MAX_RETRIES:
+                raise
+            time.sleep(min(20, 0.5 * 2 ** attempt))
+            continue
+        result = json.loads(response["body"].read())
+        return result["output"]["message"]["content"][0]["text"].strip()
+
+
+def build_prompt(account_id, rows, total):
+    # rows are the newest transcripts only and each body is truncated, so the prompt is bounded
+    industry, tier = rows[0][1], rows[0][2]
+    transcripts = []
+    for _, _, _, interaction_type, timestamp, sentiment, body in rows:
+        body = (body or "")[:SUMMARY_MAX_BODY_CHARS]
+        transcripts.append(f"[{interaction_type} | {timestamp or 'unknown date'} | Sentiment: {sentiment}]\n{body}")
+    return PROMPT_TEMPLATE.format(
+        account_id=account_id,
+        industry=industry or "unknown industry",
+        tier=tier or "unknown",
+        count=len(rows),
+        total=total,
+        transcripts="\n\n".join(transcripts)
+    )
+
+
+def lookup(account_id):
+    cursor = execute(LOOKUP_SQL, (account_id, account_id, PROMPT_VERSION))
+    row = cursor.fetchone()
+    cursor.close()
+    return row
+
+
+def summary_prompts(totals):
+    # totals: account_id -> transcript count; one query for all accounts
+    account_ids = list(totals)
+    cursor = execute(
+        CONTEXT_SQL.format(placeholders=", ".join(["%s"] * len(account_ids)), limit=SUMMARY_MAX_TRANSCRIPTS),
+        account_ids
+    )
+    rows = {}
+    for row in cursor.fetchall():
+        rows.setdefault(row[0], []).append(row)
+    cursor.close()
+    return {account_id: build_prompt(account_id, rows[account_id], totals[account_id]) for account_id in rows}
+
+
+def save_summary(account_id, latest_interaction_at, total, summary):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(MERGE_SQL, (account_id, latest_interaction_at, total, summary, MODEL_ID, PROMPT_VERSION))
+    conn.commit()
+    cursor.close()
+
+
+def account_summary(account_id):
+    latest_interaction_at, total, summary, generated_at = lookup(account_id)
+    if not total:
+        return {"account_id": account_id, "summary": None, "transcript_count": 0, "cached": False}
+
+    cached = summary is not None
+    if not cached:
+        print(f"Summarizing {account_id}: no summary for interactions through {latest_interaction_at}")
+        summary = invoke_bedrock(summary_prompts({account_id: total})[account_id])
+        save_summary(account_id, latest_interaction_at, total, summary)
+        generated_at = datetime.utcnow()
+
+    return {
+        "account_id": account_id,
+        "summary": summary,
+        "transcript_count": total,
+        "latest_interaction_at": latest_interaction_at,
+        "generated_at": generated_at,
+        "cached": cached
+    }
+
+
+def precompute():
+    # batch mode after the transcript pipeline: refresh every account that has new interactions
+    cursor = execute(STALE_ACCOUNTS_SQL.format(limit=PRECOMPUTE_MAX_ACCOUNTS), (PROMPT_VERSION,))
+    accounts = cursor.fetchall()
+    cursor.close()
+    print(f"Precomputing summaries for {len(accounts)} accounts")
+    if not accounts:
+        return {"accounts_summarized": 0, "failed": [], "limit_reached": False}
+
+    # Snowflake reads and writes stay on this thread, only the Bedrock calls run in parallel
+    prompts = summary_prompts({account_id: total for account_id, _, total in accounts})
+
+    summarized = 0
+    # an account whose transcripts are gone by the time the context is read has no prompt
+    failed = [account_id for account_id, _, _ in accounts if account_id not in prompts]
+    for account_id in failed:
+        print(f"Failed to summarize {account_id}: no transcripts to build a prompt from")
+    with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(invoke_bedrock, prompts[account_id]): (account_id, latest_interaction_at, total)
+            for account_id, latest_interaction_at, total in accounts
+            if account_id in prompts
+        }
+        for future in as_completed(futures):
+            account_id, latest_interaction_at, total = futures[future]
+            try:
+                save_summary(account_id, latest_interaction_at, total, future.result())
+                summarized += 1
+            except Exception as e:
+                print(f"Failed to summarize {account_id}: {e}")
+                failed.append(account_id)
+
+    return {"accounts_summarized": summarized, "failed": failed, "limit_reached": len(accounts) == PRECOMPUTE_MAX_ACCOUNTS}
+
+
+def lambda_handler(event, context):
+    # GET /api/account/{account_id}/summary from API Gateway, anything else is the Step Functions batch
+    if "pathParameters" not in event and "requestContext" not in event:
+        return precompute()
+
+    account_id = (event.get("pathParameters") or {}).get("account_id")
+    if not account_id:
+        return respond(400, {"error": "Missing account_id"})
+
+    return respond(200, account_summary(account_id))
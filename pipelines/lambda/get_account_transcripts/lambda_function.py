@@ -1,60 +1,127 @@
+import base64
 import json
 import os
-import boto3
-import snowflake.connector
+from snowflake_session import execute
 
-sm = boto3.client("secretsmanager", region_name="us-east-1")
+DEFAULT_PAGE_SIZE = int(os.environ.get("TRANSCRIPTS_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = 200
 
+LIST_COLUMNS = ["interaction_id", "account_id", "opportunity_id", "timestamp",
+                "interaction_type", "sentiment_score", "complaint_category"]
+# opt-in projections, ?fields=body adds the transcript text
+OPTIONAL_FIELDS = {"body": "transcript_body"}
 
-def get_snowflake_conn():
-    secret = json.loads(
-        sm.get_secret_value(SecretId=os.environ["SECRET_NAME"])["SecretString"]
-    )
-    return snowflake.connector.connect(
-        user=secret["username"],
-        password=secret["password"],
-        account=secret["account"],
-        warehouse="VANTAGEPOINT_WH",
-        database="VANTAGEPOINT_PROD",
-        schema="B2BSAAS"
-    )
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
 
 
-def lambda_handler(event, context):
-    account_id = event.get("pathParameters", {}).get("account_id")
+def respond(status, payload):
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": "application/json", **CORS_HEADERS},
+        "body": json.dumps(payload, default=str)
+    }
 
-    if not account_id:
-        return {
-            "statusCode": 400,
-            "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-            "body": json.dumps({"error": "Missing account_id"})
-        }
-
-    conn = get_snowflake_conn()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT interaction_id, account_id, opportunity_id, timestamp,
-               interaction_type, transcript_body, sentiment_score, complaint_category
+
+def to_record(columns, row):
+    record = dict(zip(columns, row))
+    record["SENTIMENT_SCORE"] = float(record["SENTIMENT_SCORE"]) if record["SENTIMENT_SCORE"] else 0
+    return record
+
+
+def encode_cursor(timestamp, interaction_id):
+    token = json.dumps({"ts": timestamp.isoformat(sep=" ") if timestamp else None, "id": interaction_id})
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return token["ts"], token["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_params(query):
+    query = query or {}
+    fields = [f.strip() for f in query.get("fields", "").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in OPTIONAL_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    try:
+        limit = min(max(int(query.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    position = decode_cursor(query["cursor"]) if query.get("cursor") else None
+    return {"fields": fields, "limit": limit, "position": position}
+
+
+def list_transcripts(account_id, params):
+    columns = LIST_COLUMNS + [OPTIONAL_FIELDS[f] for f in params["fields"]]
+    where = ["account_id = %s"]
+    args = [account_id]
+
+    if params["position"]:
+        # keyset on (timestamp, interaction_id), newest first, NULL timestamps last
+        last_ts, last_id = params["position"]
+        if last_ts is None:
+            where.append("(timestamp IS NULL AND interaction_id < %s)")
+            args.append(last_id)
+        else:
+            where.append("(timestamp < %s OR (timestamp = %s AND interaction_id < %s) OR timestamp IS NULL)")
+            args.extend([last_ts, last_ts, last_id])
+
+    cursor = execute(f"""
+        SELECT {", ".join(columns)}
         FROM INTERACTION_TRANSCRIPTS
-        WHERE account_id = %s
-        ORDER BY timestamp DESC
-    """, (account_id,))
+        WHERE {" AND ".join(where)}
+        ORDER BY timestamp DESC NULLS LAST, interaction_id DESC
+        LIMIT {params["limit"] + 1}
+    """, args)
 
-    columns = [desc[0] for desc in cursor.description]
+    names = [desc[0] for desc in cursor.description]
     rows = cursor.fetchall()
+    cursor.close()
 
-    transcripts = []
-    for row in rows:
-        record = dict(zip(columns, row))
-        record["SENTIMENT_SCORE"] = float(record["SENTIMENT_SCORE"]) if record["SENTIMENT_SCORE"] else 0
-        transcripts.append(record)
+    transcripts = [to_record(names, row) for row in rows[:params["limit"]]]
+    next_cursor = None
+    if len(rows) > params["limit"]:
+        last = transcripts[-1]
+        next_cursor = encode_cursor(last["TIMESTAMP"], last["INTERACTION_ID"])
+    return transcripts, next_cursor
 
+
+def get_transcript(account_id, interaction_id):
+    cursor = execute(f"""
+        SELECT {", ".join(LIST_COLUMNS + list(OPTIONAL_FIELDS.values()))}
+        FROM INTERACTION_TRANSCRIPTS
+        WHERE account_id = %s AND interaction_id = %s
+    """, (account_id, interaction_id))
+
+    names = [desc[0] for desc in cursor.description]
+    row = cursor.fetchone()
     cursor.close()
-    conn.close()
+    return to_record(names, row) if row else None
 
-    return {
-        "statusCode": 200,
-        "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-        "body": json.dumps({"transcripts": transcripts}, default=str)
-    }
\ No newline at end of file
+
+def lambda_handler(event, context):
+    path_params = event.get("pathParameters") or {}
+    account_id = path_params.get("account_id")
+    interaction_id = path_params.get("interaction_id")
+
+    if not account_id:
+        return respond(400, {"error": "Missing account_id"})
+
+    # GET /api/account/{account_id}/transcripts/{interaction_id}: one body, on demand
+    if interaction_id:
+        transcript = get_transcript(account_id, interaction_id)
+        if transcript is None:
+            return respond(404, {"error": "Transcript not found"})
+        return respond(200, {"transcript": transcript})
+
+    try:
+        params = parse_params(event.get("queryStringParameters"))
+    except ValueError as e:
+        return respond(400, {"error": str(e)})
+
+    transcripts, next_cursor = list_transcripts(account_id, params)
+    return respond(200, {"transcripts": transcripts, "next_cursor": next_cursor})
@@ -1,57 +1,351 @@
+import base64
+import gzip
+import hashlib
 import json
 import os
+from collections import OrderedDict
 import boto3
-import snowflake.connector
+from botocore.exceptions import ClientError
+from snowflake_session import execute
+from data_version import DATA_VERSION_TTL, get_data_version
 
-sm = boto3.client("secretsmanager", region_name="us-east-1")
+DATA_LAKE_BUCKET = os.environ.get("DATA_LAKE_BUCKET")
+# one entry per filter, sort, format and page the dashboard asks for; a page is a few dozen KB.
+# sized above the distinct queries of one dashboard session so repeats don't fall through to S3
+MEMORY_ITEMS = int(os.environ.get("DASHBOARD_CACHE_ITEMS", "256"))
+SNAPSHOT_PREFIX = "cache/dashboard/"
+# bump when the response shape changes so old snapshots are never served
+RESPONSE_VERSION = "v2"
 
+# opt-in compact format: {"columns": [...], "data": {column: [values]}}, gzipped
+COLUMNAR_MEDIA_TYPE = "application/vnd.vantagepoint.columnar+json"
+FORMATS = ("json", "columnar")
 
-def get_snowflake_conn():
-    secret = json.loads(
-        sm.get_secret_value(SecretId=os.environ["SECRET_NAME"])["SecretString"]
-    )
-    return snowflake.connector.connect(
-        user=secret["username"],
-        password=secret["password"],
-        account=secret["account"],
-        warehouse="VANTAGEPOINT_WH",
-        database="VANTAGEPOINT_PROD",
-        schema="B2BSAAS"
-    )
+DEFAULT_PAGE_SIZE = int(os.environ.get("DASHBOARD_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = 500
 
+# same tiers as getRisk() in the frontend
+RISK_SQL = """CASE WHEN is_churned THEN 'churned'
+                   WHEN health_score >= 65 THEN 'healthy'
+                   WHEN health_score >= 40 THEN 'at_risk'
+                   ELSE 'critical' END"""
+RISK_RANK_SQL = """CASE WHEN is_churned THEN 0
+                        WHEN health_score < 40 THEN 1
+                        WHEN health_score < 65 THEN 2
+                        ELSE 3 END"""
+RISK_TIERS = ["healthy", "at_risk", "critical", "churned"]
 
-def lambda_handler(event, context):
-    conn = get_snowflake_conn()
-    cursor = conn.cursor()
+# sort parameter -> SQL expression, anything else is rejected
+SORT_COLUMNS = {
+    "ACCOUNT_ID": "account_id",
+    "INDUSTRY": "industry",
+    "TIER": "tier",
+    "ANNUAL_REVENUE": "annual_revenue",
+    "HEALTH_SCORE": "health_score",
+    "RISK": RISK_RANK_SQL,
+    "AVG_SENTIMENT": "avg_sentiment",
+    "SUPPORT_TICKET_COUNT": "support_ticket_count",
+    "DAYS_SINCE_LAST_ACTIVE": "days_since_last_active"
+}
 
-    cursor.execute("""
+# NUMBER columns sent as floats, NULL as 0
+FLOAT_COLUMNS = ["ANNUAL_REVENUE", "HEALTH_SCORE", "AVG_SESSION_DURATION", "ERROR_RATE", "AVG_SENTIMENT"]
+
+SELECT_COLUMNS = """
         SELECT account_id, industry, tier, annual_revenue, is_churned,
                tenure_days, health_score, total_sessions, active_users,
                features_adopted, avg_session_duration, error_rate,
                days_since_last_active, avg_sentiment, support_ticket_count,
-               negative_interaction_count, top_complaint_category
+               negative_interaction_count, top_complaint_category,
+               {sort_expr} AS sort_value
         FROM ACCOUNT_HEALTH_SCORE
-        ORDER BY health_score ASC
-    """)
+"""
+
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+
+s3 = boto3.client("s3")
+
+_responses = OrderedDict()
+
+
+def response_etag(version, query_key):
+    return '"' + hashlib.sha256(f"{RESPONSE_VERSION}|{version}|{query_key}".encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def memory_get(etag):
+    body = _responses.get(etag)
+    if body is not None:
+        _responses.move_to_end(etag)
+    return body
+
+
+def memory_put(etag, body):
+    _responses[etag] = body
+    _responses.move_to_end(etag)
+    while len(_responses) > MEMORY_ITEMS:
+        _responses.popitem(last=False)
+
+
+def snapshot_key(etag):
+    return SNAPSHOT_PREFIX + etag.strip('"') + ".json"
+
+
+def snapshot_get(etag):
+    try:
+        return s3.get_object(Bucket=DATA_LAKE_BUCKET, Key=snapshot_key(etag))["Body"].read().decode("utf-8")
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+            raise
+        return None
+
+
+def snapshot_put(etag, body):
+    s3.put_object(
+        Bucket=DATA_LAKE_BUCKET,
+        Key=snapshot_key(etag),
+        Body=body.encode("utf-8"),
+        ContentType="application/json"
+    )
+
+
+def encode_cursor(params, sort_value, account_id):
+    token = json.dumps({"sort": params["sort"], "dir": params["dir"], "v": sort_value, "id": account_id}, default=str)
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, params):
+    try:
+        token = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        position = (token["v"], token["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if token.get("sort") != params["sort"] or token.get("dir") != params["dir"]:
+        raise ValueError("Cursor does not match sort order")
+    return position
+
+
+def parse_params(query, headers):
+    query = query or {}
+    params = {
+        "risk": query.get("risk", "all"),
+        "industry": query.get("industry", "all"),
+        "search": query.get("search", "").strip(),
+        "sort": query.get("sort", "HEALTH_SCORE").upper(),
+        "dir": query.get("dir", "asc").lower(),
+        "cursor": query.get("cursor") or None,
+        "format": query.get("format") or ("columnar" if COLUMNAR_MEDIA_TYPE in headers.get("accept", "") else "json")
+    }
+
+    if params["risk"] != "all" and params["risk"] not in RISK_TIERS:
+        raise ValueError(f"Unknown risk tier: {params['risk']}")
+    if params["sort"] not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by {params['sort']}")
+    if params["dir"] not in ("asc", "desc"):
+        raise ValueError("dir must be asc or desc")
+    if params["format"] not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    try:
+        params["limit"] = min(max(int(query.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if params["cursor"]:
+        params["position"] = decode_cursor(params["cursor"], params)
+    return params
+
+
+def query_key(params):
+    # canonical form of the request, part of the cache key and the ETag
+    return json.dumps({k: params[k] for k in ("risk", "industry", "search", "sort", "dir", "limit", "cursor", "format")}, sort_keys=True)
+
+
+def search_pattern(search):
+    escaped = search.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return f"%{escaped}%"
+
 
+def page_query(params):
+    sort_expr = SORT_COLUMNS[params["sort"]]
+    where = []
+    args = []
+
+    if params["risk"] != "all":
+        where.append(f"{RISK_SQL} = %s")
+        args.append(params["risk"])
+    if params["industry"] != "all":
+        where.append("industry = %s")
+        args.append(params["industry"])
+    if params["search"]:
+        where.append("account_id ILIKE %s ESCAPE '!'")
+        args.append(search_pattern(params["search"]))
+
+    if params.get("position"):
+        # keyset: continue strictly after the last row of the previous page, NULLs sort last
+        last_value, last_id = params["position"]
+        op = ">" if params["dir"] == "asc" else "<"
+        if last_value is None:
+            where.append(f"({sort_expr} IS NULL AND account_id {op} %s)")
+            args.append(last_id)
+        else:
+            where.append(f"({sort_expr} {op} %s OR ({sort_expr} = %s AND account_id {op} %s) OR {sort_expr} IS NULL)")
+            args.extend([last_value, last_value, last_id])
+
+    sql = SELECT_COLUMNS.format(sort_expr=sort_expr)
+    if where:
+        sql += "        WHERE " + "\n          AND ".join(where) + "\n"
+    # one extra row tells us whether there is a next page
+    sql += f"        ORDER BY sort_value {params['dir']} NULLS LAST, account_id {params['dir']}\n        LIMIT {params['limit'] + 1}"
+    return sql, args
+
+
+def query_accounts(params):
+    cursor = execute(*page_query(params))
     columns = [desc[0] for desc in cursor.description]
     rows = cursor.fetchall()
+    cursor.close()
 
     accounts = []
-    for row in rows:
+    for row in rows[:params["limit"]]:
         record = dict(zip(columns, row))
-        record["ANNUAL_REVENUE"] = float(record["ANNUAL_REVENUE"]) if record["ANNUAL_REVENUE"] else 0
-        record["HEALTH_SCORE"] = float(record["HEALTH_SCORE"]) if record["HEALTH_SCORE"] else 0
-        record["AVG_SESSION_DURATION"] = float(record["AVG_SESSION_DURATION"]) if record["AVG_SESSION_DURATION"] else 0
-        record["ERROR_RATE"] = float(record["ERROR_RATE"]) if record["ERROR_RATE"] else 0
-        record["AVG_SENTIMENT"] = float(record["AVG_SENTIMENT"]) if record["AVG_SENTIMENT"] else 0
+        for column in FLOAT_COLUMNS:
+            record[column] = float(record[column]) if record[column] else 0
         accounts.append(record)
 
+    next_cursor = None
+    if len(rows) > params["limit"]:
+        last = accounts[-1]
+        next_cursor = encode_cursor(params, last["SORT_VALUE"], last["ACCOUNT_ID"])
+    for record in accounts:
+        del record["SORT_VALUE"]
+    return accounts, next_cursor
+
+
+def python_value(value):
+    # numpy scalar -> plain Python, NaN -> None
+    if value != value:
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def query_accounts_columnar(params):
+    # whole columns straight from the Arrow result batches, no per-row dicts
+    cursor = execute(*page_query(params))
+    frame = cursor.fetch_pandas_all()
+    cursor.close()
+
+    next_cursor = None
+    if len(frame) > params["limit"]:
+        frame = frame.iloc[:params["limit"]]
+        next_cursor = encode_cursor(params, python_value(frame["SORT_VALUE"].iloc[-1]), frame["ACCOUNT_ID"].iloc[-1])
+    frame = frame.drop(columns="SORT_VALUE")
+    frame[FLOAT_COLUMNS] = frame[FLOAT_COLUMNS].astype("float64").fillna(0)
+
+    data = {name: column.astype(object).where(column.notna(), None).tolist() for name, column in frame.items()}
+    return {"columns": list(frame.columns), "rows": len(frame), "data": data}, next_cursor
+
+
+def query_summary(params):
+    # tier counts and industries for the whole portfolio, plus how many accounts match the filters
+    search_expr = "account_id ILIKE %s ESCAPE '!'" if params["search"] else "TRUE"
+    args = [search_pattern(params["search"])] if params["search"] else []
+    cursor = execute(f"""
+        SELECT {RISK_SQL} AS risk, industry, {search_expr} AS matches_search, COUNT(*) AS accounts
+        FROM ACCOUNT_HEALTH_SCORE
+        GROUP BY 1, 2, 3
+    """, args)
+    rows = cursor.fetchall()
     cursor.close()
-    conn.close()
+
+    tiers = {tier: 0 for tier in RISK_TIERS}
+    industries = set()
+    matched = 0
+    for risk, industry, matches_search, count in rows:
+        tiers[risk] += count
+        industries.add(industry)
+        if (matches_search and params["risk"] in ("all", risk)
+                and params["industry"] in ("all", industry)):
+            matched += count
+
+    return {
+        "total": sum(tiers.values()),
+        "tiers": tiers,
+        "industries": sorted(i for i in industries if i is not None),
+        "matched": matched
+    }
+
+
+def query_dashboard(params):
+    if params["format"] == "columnar":
+        accounts, next_cursor = query_accounts_columnar(params)
+    else:
+        accounts, next_cursor = query_accounts(params)
+    response = {"accounts": accounts, "next_cursor": next_cursor}
+    if not params["cursor"]:
+        # later pages don't repeat the summary
+        response["summary"] = query_summary(params)
+    if params["format"] != "columnar":
+        return json.dumps(response, default=str)
+
+    # API Gateway needs binary bodies base64 encoded, the browser sees plain gzip
+    body = json.dumps(response, default=str, separators=(",", ":"))
+    return base64.b64encode(gzip.compress(body.encode("utf-8"), compresslevel=6)).decode("ascii")
+
+
+def content_headers(params):
+    if params["format"] == "columnar":
+        return {"Content-Type": COLUMNAR_MEDIA_TYPE, "Content-Encoding": "gzip", "Vary": "Accept"}
+    return {"Content-Type": "application/json", "Vary": "Accept"}
+
+
+def lambda_handler(event, context):
+    try:
+        params = parse_params(event.get("queryStringParameters"), event.get("headers") or {})
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "application/json", **CORS_HEADERS},
+            "body": json.dumps({"error": str(e)})
+        }
+
+    version = get_data_version()
+
+    if version is None:
+        # no dbt marker yet, nothing to key a cache on
+        return {
+            "statusCode": 200,
+            "headers": {**content_headers(params), "Cache-Control": "no-store", **CORS_HEADERS},
+            "body": query_dashboard(params),
+            "isBase64Encoded": params["format"] == "columnar"
+        }
+
+    etag = response_etag(version, query_key(params))
+    cache_headers = {"ETag": etag, "Cache-Control": f"private, max-age={DATA_VERSION_TTL}, must-revalidate"}
+
+    if etag_matches((event.get("headers") or {}).get("if-none-match"), etag):
+        print(f"Dashboard 304 for data version {version}")
+        return {"statusCode": 304, "headers": {**cache_headers, **CORS_HEADERS}, "body": ""}
+
+    source = "memory"
+    body = memory_get(etag)
+    if body is None:
+        source = "s3 snapshot"
+        body = snapshot_get(etag)
+        if body is None:
+            source = "snowflake"
+            body = query_dashboard(params)
+            snapshot_put(etag, body)
+        memory_put(etag, body)
+    print(f"Dashboard served from {source} for data version {version}")
 
     return {
         "statusCode": 200,
-        "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-        "body": json.dumps({"accounts": accounts}, default=str)
-    }
\ No newline at end of file
+        "headers": {**content_headers(params), **cache_headers, **CORS_HEADERS},
+        "body": body,
+        "isBase64Encoded": params["format"] == "columnar"
+    }
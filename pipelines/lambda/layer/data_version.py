@@ -0,0 +1,42 @@
+"""Version of ACCOUNT_HEALTH_SCORE, shared by the Lambdas that cache per dbt run.
+
+`dbt run` is followed by an upload of its run_results.json to DBT_MARKER_KEY,
+and the ETag of that marker is the data version. Responses, answers and
+portfolios cached under it are invalidated by the next run.
+
+    from data_version import get_data_version
+
+    version = get_data_version()   # None until the marker has been uploaded
+"""
+import os
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+DATA_LAKE_BUCKET = os.environ.get("DATA_LAKE_BUCKET")
+# uploaded after every `dbt run`, its ETag is the version of ACCOUNT_HEALTH_SCORE
+DBT_MARKER_KEY = os.environ.get("DBT_MARKER_KEY", "markers/dbt/run_results.json")
+DATA_VERSION_TTL = int(os.environ.get("DATA_VERSION_TTL_SECONDS", "30"))
+
+s3 = boto3.client("s3")
+
+_data_version = None
+_data_version_checked_at = 0.0
+
+
+def get_data_version():
+    # one HEAD per container every DATA_VERSION_TTL seconds, None when no marker has been uploaded
+    global _data_version, _data_version_checked_at
+    if not DATA_LAKE_BUCKET:
+        return None
+    if time.time() - _data_version_checked_at < DATA_VERSION_TTL:
+        return _data_version
+    try:
+        _data_version = s3.head_object(Bucket=DATA_LAKE_BUCKET, Key=DBT_MARKER_KEY)["ETag"].strip('"')
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+            raise
+        _data_version = None
+    _data_version_checked_at = time.time()
+    return _data_version
@@ -0,0 +1,159 @@
+"""Health score engine: the account_health_score formula over NumPy arrays.
+
+score() reproduces the health_score column of
+dbt/vantagepoint/models/marts/account_health_score.sql: the same six components,
+added in the same order in float64 and rounded to one decimal half away from
+zero. The mart casts its divisions to double for this; as Snowflake NUMBER,
+5 / 12.0 is 0.416667 and ties at .x5 would round differently. What-if
+questions (other weights, or one account's sentiment improving) are answered
+in process instead of with a dbt run; rescoring the portfolio is a handful of
+vectorized operations.
+
+Weights are the maximum points of each component. At DEFAULT_WEIGHTS, the
+scores are the ones the mart computes. Keep both in step when the formula changes
+(pipelines/local/check_health_score_parity.py compares them).
+"""
+import numpy as np
+
+# maximum points per component, as in account_health_score.sql
+DEFAULT_WEIGHTS = {
+    "sessions": 15,
+    "features": 15,
+    "error_rate": 10,
+    "recency": 20,
+    "sentiment": 25,
+    "support_tickets": 15
+}
+
+SESSION_CAP = 100
+FEATURE_CAP = 12
+# (days_since_last_active upper bound, points at the default recency weight), first match wins
+RECENCY_BUCKETS = [(7, 20), (30, 15), (90, 8)]
+# (support_ticket_count upper bound, points at the default ticket weight)
+TICKET_BUCKETS = [(0, 15), (3, 10), (7, 5)]
+
+# mart inputs and the coalesce defaults the SQL applies to accounts without usage or transcripts
+INPUTS = {
+    "total_sessions": 0,
+    "features_adopted": 0,
+    "error_rate": 0.0,
+    "days_since_last_active": 999,
+    "avg_sentiment": 0.0,
+    "support_ticket_count": 0
+}
+
+# same tiers as the dashboard and the RAG prompt: churned accounts first, whatever their score
+TIERS = [(65, "healthy"), (40, "at_risk")]
+
+
+def round_half_away(values, decimals=0):
+    # np.round rounds half to even, SQL ROUND rounds half away from zero
+    scale = 10.0 ** decimals
+    scaled = np.asarray(values, dtype=np.float64) * scale
+    whole = np.trunc(scaled)
+    return (whole + np.where(np.abs(scaled - whole) >= 0.5, np.sign(scaled), 0.0)) / scale
+
+
+def bucket_points(values, buckets, weight, default_weight):
+    points = np.zeros(len(values), dtype=np.float64)
+    assigned = np.zeros(len(values), dtype=bool)
+    for upper, bucket in buckets:
+        hit = ~assigned & (values <= upper)
+        points[hit] = bucket
+        assigned |= hit
+    # at the default weight the SQL literals are used as they are
+    return points if weight == default_weight else points * (weight / default_weight)
+
+
+class Portfolio:
+    """Mart inputs as one float64 array per column, aligned with account_ids, and is_churned as a bool array."""
+
+    def __init__(self, account_ids, columns, churned=None):
+        self.account_ids = np.asarray(account_ids, dtype=object)
+        self.columns = {name: np.asarray(columns[name], dtype=np.float64) for name in INPUTS}
+        self.churned = np.zeros(len(self.account_ids), dtype=bool) if churned is None else np.asarray(churned, dtype=bool)
+        self.index = {account_id: i for i, account_id in enumerate(self.account_ids.tolist())}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from ACCOUNT_HEALTH_SCORE rows (dicts with lowercase keys), NULLs become the SQL defaults."""
+        columns = {
+            name: [default if row.get(name) is None else float(row[name]) for row in rows]
+            for name, default in INPUTS.items()
+        }
+        return cls([row["account_id"] for row in rows], columns, [bool(row.get("is_churned")) for row in rows])
+
+    def __len__(self):
+        return len(self.account_ids)
+
+    def with_overrides(self, overrides):
+        """Copy with {account_id: {column: value}} applied; unknown accounts or columns raise ValueError."""
+        columns = dict(self.columns)
+        copied = set()
+        for account_id, values in overrides.items():
+            if account_id not in self.index:
+                raise ValueError(f"Unknown account {account_id}")
+            for name, value in values.items():
+                if name not in INPUTS:
+                    raise ValueError(f"Unknown input {name}, expected one of {', '.join(INPUTS)}")
+                if name not in copied:
+                    columns[name] = columns[name].copy()
+                    copied.add(name)
+                columns[name][self.index[account_id]] = float(value)
+        return Portfolio(self.account_ids, columns, self.churned)
+
+
+def resolve_weights(weights=None):
+    resolved = dict(DEFAULT_WEIGHTS)
+    for name, value in (weights or {}).items():
+        if name not in DEFAULT_WEIGHTS:
+            raise ValueError(f"Unknown weight {name}, expected one of {', '.join(DEFAULT_WEIGHTS)}")
+        resolved[name] = float(value)
+    return resolved
+
+
+def components(portfolio, weights=None):
+    """Points per component, one array each, in the order the SQL adds them."""
+    w = resolve_weights(weights)
+    c = portfolio.columns
+    return {
+        "sessions": (np.minimum(c["total_sessions"], SESSION_CAP) / float(SESSION_CAP)) * w["sessions"],
+        "features": (np.minimum(c["features_adopted"], FEATURE_CAP) / float(FEATURE_CAP)) * w["features"],
+        "error_rate": (1 - np.minimum(c["error_rate"], 1)) * w["error_rate"],
+        "recency": bucket_points(c["days_since_last_active"], RECENCY_BUCKETS,
+                                 w["recency"], DEFAULT_WEIGHTS["recency"]),
+        "sentiment": ((c["avg_sentiment"] + 1) / 2.0) * w["sentiment"],
+        "support_tickets": bucket_points(c["support_ticket_count"], TICKET_BUCKETS,
+                                         w["support_tickets"], DEFAULT_WEIGHTS["support_tickets"])
+    }
+
+
+def score(portfolio, weights=None):
+    total = np.zeros(len(portfolio), dtype=np.float64)
+    for points in components(portfolio, weights).values():
+        total = total + points
+    return round_half_away(total, 1)
+
+
+def tiers(scores, churned=None):
+    labels = np.full(len(scores), "critical", dtype=object)
+    for threshold, label in reversed(TIERS):
+        labels[scores >= threshold] = label
+    if churned is not None:
+        labels[churned] = "churned"
+    return labels
+
+
+def what_if(portfolio, weights=None, overrides=None):
+    """Rescore under other weights and/or per-account input overrides, against the default scores."""
+    baseline = score(portfolio)
+    scenario = portfolio.with_overrides(overrides) if overrides else portfolio
+    scores = score(scenario, weights)
+    return {
+        "account_ids": portfolio.account_ids,
+        "baseline": baseline,
+        "scores": scores,
+        "delta": round_half_away(scores - baseline, 1),
+        "baseline_tiers": tiers(baseline, portfolio.churned),
+        "tiers": tiers(scores, portfolio.churned)
+    }
@@ -0,0 +1,152 @@
+"""Snowflake session shared by every Lambda that uses the snowflake-connector layer.
+
+The secret and the connection live at module level, so a warm container reuses
+them and skips the Secrets Manager call and the Snowflake login. A connection
+that has sat idle is checked with a cheap query before it is handed out, and
+one whose session has expired is replaced transparently.
+
+    from snowflake_session import get_connection, execute, reset_connection
+
+    cursor = execute("SELECT ...", (account_id,))   # read-only, retried once on a dead session
+    conn = get_connection()                         # for writes / transactions,
+                                                    # reset_connection() if it fails mid-way
+"""
+import json
+import os
+import threading
+import time
+
+import boto3
+import snowflake.connector
+from snowflake.connector.errors import DatabaseError, OperationalError
+
+SECRET_TTL_SECONDS = int(os.environ.get("SNOWFLAKE_SECRET_TTL_SECONDS", "900"))
+# idle time after which a reused connection is pinged before use
+HEALTH_CHECK_IDLE_SECONDS = int(os.environ.get("SNOWFLAKE_HEALTH_CHECK_IDLE_SECONDS", "60"))
+
+# session gone / auth token expired, the connector can't recover these on its own
+SESSION_EXPIRED_ERRNOS = {390111, 390112, 390114}
+
+sm = boto3.client("secretsmanager", region_name="us-east-1")
+
+_lock = threading.RLock()
+_secret = None
+_secret_loaded_at = 0.0
+_conn = None
+_last_used = 0.0
+_last_login_ms = None
+
+
+def _elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def get_secret(refresh=False):
+    global _secret, _secret_loaded_at
+    with _lock:
+        if refresh or _secret is None or time.time() - _secret_loaded_at > SECRET_TTL_SECONDS:
+            _secret = json.loads(
+                sm.get_secret_value(SecretId=os.environ["SECRET_NAME"])["SecretString"]
+            )
+            _secret_loaded_at = time.time()
+        return _secret
+
+
+def _connect(secret):
+    return snowflake.connector.connect(
+        user=secret["username"],
+        password=secret["password"],
+        account=secret["account"],
+        warehouse="VANTAGEPOINT_WH",
+        database="VANTAGEPOINT_PROD",
+        schema="B2BSAAS"
+    )
+
+
+def _login():
+    global _last_login_ms
+    start = time.perf_counter()
+    secret_cached = _secret is not None and time.time() - _secret_loaded_at <= SECRET_TTL_SECONDS
+    try:
+        conn = _connect(get_secret())
+    except DatabaseError:
+        if not secret_cached:
+            raise
+        # the password may have been rotated since we cached it
+        conn = _connect(get_secret(refresh=True))
+        secret_cached = False
+    _last_login_ms = _elapsed_ms(start)
+    print(f"Snowflake login in {_last_login_ms:.0f} ms (secret {'cached' if secret_cached else 'fetched'})")
+    return conn
+
+
+def _is_alive(conn):
+    if conn.is_closed():
+        return False
+    if time.time() - _last_used < HEALTH_CHECK_IDLE_SECONDS:
+        return True
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+        return True
+    except (DatabaseError, OperationalError) as e:
+        print(f"Dropping stale Snowflake connection: {e}")
+        return False
+
+
+def reset_connection():
+    # drop the cached connection so the next get_connection() logs in again
+    global _conn
+    if _conn is not None:
+        try:
+            _conn.close()
+        except Exception:
+            pass
+    _conn = None
+
+
+def get_connection():
+    """Return the container's Snowflake connection, logging in only when there is no live one.
+
+    Callers must not close it; it is kept for the next invocation.
+    """
+    global _conn, _last_used
+    with _lock:
+        start = time.perf_counter()
+        if _conn is not None and _is_alive(_conn):
+            saved = f", saved ~{_last_login_ms:.0f} ms login" if _last_login_ms else ""
+            print(f"Snowflake session reused in {_elapsed_ms(start):.1f} ms{saved}")
+        else:
+            reset_connection()
+            _conn = _login()
+        _last_used = time.time()
+        return _conn
+
+
+def is_session_error(error):
+    return isinstance(error, OperationalError) or getattr(error, "errno", None) in SESSION_EXPIRED_ERRNOS
+
+
+def execute(sql, params=None):
+    """Run a read-only query on the shared connection and return its cursor.
+
+    If the session died between the health check and the query, log in again and
+    retry once. Don't use this for statements that must not run twice.
+    """
+    global _last_used
+    start = time.perf_counter()
+    try:
+        cursor = get_connection().cursor()
+        cursor.execute(sql, params)
+    except DatabaseError as e:
+        if not is_session_error(e):
+            raise
+        print(f"Snowflake session expired ({e.errno}), reconnecting")
+        with _lock:
+            reset_connection()
+        cursor = get_connection().cursor()
+        cursor.execute(sql, params)
+    _last_used = time.time()
+    print(f"Snowflake query in {_elapsed_ms(start):.0f} ms")
+    return cursor
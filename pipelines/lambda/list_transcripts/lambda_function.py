@@ -1,22 +1,161 @@
 import boto3
+import json
 import os
 
 s3 = boto3.client("s3")
 
+# process_transcripts drops a marker at MANIFEST_PREFIX/<key>/<etag>_<size>[_<start>-<end>] once a
+# work unit is loaded, so a single listing tells us which units are already processed and unchanged
+MANIFEST_PREFIX = "manifests/transcripts/"
+# a sharded file's byte ranges are saved next to its markers, so each file version is only sampled once
+PLAN_SUFFIX = ".shards"
+
+# files bigger than this are split into byte-range shards of roughly this many records
+RECORDS_PER_SHARD = int(os.environ.get("RECORDS_PER_SHARD", "500"))
+SAMPLE_BYTES = 64 * 1024
+# no transcript line is shorter than this, so smaller files can't need sharding and aren't sampled
+MIN_RECORD_BYTES = 100
+
+
+def list_objects(bucket, prefix):
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            yield obj
+
+
+def manifest_marker(unit):
+    etag = unit["etag"].strip('"')
+    marker = f"{MANIFEST_PREFIX}{unit['key']}/{etag}_{unit['size']}"
+    if "start" in unit:
+        marker += f"_{unit['start']}-{unit['end']}"
+    return marker
+
+
+def read_manifest(bucket):
+    # marker of each file version -> whether it was loaded whole, the shard ranges loaded, and if a plan is saved
+    versions = {}
+    for obj in list_objects(bucket, MANIFEST_PREFIX):
+        marker = obj["Key"]
+        plan = marker.endswith(PLAN_SUFFIX)
+        if plan:
+            marker = marker[:-len(PLAN_SUFFIX)]
+        directory, name = marker.rsplit("/", 1)
+        etag, size, *shard = name.split("_")
+        entry = versions.setdefault(f"{directory}/{etag}_{size}", {"whole": False, "ranges": set(), "plan": False})
+        if plan:
+            entry["plan"] = True
+        elif shard:
+            start, end = shard[0].split("-")
+            entry["ranges"].add((int(start), int(end)))
+        else:
+            entry["whole"] = True
+    return versions
+
+
+def covers(ranges, size):
+    # the loaded shards reach from byte 0 to the end of the file without a gap
+    reached = 0
+    for start, end in sorted(ranges):
+        if start > reached:
+            return False
+        reached = max(reached, end)
+    return reached >= size
+
+
+def read_plan(bucket, version):
+    body = s3.get_object(Bucket=bucket, Key=version + PLAN_SUFFIX)["Body"].read()
+    return [tuple(shard) for shard in json.loads(body)["shards"]]
+
+
+def save_plan(bucket, version, shards):
+    s3.put_object(
+        Bucket=bucket,
+        Key=version + PLAN_SUFFIX,
+        Body=json.dumps({"shards": shards}).encode("utf-8"),
+        ContentType="application/json"
+    )
+
+
+def read_range(bucket, key, etag, start, length):
+    response = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{start + length - 1}", IfMatch=etag)
+    return response["Body"].read()
+
+
+def plan_shards(bucket, obj):
+    # returns [(start, end)] byte ranges that each begin right after a newline
+    size, etag = obj["Size"], obj["ETag"]
+    if size <= RECORDS_PER_SHARD * MIN_RECORD_BYTES:
+        return [(0, size)]
+
+    sample = read_range(bucket, obj["Key"], etag, 0, SAMPLE_BYTES)
+    lines_in_sample = sample.count(b"\n")
+    if lines_in_sample == 0:
+        return [(0, size)]
+
+    # average line length from the sample decides how many bytes hold RECORDS_PER_SHARD records
+    target = RECORDS_PER_SHARD * (sample.rfind(b"\n") + 1) // lines_in_sample
+    if size <= target * 1.5:
+        return [(0, size)]
+
+    boundaries = [0]
+    candidate = target
+    while candidate < size - target // 2:
+        window = read_range(bucket, obj["Key"], etag, candidate, SAMPLE_BYTES)
+        newline = window.find(b"\n")
+        if newline == -1:
+            # a single line longer than the window, keep looking further on
+            candidate += SAMPLE_BYTES
+            continue
+        boundary = candidate + newline + 1
+        if boundary >= size:
+            break
+        boundaries.append(boundary)
+        candidate = boundary + target
+    boundaries.append(size)
+
+    return list(zip(boundaries, boundaries[1:]))
+
+
 def lambda_handler(event, context):
     bucket = os.environ["DATA_LAKE_BUCKET"]
     prefix = "raw/transcripts/"
+    full_refresh = bool((event or {}).get("full_refresh"))
+
+    versions = {} if full_refresh else read_manifest(bucket)
 
     files = []
-    paginator = s3.get_paginator("list_objects_v2")
+    skipped = 0
+    sharded = 0
+    for obj in list_objects(bucket, prefix):
+        if not obj["Key"].endswith(".json"):
+            continue
 
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            if obj["Key"].endswith(".json"):
-                files.append({
-                    "bucket": bucket,
-                    "key": obj["Key"]
-                })
-
-    print(f"Found {len(files)} transcript files")
-    return {"files": files}
\ No newline at end of file
+        unit = {
+            "bucket": bucket,
+            "key": obj["Key"],
+            "etag": obj["ETag"],
+            "size": obj["Size"]
+        }
+        version = manifest_marker(unit)
+        done = versions.get(version, {"whole": False, "ranges": set(), "plan": False})
+
+        # fully loaded versions are skipped before any sampling GET, so listing cost doesn't grow with history
+        if done["whole"] or (done["ranges"] and covers(done["ranges"], obj["Size"])):
+            skipped += 1
+            continue
+
+        if done["plan"]:
+            shards = read_plan(bucket, version)
+        else:
+            shards = plan_shards(bucket, obj)
+            if len(shards) > 1:
+                save_plan(bucket, version, shards)
+        units = [unit] if len(shards) == 1 else [dict(unit, start=start, end=end) for start, end in shards]
+        sharded += 1 if len(shards) > 1 else 0
+
+        files.extend(u for u in units if (u.get("start"), u.get("end")) not in done["ranges"])
+
+    mode = "full refresh" if full_refresh else "incremental"
+    print(f"Planned {len(files)} work units ({sharded} files sharded), {skipped} files unchanged since last run ({mode})")
+    return {"files": files}
@@ -1,14 +1,62 @@
 import boto3
+import hashlib
 import json
 import os
-import snowflake.connector
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from snowflake.connector.errors import DatabaseError
+from snowflake_session import get_connection, reset_connection
+from preclassifier import preclassify
+
+# concurrent enrichment settings, ENRICH_CONCURRENCY=1 keeps the old serial behaviour
+ENRICH_CONCURRENCY = int(os.environ.get("ENRICH_CONCURRENCY", "8"))
+BEDROCK_MAX_RPS = float(os.environ.get("BEDROCK_MAX_RPS", "10"))
+BEDROCK_MAX_RETRIES = int(os.environ.get("BEDROCK_MAX_RETRIES", "5"))
+
+# transcripts packed into one Bedrock prompt, 1 sends each transcript on its own
+ENRICH_BATCH_SIZE = int(os.environ.get("ENRICH_BATCH_SIZE", "1"))
+
+# rows per executemany round trip into the staging table
+LOAD_BATCH_SIZE = int(os.environ.get("LOAD_BATCH_SIZE", "500"))
+
+# records enriched, merged and committed together while streaming a file
+STREAM_CHUNK_RECORDS = int(os.environ.get("STREAM_CHUNK_RECORDS", "100"))
+CHECKPOINT_PREFIX = "checkpoints/transcripts/"
+
+# completion markers read by list_transcripts, see manifest_marker there
+MANIFEST_PREFIX = "manifests/transcripts/"
+
+# local keyword tier, records it scores at or above this confidence skip Bedrock; unset disables it
+PRECLASSIFY_THRESHOLD = float(os.environ.get("PRECLASSIFY_THRESHOLD", "inf"))
+
+# enrichment cache, S3 is skipped when CACHE_BUCKET is unset
+CACHE_BUCKET = os.environ.get("CACHE_BUCKET")
+CACHE_PREFIX = "cache/transcript_enrichment/"
+CACHE_MEMORY_ITEMS = int(os.environ.get("CACHE_MEMORY_ITEMS", "5000"))
 
 s3 = boto3.client("s3")
-sm = boto3.client("secretsmanager", region_name="us-east-1")
-bedrock = boto3.client("bedrock-runtime", region_name="us-east-1")
+bedrock = boto3.client(
+    "bedrock-runtime",
+    region_name="us-east-1",
+    config=Config(max_pool_connections=max(10, ENRICH_CONCURRENCY))
+)
 
 MODEL_ID = "amazon.nova-micro-v1:0"
 
+# bump whenever PROMPT_TEMPLATE or BATCH_PROMPT_TEMPLATE changes so cached labels from the old prompt are ignored
+PROMPT_VERSION = "v1"
+
+CATEGORIES = {"billing", "performance", "bugs", "feature_request", "onboarding", "security", "data_quality", "general"}
+
+FALLBACK_ANALYSIS = (0.0, "general")
+
+THROTTLE_ERRORS = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+
 PROMPT_TEMPLATE = """Analyze the following customer interaction transcript.
 Return a JSON object with exactly two fields:
 1. "sentiment_score": a float between -1.0 (very negative) and 1.0 (very positive)
@@ -21,22 +69,193 @@ Return ONLY the JSON object, no other text.
 Transcript:
 {transcript}"""
 
+BATCH_PROMPT_TEMPLATE = """Analyze each of the following customer interaction transcripts.
+Return a JSON array with one object per transcript, each with exactly three fields:
+1. "interaction_id": the interaction_id of the transcript, copied exactly
+2. "sentiment_score": a float between -1.0 (very negative) and 1.0 (very positive)
+3. "complaint_category": one of these categories ONLY: "billing", "performance", "bugs", "feature_request", "onboarding", "security", "data_quality", "general"
 
-def get_snowflake_conn():
-    secret = json.loads(
-        sm.get_secret_value(SecretId=os.environ["SECRET_NAME"])["SecretString"]
-    )
-    return snowflake.connector.connect(
-        user=secret["username"],
-        password=secret["password"],
-        account=secret["account"],
-        warehouse="VANTAGEPOINT_WH",
-        database="VANTAGEPOINT_PROD",
-        schema="B2BSAAS"
-    )
+If an interaction is a sales call or positive email, still assign a sentiment score and use "general" as the category if no complaint exists.
 
+Return ONLY the JSON array, no other text.
 
-def analyze_transcript(transcript_body):
+Transcripts:
+{transcripts}"""
+
+STAGE_TABLE = "INTERACTION_TRANSCRIPTS_STAGE"
+
+CREATE_STAGE_SQL = f"CREATE OR REPLACE TEMPORARY TABLE {STAGE_TABLE} LIKE INTERACTION_TRANSCRIPTS"
+
+STAGE_INSERT_SQL = f"""
+    INSERT INTO {STAGE_TABLE}
+    (INTERACTION_ID, ACCOUNT_ID, OPPORTUNITY_ID, TIMESTAMP,
+     INTERACTION_TYPE, TRANSCRIPT_BODY, SENTIMENT_SCORE, COMPLAINT_CATEGORY)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# upsert on INTERACTION_ID so a retried file overwrites instead of duplicating. LOADED_AT is when the row was last
+# written, which dbt's incremental staging filters on since re-enriched files carry old timestamps
+MERGE_SQL = f"""
+    MERGE INTO INTERACTION_TRANSCRIPTS t
+    USING (
+        SELECT * FROM {STAGE_TABLE}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY INTERACTION_ID ORDER BY TIMESTAMP DESC) = 1
+    ) s
+    ON t.INTERACTION_ID = s.INTERACTION_ID
+    WHEN MATCHED THEN UPDATE SET
+        ACCOUNT_ID = s.ACCOUNT_ID,
+        OPPORTUNITY_ID = s.OPPORTUNITY_ID,
+        TIMESTAMP = s.TIMESTAMP,
+        INTERACTION_TYPE = s.INTERACTION_TYPE,
+        TRANSCRIPT_BODY = s.TRANSCRIPT_BODY,
+        SENTIMENT_SCORE = s.SENTIMENT_SCORE,
+        COMPLAINT_CATEGORY = s.COMPLAINT_CATEGORY,
+        LOADED_AT = CURRENT_TIMESTAMP
+    WHEN NOT MATCHED THEN INSERT
+        (INTERACTION_ID, ACCOUNT_ID, OPPORTUNITY_ID, TIMESTAMP,
+         INTERACTION_TYPE, TRANSCRIPT_BODY, SENTIMENT_SCORE, COMPLAINT_CATEGORY, LOADED_AT)
+    VALUES
+        (s.INTERACTION_ID, s.ACCOUNT_ID, s.OPPORTUNITY_ID, s.TIMESTAMP,
+         s.INTERACTION_TYPE, s.TRANSCRIPT_BODY, s.SENTIMENT_SCORE, s.COMPLAINT_CATEGORY, CURRENT_TIMESTAMP)
+"""
+
+
+class AdaptiveRateLimiter:
+    """Token bucket shared by all enrichment threads.
+
+    The refill rate starts at max_rate, is halved when Bedrock throttles us
+    and creeps back up by a small step on each successful call (AIMD). Throttles
+    that arrive within one cooldown window count once, otherwise every in-flight
+    thread would halve the rate for the same burst.
+    """
+
+    def __init__(self, max_rate, min_rate=0.5, increase_step=0.1, cooldown=1.0):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.increase_step = increase_step
+        self.cooldown = cooldown
+        self.rate = max_rate
+        self.capacity = max(1.0, max_rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.throttled_at = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.throttled_at >= self.cooldown:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.throttled_at = now
+            self.tokens = 0
+
+
+limiter = AdaptiveRateLimiter(BEDROCK_MAX_RPS)
+
+
+def invoke_bedrock(body):
+    # retries throttling errors with exponential backoff, anything else is raised as before
+    for attempt in range(BEDROCK_MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            response = bedrock.invoke_model(
+                modelId=MODEL_ID,
+                contentType="application/json",
+                accept="application/json",
+                body=body
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in THROTTLE_ERRORS or attempt == BEDROCK_MAX_RETRIES:
+                raise
+            limiter.on_throttle()
+            time.sleep(min(20, 0.5 * 2 ** attempt))
+            continue
+
+        limiter.on_success()
+        return json.loads(response["body"].read())
+
+
+class EnrichmentCache:
+    """In-memory LRU in front of content-addressed S3 objects.
+
+    S3 entries are expired by the bucket lifecycle rule on CACHE_PREFIX, the
+    memory layer evicts the least recently used key past max_items.
+    """
+
+    def __init__(self, bucket, max_items):
+        self.bucket = bucket
+        self.max_items = max_items
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _remember(self, key, value):
+        with self.lock:
+            self.memory[key] = value
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_items:
+                self.memory.popitem(last=False)
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+
+        if not self.bucket:
+            return None
+
+        try:
+            response = s3.get_object(Bucket=self.bucket, Key=f"{CACHE_PREFIX}{key}.json")
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+
+        cached = json.loads(response["Body"].read())
+        value = (float(cached["sentiment_score"]), cached["complaint_category"])
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.bucket:
+            s3.put_object(
+                Bucket=self.bucket,
+                Key=f"{CACHE_PREFIX}{key}.json",
+                Body=json.dumps({"sentiment_score": value[0], "complaint_category": value[1]}),
+                ContentType="application/json"
+            )
+
+
+cache = EnrichmentCache(CACHE_BUCKET, CACHE_MEMORY_ITEMS)
+
+
+def cache_key(transcript_body):
+    normalized = " ".join(transcript_body.lower().split())
+    return hashlib.sha256(f"{MODEL_ID}|{PROMPT_VERSION}|{normalized}".encode("utf-8")).hexdigest()
+
+
+def classify_transcript(transcript_body):
+    # returns None when the model output can't be parsed, so callers can decide on the fallback
     prompt = PROMPT_TEMPLATE.format(transcript=transcript_body)
 
     body = json.dumps({
@@ -47,14 +266,7 @@ def analyze_transcript(transcript_body):
         }
     })
 
-    response = bedrock.invoke_model(
-        modelId=MODEL_ID,
-        contentType="application/json",
-        accept="application/json",
-        body=body
-    )
-
-    result = json.loads(response["body"].read())
+    result = invoke_bedrock(body)
     text = result["output"]["message"]["content"][0]["text"]
 
     try:
@@ -62,41 +274,136 @@ def analyze_transcript(transcript_body):
         score = float(analysis.get("sentiment_score", 0.0))
         category = analysis.get("complaint_category", "general")
     except (json.JSONDecodeError, ValueError):
-        score = 0.0
-        category = "general"
+        return None
 
     return score, category
 
 
-def lambda_handler(event, context):
-    bucket = event["bucket"]
-    key = event["key"]
+def analyze_transcript(transcript_body):
+    return classify_transcript(transcript_body) or FALLBACK_ANALYSIS
 
-    response = s3.get_object(Bucket=bucket, Key=key)
-    content = response["Body"].read().decode("utf-8")
 
-    records = []
-    for line in content.strip().split("\n"):
-        if line.strip():
-            records.append(json.loads(line))
+def build_batch_prompt(items):
+    # items is a list of (interaction_id, transcript_body)
+    transcripts = json.dumps(
+        [{"interaction_id": interaction_id, "transcript": body} for interaction_id, body in items],
+        indent=0
+    )
+    return BATCH_PROMPT_TEMPLATE.format(transcripts=transcripts)
 
-    print(f"Processing {len(records)} transcripts from {key}")
 
-    conn = get_snowflake_conn()
-    cursor = conn.cursor()
+def parse_batch_analysis(text, interaction_ids):
+    # returns {interaction_id: (score, category)} for every well-formed entry we asked for
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end < start:
+        return {}
 
-    insert_sql = """
-        INSERT INTO INTERACTION_TRANSCRIPTS 
-        (INTERACTION_ID, ACCOUNT_ID, OPPORTUNITY_ID, TIMESTAMP, 
-         INTERACTION_TYPE, TRANSCRIPT_BODY, SENTIMENT_SCORE, COMPLAINT_CATEGORY)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
+    try:
+        entries = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
 
-    processed = 0
-    for record in records:
-        score, category = analyze_transcript(record["transcript_body"])
+    parsed = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or entry.get("interaction_id") not in interaction_ids:
+            continue
+        try:
+            score = float(entry["sentiment_score"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        category = entry.get("complaint_category")
+        if -1.0 <= score <= 1.0 and category in CATEGORIES:
+            parsed[entry["interaction_id"]] = (score, category)
 
-        cursor.execute(insert_sql, (
+    return parsed
+
+
+def classify_batch(items):
+    # one Bedrock call for the whole batch, entries missing from the reply go through the single-record path
+    if len(items) == 1:
+        return [classify_transcript(items[0][1])]
+
+    request_body = json.dumps({
+        "messages": [{"role": "user", "content": [{"text": build_batch_prompt(items)}]}],
+        "inferenceConfig": {
+            "maxTokens": 50 + 60 * len(items),
+            "temperature": 0.1
+        }
+    })
+
+    result = invoke_bedrock(request_body)
+    text = result["output"]["message"]["content"][0]["text"]
+    parsed = parse_batch_analysis(text, {interaction_id for interaction_id, _ in items})
+
+    if len(parsed) < len(items):
+        print(f"Batch reply covered {len(parsed)}/{len(items)} transcripts, falling back per record")
+
+    return [
+        parsed[interaction_id] if interaction_id in parsed else classify_transcript(body)
+        for interaction_id, body in items
+    ]
+
+
+def parallel_map(fn, items):
+    if ENRICH_CONCURRENCY <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=ENRICH_CONCURRENCY) as pool:
+        return list(pool.map(fn, items))
+
+
+def enrich_records(records):
+    # returns (score, category) per record in input order plus cache stats;
+    # duplicate bodies in the same file share one lookup and one Bedrock call
+    keys = [cache_key(record["transcript_body"]) for record in records]
+    bodies = {}
+    interaction_ids = {}
+    for key, record in zip(keys, records):
+        bodies.setdefault(key, record["transcript_body"])
+        interaction_ids.setdefault(key, record["interaction_id"])
+
+    unique_keys = list(bodies)
+    cached = dict(zip(unique_keys, parallel_map(cache.get, unique_keys)))
+    missing = [key for key in unique_keys if cached[key] is None]
+    cache_misses = len(missing)
+
+    local = {}
+    for key in missing:
+        score, category, confidence = preclassify(bodies[key])
+        if confidence >= PRECLASSIFY_THRESHOLD:
+            local[key] = (score, category)
+    missing = [key for key in missing if key not in local]
+
+    def infer(batch_keys):
+        analyses = classify_batch([(interaction_ids[key], bodies[key]) for key in batch_keys])
+        for key, analysis in zip(batch_keys, analyses):
+            if analysis is not None:
+                cache.put(key, analysis)
+        return [analysis or FALLBACK_ANALYSIS for analysis in analyses]
+
+    batch_size = max(1, ENRICH_BATCH_SIZE)
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+
+    results = {key: value for key, value in cached.items() if value is not None}
+    results.update(local)
+    for batch_keys, analyses in zip(batches, parallel_map(infer, batches)):
+        results.update(zip(batch_keys, analyses))
+
+    # hits and misses count distinct bodies looked up in the cache, repeats within the chunk are duplicates
+    stats = {
+        "cache_hits": len(unique_keys) - cache_misses,
+        "cache_misses": cache_misses,
+        "duplicates": len(records) - len(unique_keys),
+        "preclassified": len(local),
+        "bedrock_records": len(missing)
+    }
+    return [results[key] for key in keys], stats
+
+
+def load_transcripts(cursor, records, enriched):
+    # stages rows with batched executemany, then upserts them with a single MERGE
+    rows = [
+        (
             record["interaction_id"],
             record.get("account_id"),
             record.get("opportunity_id"),
@@ -105,12 +412,247 @@ def lambda_handler(event, context):
             record["transcript_body"],
             score,
             category
-        ))
-        processed += 1
+        )
+        for record, (score, category) in zip(records, enriched)
+    ]
+
+    cursor.execute(CREATE_STAGE_SQL)
+    for start in range(0, len(rows), LOAD_BATCH_SIZE):
+        cursor.executemany(STAGE_INSERT_SQL, rows[start:start + LOAD_BATCH_SIZE])
+
+    cursor.execute(MERGE_SQL)
+    inserted, updated = cursor.fetchone()[:2]
+    return inserted, updated
+
+
+def iter_lines(body, offset):
+    # yields (line, end_offset) where end_offset is the absolute byte position just past the line
+    pending = b""
+    for chunk in body.iter_chunks(chunk_size=64 * 1024):
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            offset += len(line) + 1
+            yield line, offset
+    if pending:
+        offset += len(pending)
+        yield pending, offset
+
+
+def iter_chunks(lines, size):
+    # groups parsed records into chunks of `size`, each tagged with the byte offset it ends at
+    records = []
+    end_offset = None
+    for line, end_offset in lines:
+        if line.strip():
+            records.append(json.loads(line))
+        if len(records) >= size:
+            yield records, end_offset
+            records = []
+    if records or end_offset is not None:
+        yield records, end_offset
+
+
+def unit_name(unit):
+    # a whole file is identified by its key, a shard planned by list_transcripts by key and byte range
+    if "start" in unit:
+        return f"{unit['key']}@{unit['start']}-{unit['end']}"
+    return unit["key"]
+
+
+def read_checkpoint(bucket, name):
+    try:
+        response = s3.get_object(Bucket=bucket, Key=f"{CHECKPOINT_PREFIX}{name}.json")
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
+    return json.loads(response["Body"].read())
+
+
+def write_checkpoint(bucket, name, etag, offset, records):
+    s3.put_object(
+        Bucket=bucket,
+        Key=f"{CHECKPOINT_PREFIX}{name}.json",
+        Body=json.dumps({"etag": etag, "offset": offset, "records": records}),
+        ContentType="application/json"
+    )
+
+
+def clear_checkpoint(bucket, name):
+    s3.delete_object(Bucket=bucket, Key=f"{CHECKPOINT_PREFIX}{name}.json")
+
+
+def record_completion(unit, etag, records):
+    # marker name must match manifest_marker in list_transcripts
+    size = unit.get("size") if etag == unit.get("etag") else None
+    if size is None:
+        head = s3.head_object(Bucket=unit["bucket"], Key=unit["key"], IfMatch=etag)
+        size = head["ContentLength"]
+
+    etag_hex = etag.strip('"')
+    marker = f"{MANIFEST_PREFIX}{unit['key']}/{etag_hex}_{size}"
+    if "start" in unit:
+        marker += f"_{unit['start']}-{unit['end']}"
+
+    s3.put_object(
+        Bucket=unit["bucket"],
+        Key=marker,
+        Body=json.dumps({"unit": unit_name(unit), "etag": etag, "size": size, "records": records}),
+        ContentType="application/json"
+    )
+
+
+def open_transcripts(unit, checkpoint):
+    # returns (response, offset, etag) for the unit, resuming after the checkpoint when the object is unchanged;
+    # response is None when there is nothing left to read or a shard's object changed after it was planned
+    bucket, key = unit["bucket"], unit["key"]
+    start, end, etag = unit.get("start", 0), unit.get("end"), unit.get("etag")
+
+    offset = start
+    if checkpoint and (etag is None or checkpoint["etag"] == etag):
+        offset, etag = checkpoint["offset"], checkpoint["etag"]
+
+    if end is not None and offset >= end:
+        return None, offset, etag
+
+    request = {"Bucket": bucket, "Key": key}
+    if offset or end is not None:
+        request["Range"] = f"bytes={offset}-{end - 1 if end is not None else ''}"
+    if etag:
+        request["IfMatch"] = etag
+
+    try:
+        response = s3.get_object(**request)
+        return response, offset, response["ETag"]
+    except ClientError as e:
+        code = e.response["Error"]["Code"]
+        if code == "InvalidRange":
+            # the last chunk was committed but the checkpoint was never cleared
+            return None, offset, etag
+        if code not in ("PreconditionFailed", "412"):
+            raise
+
+    if end is not None:
+        print(f"{key} changed after this shard was planned, leaving it for the next listing")
+        return None, offset, None
+
+    print(f"{key} changed since it was listed, reading the current version from the start")
+    response = s3.get_object(Bucket=bucket, Key=key)
+    return response, 0, response["ETag"]
+
+
+def process_unit(event):
+    bucket = event["bucket"]
+    key = event["key"]
+    name = unit_name(event)
+
+    checkpoint = read_checkpoint(bucket, name)
+    response, start_offset, etag = open_transcripts(event, checkpoint)
+    if etag is None:
+        return {"file": key, "unit": name, "records_processed": 0, "skipped": "object changed"}
+
+    processed = checkpoint["records"] if checkpoint and start_offset > event.get("start", 0) else 0
+    if processed:
+        print(f"Resuming {name} at byte {start_offset} after {processed} records")
+
+    totals = {
+        "rows_inserted": 0,
+        "rows_updated": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "duplicates": 0,
+        "preclassified": 0,
+        "bedrock_records": 0
+    }
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if response is not None:
+        lines = iter_lines(response["Body"], start_offset)
+        for records, end_offset in iter_chunks(lines, STREAM_CHUNK_RECORDS):
+            if records:
+                enriched, stats = enrich_records(records)
+                try:
+                    inserted, updated = load_transcripts(cursor, records, enriched)
+                    conn.commit()
+                except DatabaseError:
+                    # the retry resumes from the checkpoint on a fresh session
+                    reset_connection()
+                    raise
+
+                processed += len(records)
+                totals["rows_inserted"] += inserted
+                totals["rows_updated"] += updated
+                for stat, value in stats.items():
+                    totals[stat] += value
+
+            write_checkpoint(bucket, name, etag, end_offset, processed)
+            print(f"Committed {processed} transcripts from {name} through byte {end_offset}")
 
-    conn.commit()
     cursor.close()
-    conn.close()
+    clear_checkpoint(bucket, name)
+    record_completion(event, etag, processed)
+
+    print(f"Merged {processed} enriched transcripts from {name} ({totals['rows_inserted']} inserted, "
+          f"{totals['rows_updated']} updated, {totals['cache_hits']} cache hits, "
+          f"{totals['duplicates']} duplicates, {totals['preclassified']} preclassified locally)")
+    return {
+        "file": key,
+        "unit": name,
+        "records_processed": processed,
+        "resumed_from_byte": start_offset,
+        **totals
+    }
+
 
-    print(f"Inserted {processed} enriched transcripts from {key}")
-    return {"file": key, "records_processed": processed}
\ No newline at end of file
+def notification_units(message_body):
+    # S3 object-created notifications delivered through SQS; the S3 test event has no Records
+    notification = json.loads(message_body)
+    units = []
+    for record in notification.get("Records", []):
+        key = urllib.parse.unquote_plus(record["s3"]["object"]["key"])
+        if not record.get("eventName", "").startswith("ObjectCreated") or not key.endswith(".json"):
+            continue
+        units.append({
+            "bucket": record["s3"]["bucket"]["name"],
+            "key": key,
+            "etag": f'"{record["s3"]["object"]["eTag"]}"',
+            "size": record["s3"]["object"]["size"]
+        })
+    return units
+
+
+def process_notifications(event):
+    # one micro-batch from the SQS event source mapping; files are deduplicated across messages
+    # and a failed file only returns the messages that referenced it to the queue
+    units = {}
+    message_ids = {}
+    for message in event["Records"]:
+        for unit in notification_units(message["body"]):
+            name = (unit["bucket"], unit["key"], unit["etag"])
+            units[name] = unit
+            message_ids.setdefault(name, set()).add(message["messageId"])
+
+    print(f"Micro-batch of {len(event['Records'])} notifications, {len(units)} transcript files")
+
+    results = []
+    failed = set()
+    for name, unit in units.items():
+        try:
+            results.append(process_unit(unit))
+        except Exception as e:
+            print(f"Failed to process {unit['key']}: {e!r}")
+            failed |= message_ids[name]
+
+    return {
+        "files": results,
+        "batchItemFailures": [{"itemIdentifier": message_id} for message_id in sorted(failed)]
+    }
+
+
+def lambda_handler(event, context):
+    if "Records" in event:
+        return process_notifications(event)
+    return process_unit(event)
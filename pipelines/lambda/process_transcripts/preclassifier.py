@@ -0,0 +1,119 @@
+"""Keyword scorer used as a cheap first tier before Bedrock.
+
+It only needs to be right about the obvious cases: anything it is unsure
+about gets a low confidence and is sent to Bedrock as before.
+"""
+import re
+
+# phrase -> weight, positive weights are good news
+SENTIMENT_LEXICON = {
+    "great outcome": 2.0,
+    "fantastic": 2.0,
+    "really happy": 2.0,
+    "love the platform": 1.5,
+    "impressed": 1.5,
+    "excited": 1.5,
+    "very interested": 1.0,
+    "intuitive": 1.0,
+    "smooth": 1.0,
+    "responsive": 1.0,
+    "strong fit": 1.5,
+    "agreed to": 1.5,
+    "move fast": 1.0,
+    "ready to proceed": 1.0,
+    "looking forward": 1.0,
+    "has been great": 1.5,
+    "thank you": 0.5,
+    "thanks for": 0.5,
+    "critical issue": -2.0,
+    "urgently": -2.0,
+    "really frustrating": -2.0,
+    "frustrating": -1.5,
+    "killing us": -2.0,
+    "can't get any work done": -2.0,
+    "blocking our entire team": -2.0,
+    "nothing works": -1.5,
+    "nothing is working": -1.5,
+    "rough experience": -2.0,
+    "can't trust": -1.5,
+    "incredibly slow": -1.5,
+    "stopped syncing": -1.0,
+    "500 error": -1.0,
+    "timeouts": -1.0,
+    "locked out": -1.0,
+    "broke": -1.0,
+    "disappearing": -1.0,
+    "double-counting": -1.0,
+    "inflated": -1.0,
+    "shouldn't be paying": -1.5,
+    "still show as active": -1.0,
+    "doesn't match": -1.0,
+    "don't match": -1.0,
+    "discrepancies": -1.0,
+    "waiting a week": -1.0,
+    "requested this multiple times": -1.0,
+    "needs serious work": -1.5,
+    "confusing": -1.0,
+    "budget got cut": -1.0,
+    "unhappy": -0.5,
+    "concerns": -0.5,
+    "lacking": -1.0,
+    "went dark": -0.5,
+    "tough call": -1.0,
+}
+
+CATEGORY_KEYWORDS = {
+    "billing": ["billing", "invoice", "charged", "a charge for", "downgraded", "pricing we agreed"],
+    "performance": ["timeouts", "slow", "load times", "rate limits", "downtime"],
+    "bugs": ["500 error", "double-counting", "disappearing", "stopped syncing", "page just refreshes"],
+    "feature_request": ["export function only", "we need json", "timeline for this", "more customization"],
+    "onboarding": ["onboarding", "guided setup", "data migration", "greyed out"],
+    "security": ["sso", "locked out", "password", "soc 2", "security certifications"],
+    "data_quality": ["discrepancies", "don't match", "doesn't match", "inflated", "can't trust the data"],
+}
+
+# words that hedge or flip the tone, we lower the confidence instead of trying to parse them
+HEDGES = ["but", "however", "although", "frankly", "before we commit"]
+
+_PATTERNS = {
+    phrase: re.compile(r"(?<![a-z])" + re.escape(phrase) + r"(?![a-z])")
+    for phrase in list(SENTIMENT_LEXICON) + [k for keywords in CATEGORY_KEYWORDS.values() for k in keywords] + HEDGES
+}
+
+
+def _matches(text, phrases):
+    return [phrase for phrase in phrases if _PATTERNS[phrase].search(text)]
+
+
+def preclassify(transcript_body):
+    """Return (sentiment_score, complaint_category, confidence) with confidence in [0, 1]."""
+    text = " ".join(transcript_body.lower().split())
+
+    weights = [SENTIMENT_LEXICON[phrase] for phrase in _matches(text, SENTIMENT_LEXICON)]
+    positive = sum(w for w in weights if w > 0)
+    negative = -sum(w for w in weights if w < 0)
+    evidence = positive + negative
+    net = positive - negative
+
+    score = max(-1.0, min(1.0, net / 3.0))
+    if evidence == 0:
+        sentiment_confidence = 0.0
+    else:
+        # one-sided evidence of at least 2 is as sure as we get, mixed evidence drags it down
+        sentiment_confidence = (abs(net) / evidence) * min(1.0, evidence / 2.0)
+
+    if _matches(text, HEDGES):
+        sentiment_confidence *= 0.6
+
+    categories = [c for c, keywords in CATEGORY_KEYWORDS.items() if _matches(text, keywords)]
+    if not categories:
+        category, category_confidence = "general", 1.0 if net > 0 else 0.5
+    elif net > 0:
+        # a happy message that mentions billing or onboarding is usually still "general"
+        category, category_confidence = categories[0], 0.5
+    elif len(categories) == 1:
+        category, category_confidence = categories[0], 1.0
+    else:
+        category, category_confidence = categories[0], 0.3
+
+    return round(score, 2), category, round(min(sentiment_confidence, category_confidence), 3)
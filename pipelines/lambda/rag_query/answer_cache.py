@@ -0,0 +1,97 @@
+"""Answer cache for rag_query, per warm container.
+
+Answers are keyed on the question's token set plus the data version (the ETag of
+the dbt marker), so a dbt rebuild of ACCOUNT_HEALTH_SCORE makes every cached
+answer unreachable. Entries are evicted least recently used first and expire
+after a TTL.
+
+With a similarity threshold set, a miss falls back to the most similar cached
+question of the same version by Jaccard similarity of token sets, so rephrasings
+like "why are accounts churning" / "why are our accounts churning?" share an
+answer. Tokens containing digits (account ids, scores, counts) must match
+exactly, so two recommendation prompts for different accounts never do.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from context_builder import tokenize
+
+# words that change a question's phrasing but not what it asks, on top of the BM25 stopwords
+CACHE_STOPWORDS = {"have", "has", "had", "among", "across", "currently", "right", "now", "please", "can", "could"}
+
+
+def stem(token):
+    # crude suffix stripping so churned / churning / churn and industries / industry match
+    if any(c.isdigit() for c in token) or len(token) <= 4:
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    for suffix in ("ing", "ed", "es", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+
+def question_tokens(question):
+    return frozenset(stem(t) for t in tokenize(question) if t not in CACHE_STOPWORDS)
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def identifiers(tokens):
+    return frozenset(t for t in tokens if any(c.isdigit() for c in t))
+
+
+class AnswerCache:
+    def __init__(self, max_items=128, ttl_seconds=3600, similarity=0.8):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _key(self, question, version):
+        return version, " ".join(sorted(question_tokens(question)))
+
+    def get(self, question, version):
+        """Return (answer, match) where match is "exact", "similar" or None on a miss."""
+        key = self._key(question, version)
+        now = time.time()
+        with self.lock:
+            for stale in [k for k, (_, stored_at) in self.entries.items() if now - stored_at > self.ttl_seconds]:
+                del self.entries[stale]
+
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0], "exact"
+
+            if not self.similarity:
+                return None, None
+            tokens = question_tokens(question)
+            best, best_score = None, 0.0
+            for other in self.entries:
+                if other[0] != version:
+                    continue
+                other_tokens = frozenset(other[1].split())
+                if identifiers(other_tokens) != identifiers(tokens):
+                    continue
+                score = jaccard(tokens, other_tokens)
+                if score >= self.similarity and score > best_score:
+                    best, best_score = other, score
+            if best is None:
+                return None, None
+            self.entries.move_to_end(best)
+            return self.entries[best][0], "similar"
+
+    def put(self, question, version, answer):
+        key = self._key(question, version)
+        with self.lock:
+            self.entries[key] = (answer, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
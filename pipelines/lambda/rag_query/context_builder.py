@@ -0,0 +1,196 @@
+"""Bounded prompt context for rag_query.
+
+Instead of the whole ACCOUNT_HEALTH_SCORE table, each prompt gets:
+
+- a statistical digest of the portfolio (tier, industry, churn and complaint
+  breakdowns, percentiles of the key signals), whose size depends on the number
+  of categories, not the number of accounts
+- the accounts and transcript excerpts most relevant to the question, pulled
+  from a BM25 index over one short fact line per account / transcript
+
+Both are capped by count and characters, so the prompt stays the same size as
+the portfolio grows.
+"""
+import math
+import re
+from collections import Counter
+
+MAX_ACCOUNT_FACTS = 15
+MAX_TRANSCRIPT_FACTS = 8
+MAX_CONTEXT_CHARS = 12000
+EXCERPT_CHARS = 300
+
+PERCENTILES = [10, 25, 50, 75, 90]
+DIGEST_SIGNALS = [
+    ("HEALTH_SCORE", "health score"),
+    ("AVG_SENTIMENT", "avg sentiment"),
+    ("SUPPORT_TICKET_COUNT", "support tickets"),
+    ("DAYS_SINCE_LAST_ACTIVE", "days since last active"),
+    ("ERROR_RATE", "error rate"),
+    ("FEATURES_ADOPTED", "features adopted"),
+    ("TOTAL_SESSIONS", "sessions")
+]
+
+# account ids like ACC-0042 stay one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how", "i", "in", "is",
+    "it", "me", "of", "on", "or", "our", "that", "the", "their", "there", "this", "to", "was", "we",
+    "what", "when", "which", "who", "why", "with", "you", "give", "tell", "show", "any", "about"
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def risk_tier(account):
+    if account.get("IS_CHURNED"):
+        return "churned"
+    score = float(account.get("HEALTH_SCORE") or 0)
+    if score >= 65:
+        return "healthy"
+    if score >= 40:
+        return "at_risk"
+    return "critical"
+
+
+def percentile(sorted_values, p):
+    # nearest-rank on a sorted list
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def fmt(value):
+    if value is None:
+        return "n/a"
+    value = float(value)
+    return f"{value:.0f}" if value == int(value) and abs(value) >= 1 else f"{value:.2f}"
+
+
+def build_digest(accounts):
+    total = len(accounts)
+    if not total:
+        return "No accounts."
+
+    tiers = Counter(risk_tier(a) for a in accounts)
+    lines = [f"Accounts: {total}. Risk tiers: " + ", ".join(
+        f"{tier} {tiers[tier]} ({tiers[tier] / total:.0%})" for tier in ("healthy", "at_risk", "critical", "churned"))]
+
+    plans = Counter(a.get("TIER") for a in accounts)
+    lines.append("Plan tiers: " + ", ".join(f"{plan} {count}" for plan, count in plans.most_common()))
+
+    by_industry = {}
+    for a in accounts:
+        by_industry.setdefault(a.get("INDUSTRY") or "unknown", []).append(a)
+    lines.append("By industry (accounts, churn rate, avg health, avg sentiment):")
+    for industry, group in sorted(by_industry.items(), key=lambda item: -len(item[1])):
+        churn = sum(1 for a in group if a.get("IS_CHURNED")) / len(group)
+        health = sum(float(a.get("HEALTH_SCORE") or 0) for a in group) / len(group)
+        sentiment = sum(float(a.get("AVG_SENTIMENT") or 0) for a in group) / len(group)
+        lines.append(f"- {industry}: {len(group)}, {churn:.0%} churned, health {health:.1f}, sentiment {sentiment:.2f}")
+
+    complaints = {}
+    for a in accounts:
+        complaints.setdefault(a.get("TOP_COMPLAINT_CATEGORY") or "none", []).append(a)
+    lines.append("Top complaint category (accounts, churn rate, avg health):")
+    for category, group in sorted(complaints.items(), key=lambda item: -len(item[1])):
+        churn = sum(1 for a in group if a.get("IS_CHURNED")) / len(group)
+        health = sum(float(a.get("HEALTH_SCORE") or 0) for a in group) / len(group)
+        lines.append(f"- {category}: {len(group)}, {churn:.0%} churned, health {health:.1f}")
+
+    lines.append("Percentiles " + "/".join(f"p{p}" for p in PERCENTILES) + ":")
+    for column, label in DIGEST_SIGNALS:
+        values = sorted(float(a[column]) for a in accounts if a.get(column) is not None)
+        if values:
+            lines.append(f"- {label}: " + " / ".join(fmt(percentile(values, p)) for p in PERCENTILES))
+
+    churned = [a for a in accounts if a.get("IS_CHURNED")]
+    active = [a for a in accounts if not a.get("IS_CHURNED")]
+    if churned and active:
+        lines.append("Churned vs active averages:")
+        for column, label in DIGEST_SIGNALS[1:5]:
+            c = sum(float(a.get(column) or 0) for a in churned) / len(churned)
+            r = sum(float(a.get(column) or 0) for a in active) / len(active)
+            lines.append(f"- {label}: churned {fmt(c)}, active {fmt(r)}")
+
+    return "\n".join(lines)
+
+
+def account_fact(a):
+    return (f"{a['ACCOUNT_ID']} | {a.get('INDUSTRY')} | {a.get('TIER')} plan | {risk_tier(a).replace('_', ' ')} | "
+            f"{'churned' if a.get('IS_CHURNED') else 'active'} | health {fmt(a.get('HEALTH_SCORE'))} | "
+            f"sentiment {fmt(a.get('AVG_SENTIMENT'))} | {fmt(a.get('SUPPORT_TICKET_COUNT'))} tickets | "
+            f"{fmt(a.get('DAYS_SINCE_LAST_ACTIVE'))} days inactive | error rate {fmt(a.get('ERROR_RATE'))} | "
+            f"{fmt(a.get('FEATURES_ADOPTED'))} features | top complaint {a.get('TOP_COMPLAINT_CATEGORY') or 'none'}")
+
+
+def transcript_fact(t, industries):
+    body = " ".join((t.get("TRANSCRIPT_BODY") or "").split())[:EXCERPT_CHARS]
+    return (f"{t['ACCOUNT_ID']} ({industries.get(t['ACCOUNT_ID'], 'unknown')}) | {t.get('INTERACTION_TYPE')} | "
+            f"{t.get('TIMESTAMP')} | sentiment {fmt(t.get('SENTIMENT_SCORE'))} | "
+            f"{t.get('COMPLAINT_CATEGORY') or 'general'} | {body}")
+
+
+class BM25Index:
+    """Okapi BM25 over short documents, built once per container and data refresh."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.lengths = []
+        for i, doc in enumerate(documents):
+            counts = Counter(tokenize(doc))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for term, p in self.postings.items()}
+
+    def search(self, query, k):
+        # templated transcripts repeat verbatim, identical documents are returned once
+        scores = {}
+        for term in set(tokenize(query)):
+            for i, tf in self.postings.get(term, []):
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length)
+                scores[i] = scores.get(i, 0.0) + self.idf[term] * tf * (self.k1 + 1) / norm
+        results = []
+        for i, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0])):
+            if self.documents[i] not in results:
+                results.append(self.documents[i])
+                if len(results) == k:
+                    break
+        return results
+
+
+class PortfolioContext:
+    """Digest plus retrieval indexes for one snapshot of the data."""
+
+    def __init__(self, accounts, transcripts):
+        self.digest = build_digest(accounts)
+        industries = {a["ACCOUNT_ID"]: a.get("INDUSTRY") for a in accounts}
+        self.account_index = BM25Index([account_fact(a) for a in accounts])
+        self.transcript_index = BM25Index([transcript_fact(t, industries) for t in transcripts])
+
+    def build(self, question):
+        accounts = self.account_index.search(question, MAX_ACCOUNT_FACTS)
+        transcripts = self.transcript_index.search(question, MAX_TRANSCRIPT_FACTS)
+
+        sections = [("PORTFOLIO DIGEST", self.digest)]
+        budget = MAX_CONTEXT_CHARS - len(self.digest)
+        for title, facts in (("RELEVANT ACCOUNTS", accounts), ("RELEVANT TRANSCRIPT EXCERPTS", transcripts)):
+            kept = []
+            for fact in facts:
+                if len(fact) + 1 > budget:
+                    break
+                kept.append(fact)
+                budget -= len(fact) + 1
+            if kept:
+                sections.append((title, "\n".join(kept)))
+
+        return "\n\n".join(f"{title}:\n{body}" for title, body in sections)
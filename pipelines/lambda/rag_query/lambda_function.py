@@ -1,66 +1,86 @@
 import json
 import os
+import time
 import boto3
-import snowflake.connector
+from snowflake_session import execute
+from data_version import get_data_version
+from answer_cache import AnswerCache
+from context_builder import EXCERPT_CHARS, PortfolioContext
 
-sm = boto3.client("secretsmanager", region_name="us-east-1")
 bedrock = boto3.client("bedrock-runtime", region_name="us-east-1")
 
 MODEL_ID = "amazon.nova-micro-v1:0"
 
+# digest and indexes are rebuilt when the data version changes, and at least this often
+CONTEXT_TTL_SECONDS = int(os.environ.get("CONTEXT_TTL_SECONDS", "300"))
+# newest transcripts indexed for retrieval, bodies cut to EXCERPT_CHARS in Snowflake
+RAG_MAX_TRANSCRIPTS = int(os.environ.get("RAG_MAX_TRANSCRIPTS", "2000"))
 
-def get_snowflake_conn():
-    secret = json.loads(
-        sm.get_secret_value(SecretId=os.environ["SECRET_NAME"])["SecretString"]
-    )
-    return snowflake.connector.connect(
-        user=secret["username"],
-        password=secret["password"],
-        account=secret["account"],
-        warehouse="VANTAGEPOINT_WH",
-        database="VANTAGEPOINT_PROD",
-        schema="B2BSAAS"
-    )
+# answers per data version; similarity 0 turns off near-duplicate matching
+RAG_CACHE_ITEMS = int(os.environ.get("RAG_CACHE_ITEMS", "128"))
+RAG_CACHE_TTL_SECONDS = int(os.environ.get("RAG_CACHE_TTL_SECONDS", "3600"))
+RAG_CACHE_SIMILARITY = float(os.environ.get("RAG_CACHE_SIMILARITY", "0.8"))
 
+_context = None
+_context_version = None
+_context_built_at = 0.0
+_answers = AnswerCache(RAG_CACHE_ITEMS, RAG_CACHE_TTL_SECONDS, RAG_CACHE_SIMILARITY)
+
+
+def fetch_rows(sql, params=None):
+    cursor = execute(sql, params)
+    columns = [desc[0] for desc in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    cursor.close()
+    return rows
 
-def fetch_context():
-    conn = get_snowflake_conn()
-    cursor = conn.cursor()
 
-    cursor.execute("""
+def fetch_context():
+    accounts = fetch_rows("""
         SELECT account_id, industry, tier, health_score, is_churned,
                total_sessions, features_adopted, error_rate, days_since_last_active,
                avg_sentiment, support_ticket_count, top_complaint_category
         FROM ACCOUNT_HEALTH_SCORE
         ORDER BY health_score ASC
     """)
-    columns = [desc[0] for desc in cursor.description]
-    rows = cursor.fetchall()
+    transcripts = fetch_rows(f"""
+        SELECT account_id, interaction_type, timestamp, sentiment_score, complaint_category,
+               LEFT(transcript_body, {EXCERPT_CHARS}) AS transcript_body
+        FROM INTERACTION_TRANSCRIPTS
+        ORDER BY timestamp DESC NULLS LAST
+        LIMIT {RAG_MAX_TRANSCRIPTS}
+    """)
+    return accounts, transcripts
 
-    accounts = []
-    for row in rows:
-        accounts.append(dict(zip(columns, row)))
 
-    cursor.close()
-    conn.close()
-    return accounts
+def get_context(version=None):
+    global _context, _context_version, _context_built_at
+    if (_context is None or version != _context_version
+            or time.time() - _context_built_at > CONTEXT_TTL_SECONDS):
+        start = time.time()
+        accounts, transcripts = fetch_context()
+        _context = PortfolioContext(accounts, transcripts)
+        _context_version = version
+        _context_built_at = time.time()
+        print(f"Built context for {len(accounts)} accounts, {len(transcripts)} transcripts "
+              f"in {(_context_built_at - start) * 1000:.0f} ms")
+    return _context
 
 
-def build_prompt(question, accounts):
-    summary = json.dumps(accounts, default=str, indent=2)
-
+def build_prompt(question, context):
     return f"""You are an analytics assistant for VantagePoint, a B2B SaaS platform.
-Below is the customer health data for all accounts, including health scores (0-100),
-usage metrics, sentiment scores, and complaint categories.
+Below is a statistical digest of all accounts, followed by the accounts and transcript
+excerpts most relevant to the question. Health scores are 0-100 and sentiment is -1 to +1.
 
 Health Score Tiers: 65+ = healthy, 40-64 = at_risk, below 40 = critical.
 
 CUSTOMER DATA:
-{summary}
+{context}
 
 INSTRUCTIONS:
 - Answer in a warm, conversational tone as if briefing a VP of Customer Success.
 - Summarize patterns, trends, and percentages. Do NOT list individual account IDs.
+- Base portfolio-wide figures on the digest; the relevant accounts are a sample, not the whole portfolio.
 - Use specific numbers (e.g. "62% of churned accounts", "average sentiment of -0.7").
 - Keep responses to 3-5 sentences. Be insightful, not just descriptive.
 - If relevant, suggest a recommended action or area to investigate further.
@@ -68,6 +88,52 @@ INSTRUCTIONS:
 QUESTION: {question}"""
 
 
+def model_request(question, version=None):
+    prompt = build_prompt(question, get_context(version).build(question))
+    return json.dumps({
+        "messages": [{"role": "user", "content": [{"text": prompt}]}],
+        "inferenceConfig": {"maxTokens": 1024, "temperature": 0.3}
+    })
+
+
+def cached_answer(question, version):
+    # nothing is cached until a dbt marker exists, there would be no way to invalidate it
+    if version is None:
+        return None
+    answer, match = _answers.get(question, version)
+    if answer is not None:
+        print(f"Answer cache hit ({match}) for data version {version}")
+    return answer
+
+
+def stream_answer(question):
+    # yields text as Bedrock generates it, used by stream_server.py behind the function URL
+    version = get_data_version()
+    answer = cached_answer(question, version)
+    if answer is not None:
+        yield answer
+        return
+
+    response = bedrock.invoke_model_with_response_stream(
+        modelId=MODEL_ID,
+        contentType="application/json",
+        accept="application/json",
+        body=model_request(question, version)
+    )
+    parts = []
+    for event in response["body"]:
+        chunk = event.get("chunk")
+        if not chunk:
+            continue
+        payload = json.loads(chunk["bytes"])
+        text = payload.get("contentBlockDelta", {}).get("delta", {}).get("text")
+        if text:
+            parts.append(text)
+            yield text
+    if version is not None and parts:
+        _answers.put(question, version, "".join(parts))
+
+
 def lambda_handler(event, context):
     body = json.loads(event.get("body", "{}"))
     question = body.get("query")
@@ -79,24 +145,25 @@ def lambda_handler(event, context):
             "body": json.dumps({"error": "Missing query"})
         }
 
-    accounts = fetch_context()
-    prompt = build_prompt(question, accounts)
+    version = get_data_version()
+    answer = cached_answer(question, version)
+    cached = answer is not None
 
-    response = bedrock.invoke_model(
-        modelId=MODEL_ID,
-        contentType="application/json",
-        accept="application/json",
-        body=json.dumps({
-            "messages": [{"role": "user", "content": [{"text": prompt}]}],
-            "inferenceConfig": {"maxTokens": 1024, "temperature": 0.3}
-        })
-    )
+    if not cached:
+        response = bedrock.invoke_model(
+            modelId=MODEL_ID,
+            contentType="application/json",
+            accept="application/json",
+            body=model_request(question, version)
+        )
 
-    result = json.loads(response["body"].read())
-    answer = result["output"]["message"]["content"][0]["text"]
+        result = json.loads(response["body"].read())
+        answer = result["output"]["message"]["content"][0]["text"]
+        if version is not None:
+            _answers.put(question, version, answer)
 
     return {
         "statusCode": 200,
         "headers": {"Content-Type": "application/json", "Access-Control-Allow-Origin": "*"},
-        "body": json.dumps({"answer": answer})
-    }
\ No newline at end of file
+        "body": json.dumps({"answer": answer, "cached": cached})
+    }
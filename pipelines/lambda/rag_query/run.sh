@@ -0,0 +1,3 @@
+#!/bin/sh
+# entrypoint for the streaming function, started by the Lambda Web Adapter
+PYTHONPATH=/opt/python:$LAMBDA_TASK_ROOT exec python3 stream_server.py
@@ -0,0 +1,112 @@
+"""Streaming front end for rag_query, run by the Lambda Web Adapter.
+
+Python Lambdas can't stream a handler's return value, so the streaming function
+runs this server (see run.sh) and the Lambda Web Adapter forwards its chunked
+response through a function URL with invoke mode RESPONSE_STREAM. Text is
+written as Bedrock generates it, so the first words show up after the first
+model tokens instead of after the whole answer.
+
+Function URLs have no Cognito authorizer, so the ID token in the Authorization
+header is verified here against the user pool's JWKS.
+"""
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+
+import lambda_function as rag
+
+PORT = int(os.environ.get("PORT", "8080"))
+COGNITO_ISSUER = os.environ.get("COGNITO_ISSUER", "")
+COGNITO_CLIENT_ID = os.environ.get("COGNITO_CLIENT_ID", "")
+
+_jwks = None
+
+
+def verify_token(token):
+    global _jwks
+    if _jwks is None:
+        # keys are cached by the client for the life of the container
+        _jwks = jwt.PyJWKClient(f"{COGNITO_ISSUER}/.well-known/jwks.json")
+    key = _jwks.get_signing_key_from_jwt(token).key
+    claims = jwt.decode(token, key, algorithms=["RS256"], audience=COGNITO_CLIENT_ID, issuer=COGNITO_ISSUER)
+    if claims.get("token_use") != "id":
+        raise jwt.InvalidTokenError("Expected an ID token")
+    return claims
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        # readiness check for the web adapter
+        if self.path == "/healthz":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        token = self.headers.get("Authorization", "")
+        if token.lower().startswith("bearer "):
+            token = token[len("bearer "):]
+        try:
+            verify_token(token)
+        except jwt.PyJWTError as e:
+            print(f"Rejected token: {e}")
+            self.send_json(401, {"error": "Unauthorized"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            question = json.loads(self.rfile.read(length) or b"{}").get("query")
+        except ValueError:
+            question = None
+        if not question:
+            self.send_json(400, {"error": "Missing query"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        start = time.time()
+        first_token_ms = None
+        try:
+            for text in rag.stream_answer(question):
+                if first_token_ms is None:
+                    first_token_ms = (time.time() - start) * 1000
+                self.write_chunk(text.encode("utf-8"))
+        except Exception as e:
+            # headers are already sent, the client sees a truncated answer
+            print(f"Stream failed: {e}")
+        self.write_chunk(b"")
+        print(f"Streamed answer: first token {first_token_ms or 0:.0f} ms, total {(time.time() - start) * 1000:.0f} ms")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=PORT):
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    print(f"rag_query stream server listening on {port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve()
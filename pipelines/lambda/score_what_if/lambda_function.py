@@ -0,0 +1,105 @@
+import json
+import os
+import time
+from collections import Counter
+from snowflake_session import execute
+from data_version import get_data_version
+from health_score import INPUTS, Portfolio, what_if
+
+# the portfolio is reloaded when the data version changes, and at least this often
+PORTFOLIO_TTL_SECONDS = int(os.environ.get("PORTFOLIO_TTL_SECONDS", "300"))
+WHAT_IF_MAX_ACCOUNTS = int(os.environ.get("WHAT_IF_MAX_ACCOUNTS", "100"))
+
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+
+PORTFOLIO_SQL = f"""
+    SELECT account_id, health_score, is_churned, {", ".join(INPUTS)}
+    FROM ACCOUNT_HEALTH_SCORE
+    ORDER BY account_id
+"""
+
+_portfolio = None
+_portfolio_version = None
+_portfolio_loaded_at = 0.0
+
+
+def fetch_rows():
+    cursor = execute(PORTFOLIO_SQL)
+    columns = [desc[0].lower() for desc in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    cursor.close()
+    return rows
+
+
+def get_portfolio(version=None):
+    global _portfolio, _portfolio_version, _portfolio_loaded_at
+    if (_portfolio is None or version != _portfolio_version
+            or time.time() - _portfolio_loaded_at > PORTFOLIO_TTL_SECONDS):
+        start = time.time()
+        rows = fetch_rows()
+        _portfolio = Portfolio.from_rows(rows)
+        _portfolio_version = version
+        _portfolio_loaded_at = time.time()
+        print(f"Loaded {len(rows)} accounts in {(_portfolio_loaded_at - start) * 1000:.0f} ms")
+
+        # the engine's default scores should be the mart's, a mismatch means the formulas drifted apart
+        stored = [float(r["health_score"]) for r in rows if r["health_score"] is not None]
+        if len(stored) == len(rows):
+            drifted = int((what_if(_portfolio)["baseline"] != stored).sum())
+            if drifted:
+                print(f"WARNING: {drifted} accounts score differently than ACCOUNT_HEALTH_SCORE")
+    return _portfolio
+
+
+def response(status, body):
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": "application/json", **CORS_HEADERS},
+        "body": json.dumps(body)
+    }
+
+
+def lambda_handler(event, context):
+    try:
+        body = json.loads(event.get("body") or "{}")
+        limit = min(int(body.get("limit", WHAT_IF_MAX_ACCOUNTS)), WHAT_IF_MAX_ACCOUNTS)
+    except (ValueError, TypeError):
+        return response(400, {"error": "Body must be JSON with a numeric limit"})
+    weights = body.get("weights") or {}
+    overrides = body.get("overrides") or {}
+
+    if not isinstance(weights, dict) or not isinstance(overrides, dict):
+        return response(400, {"error": "weights and overrides must be objects"})
+
+    portfolio = get_portfolio(get_data_version())
+    start = time.perf_counter()
+    try:
+        result = what_if(portfolio, weights, overrides)
+    except (ValueError, TypeError) as e:
+        return response(400, {"error": str(e)})
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    # accounts whose score moved, biggest change first
+    changed = [i for i in (-abs(result["delta"])).argsort(kind="stable") if result["delta"][i] != 0]
+    accounts = [{
+        "account_id": result["account_ids"][i],
+        "baseline": float(result["baseline"][i]),
+        "score": float(result["scores"][i]),
+        "delta": float(result["delta"][i]),
+        "baseline_tier": result["baseline_tiers"][i],
+        "tier": result["tiers"][i]
+    } for i in changed[:limit]]
+
+    print(f"What-if over {len(portfolio)} accounts in {elapsed_ms:.2f} ms, {len(changed)} changed")
+    return response(200, {
+        "accounts": accounts,
+        "summary": {
+            "accounts": len(portfolio),
+            "changed": len(changed),
+            "avg_baseline": round(float(result["baseline"].mean()), 2) if len(portfolio) else None,
+            "avg_score": round(float(result["scores"].mean()), 2) if len(portfolio) else None,
+            "baseline_tiers": dict(Counter(result["baseline_tiers"].tolist())),
+            "tiers": dict(Counter(result["tiers"].tolist()))
+        },
+        "elapsed_ms": round(elapsed_ms, 2)
+    })
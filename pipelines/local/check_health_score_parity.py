@@ -0,0 +1,216 @@
+"""Check that health_score.py scores every account exactly like account_health_score.sql.
+
+Offline (the default), a generated dataset is loaded into DuckDB and the
+intermediate metrics are aggregated in SQL. The mart's own health_score
+expression is then read from account_health_score.sql, with the recency_points
+macro expanded, and evaluated by DuckDB. Sentiment and complaint categories come
+from the process_transcripts preclassifier, standing in for Bedrock.
+health_score.py scores the same inputs, and every account has to match.
+
+    python data-generation/generate.py --scale 10 --out /tmp/vp
+    python pipelines/local/check_health_score_parity.py --data-dir /tmp/vp
+
+Without --data-dir the dataset is generated into a temporary directory at
+--scale. --snowflake compares against the live ACCOUNT_HEALTH_SCORE instead,
+which needs SECRET_NAME and the layer's dependencies. Exits 1 on any mismatch.
+Needs numpy and duckdb.
+
+The offline check proves that the engine matches the mart's expression
+evaluated in double precision. The mart casts every division to double, so
+Snowflake does the same arithmetic instead of NUMBER division at scale 6.
+Only --snowflake covers Snowflake's own ROUND on the live table, so run it
+after a formula change is deployed.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+LAMBDA_DIR = os.path.join(ROOT, "pipelines", "lambda")
+DBT_DIR = os.path.join(ROOT, "dbt", "vantagepoint")
+
+sys.path.insert(0, os.path.join(LAMBDA_DIR, "layer"))
+sys.path.insert(0, os.path.join(LAMBDA_DIR, "process_transcripts"))
+
+from health_score import INPUTS, Portfolio, score, what_if  # noqa: E402
+from preclassifier import preclassify  # noqa: E402
+
+# intermediate metrics the mart reads, same aggregates as the dbt models
+USAGE_METRICS_SQL = """
+    CREATE TABLE int_usage_metrics AS
+    SELECT
+        account_id,
+        count(DISTINCT session_id) AS total_sessions,
+        count(DISTINCT feature_used) AS features_adopted,
+        round(
+            sum(CASE WHEN error_codes_encountered IS NOT NULL THEN 1 ELSE 0 END)::double
+            / nullif(count(*), 0), 4
+        ) AS error_rate,
+        date_diff('day', max(timestamp)::date, DATE '{as_of}') AS days_since_last_active
+    FROM usage_logs
+    GROUP BY account_id
+"""
+
+TRANSCRIPT_METRICS_SQL = """
+    CREATE TABLE int_transcript_metrics AS
+    SELECT
+        account_id,
+        round(avg(sentiment_score), 3) AS avg_sentiment,
+        sum(CASE WHEN interaction_type = 'support_ticket' THEN 1 ELSE 0 END) AS support_ticket_count
+    FROM transcripts
+    WHERE account_id IS NOT NULL
+    GROUP BY account_id
+"""
+
+MART_SQL = """
+    SELECT
+        a.account_id,
+        coalesce(u.total_sessions, 0) AS total_sessions,
+        coalesce(u.features_adopted, 0) AS features_adopted,
+        coalesce(u.error_rate, 0) AS error_rate,
+        coalesce(u.days_since_last_active, 999) AS days_since_last_active,
+        coalesce(t.avg_sentiment, 0) AS avg_sentiment,
+        coalesce(t.support_ticket_count, 0) AS support_ticket_count,
+        {score} AS health_score
+    FROM accounts a
+    LEFT JOIN int_usage_metrics u ON a.account_id = u.account_id
+    LEFT JOIN int_transcript_metrics t ON a.account_id = t.account_id
+    ORDER BY a.account_id
+"""
+
+
+def mart_score_sql():
+    # the health_score expression exactly as the mart has it, with recency_points expanded
+    with open(os.path.join(DBT_DIR, "models", "marts", "account_health_score.sql")) as f:
+        mart = f.read()
+    with open(os.path.join(DBT_DIR, "macros", "recency_points.sql")) as f:
+        macro = re.search(r"\{% macro recency_points\((\w+)\) %\}(.*?)\{% endmacro %\}", f.read(), re.S)
+    expression = re.search(r"(round\(\s*\(least.*?, 1\)) as health_score", mart, re.S).group(1)
+    parameter, body = macro.group(1), macro.group(2)
+    return re.sub(r"\{\{ recency_points\('(.*?)'\) \}\}",
+                  lambda m: body.replace("{{ " + parameter + " }}", m.group(1)).strip(), expression)
+
+
+def events_sql(data_dir, dataset):
+    # generate.py writes either JSON lines or Parquet in the year=/month= layout
+    pattern = os.path.join(data_dir, dataset, "year=*", "month=*")
+    if glob.glob(os.path.join(pattern, "*.parquet")):
+        return f"SELECT * FROM read_parquet('{pattern}/*.parquet')"
+    return f"SELECT * FROM read_json_auto('{pattern}/*.json', format = 'newline_delimited', union_by_name = true)"
+
+
+def load_dataset(con, data_dir):
+    con.execute(f"CREATE TABLE accounts AS SELECT account_id FROM read_csv_auto('{data_dir}/crm/accounts.csv')")
+    con.execute(f"""
+        CREATE TABLE usage_logs AS
+        SELECT session_id, account_id, feature_used, error_codes_encountered, timestamp::timestamp AS timestamp
+        FROM ({events_sql(data_dir, 'usage_logs')})
+    """)
+
+    # the preclassifier stands in for the Bedrock enrichment of process_transcripts
+    con.execute("CREATE TABLE transcripts (account_id VARCHAR, interaction_type VARCHAR, "
+                "sentiment_score DOUBLE, complaint_category VARCHAR)")
+    rows = con.execute(f"""
+        SELECT account_id, interaction_type, transcript_body
+        FROM ({events_sql(data_dir, 'transcripts')})
+        WHERE account_id IS NOT NULL
+    """).fetchall()
+    enriched = []
+    for account_id, interaction_type, body in rows:
+        sentiment, category, _ = preclassify(body)
+        enriched.append((account_id, interaction_type, sentiment, category))
+    con.executemany("INSERT INTO transcripts VALUES (?, ?, ?, ?)", enriched)
+
+
+def duckdb_rows(data_dir, as_of):
+    import duckdb
+    con = duckdb.connect()
+    load_dataset(con, data_dir)
+    con.execute(USAGE_METRICS_SQL.format(as_of=as_of))
+    con.execute(TRANSCRIPT_METRICS_SQL)
+    cursor = con.execute(MART_SQL.format(score=mart_score_sql()))
+    columns = [desc[0].lower() for desc in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def snowflake_rows():
+    from snowflake_session import execute
+    cursor = execute(f"SELECT account_id, health_score, {', '.join(INPUTS)} FROM ACCOUNT_HEALTH_SCORE")
+    columns = [desc[0].lower() for desc in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    cursor.close()
+    return rows
+
+
+def time_rescoring(portfolio, accounts, repeat=5):
+    # the portfolio tiled up to `accounts` rows, best of `repeat` what-if runs
+    reps = -(-accounts // len(portfolio))
+    big = Portfolio(np.tile(portfolio.account_ids, reps)[:accounts],
+                    {name: np.tile(values, reps)[:accounts] for name, values in portfolio.columns.items()})
+    weights = {"sentiment": 30, "support_tickets": 10}
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        what_if(big, weights)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", help="output of data-generation/generate.py, generated at --scale when omitted")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--as-of", default="2025-01-01",
+                        help="date days_since_last_active counts to, the day after the generated activity ends")
+    parser.add_argument("--snowflake", action="store_true", help="compare against the live ACCOUNT_HEALTH_SCORE")
+    parser.add_argument("--timing-accounts", type=int, default=1000000,
+                        help="portfolio size for the what-if timing, 0 to skip")
+    args = parser.parse_args()
+
+    if args.snowflake:
+        rows = snowflake_rows()
+        source = "ACCOUNT_HEALTH_SCORE"
+    else:
+        data_dir = args.data_dir
+        if not data_dir:
+            data_dir = tempfile.mkdtemp(prefix="vp-parity-")
+            subprocess.run([sys.executable, os.path.join(ROOT, "data-generation", "generate.py"),
+                            "--scale", str(args.scale), "--out", data_dir,
+                            "--datasets", "accounts,usage_logs,transcripts"],
+                           check=True, stdout=subprocess.DEVNULL, cwd=os.path.join(ROOT, "data-generation"))
+        rows = duckdb_rows(data_dir, args.as_of)
+        source = f"account_health_score.sql in DuckDB over {data_dir}"
+
+    portfolio = Portfolio.from_rows(rows)
+    expected = np.array([float(r["health_score"]) for r in rows])
+    actual = score(portfolio)
+    mismatched = np.nonzero(actual != expected)[0]
+
+    print(f"{len(rows)} accounts scored by {source}")
+    print(f"score range {expected.min():.1f} to {expected.max():.1f}, "
+          f"{len(np.unique(expected))} distinct scores")
+    for i in mismatched[:20]:
+        inputs = {name: rows[i][name] for name in INPUTS}
+        print(f"  MISMATCH {rows[i]['account_id']}: sql {expected[i]} engine {actual[i]} {json.dumps(inputs, default=str)}")
+
+    if args.timing_accounts:
+        print(f"what-if rescoring of {args.timing_accounts:,} accounts: "
+              f"{time_rescoring(portfolio, args.timing_accounts):.1f} ms")
+
+    if len(mismatched):
+        print(f"FAILED: {len(mismatched)} of {len(rows)} accounts differ")
+        sys.exit(1)
+    print("OK: every account matches")
+
+
+if __name__ == "__main__":
+    main()
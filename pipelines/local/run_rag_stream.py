@@ -0,0 +1,108 @@
+"""Run the rag_query stream server locally against a stub Bedrock stream.
+
+Snowflake is replaced by a small synthetic portfolio and Bedrock by FakeBedrock,
+whose delays stand in for model latency. Token checks are skipped. By default the
+script asks one question both ways and prints time to first byte for the
+streamed answer next to the buffered lambda_handler call:
+
+    python pipelines/local/run_rag_stream.py --first-token-delay 0.5 --token-delay 0.02
+
+--serve keeps the server up for the frontend (VITE_RAG_STREAM_URL=http://localhost:8080).
+Needs boto3 and PyJWT installed, as in the Lambda layer.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from stubs import LAMBDA_DIR, FakeBedrock
+
+sys.path.insert(0, os.path.join(LAMBDA_DIR, "layer"))
+sys.path.insert(0, os.path.join(LAMBDA_DIR, "rag_query"))
+
+import stream_server  # noqa: E402
+from context_builder import PortfolioContext  # noqa: E402
+
+ANSWER = ("Overall the portfolio is in reasonable shape, but the at-risk Healthcare accounts deserve attention: "
+          "their sentiment trails the rest of the book and billing complaints dominate their tickets. "
+          "I would start with a billing review for the critical accounts and a check-in call this week.")
+
+
+def sample_portfolio(accounts=200, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(accounts):
+        rows.append({
+            "ACCOUNT_ID": f"ACC-{i:04d}",
+            "INDUSTRY": rng.choice(["Technology", "Healthcare", "Finance", "Retail", "Manufacturing"]),
+            "TIER": rng.choice(["Starter", "Growth", "Enterprise"]),
+            "HEALTH_SCORE": rng.randint(10, 95),
+            "IS_CHURNED": rng.random() < 0.15,
+            "TOTAL_SESSIONS": rng.randint(0, 400),
+            "FEATURES_ADOPTED": rng.randint(0, 12),
+            "ERROR_RATE": round(rng.random() * 0.2, 3),
+            "DAYS_SINCE_LAST_ACTIVE": rng.randint(0, 120),
+            "AVG_SENTIMENT": round(rng.uniform(-1, 1), 2),
+            "SUPPORT_TICKET_COUNT": rng.randint(0, 25),
+            "TOP_COMPLAINT_CATEGORY": rng.choice(["billing", "performance", "onboarding", "integration", None])
+        })
+    return rows
+
+
+def stream_once(port, question):
+    conn = http.client.HTTPConnection("localhost", port)
+    start = time.time()
+    conn.request("POST", "/", body=json.dumps({"query": question}),
+                 headers={"Content-Type": "application/json", "Authorization": "local"})
+    response = conn.getresponse()
+    first_byte_ms = None
+    text = b""
+    while True:
+        chunk = response.read1(4096)
+        if not chunk:
+            break
+        if first_byte_ms is None:
+            first_byte_ms = (time.time() - start) * 1000
+        text += chunk
+    conn.close()
+    return response.status, text.decode("utf-8"), first_byte_ms, (time.time() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--first-token-delay", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds per generated word")
+    parser.add_argument("--question", default="Which industries are most at risk and why?")
+    parser.add_argument("--serve", action="store_true", help="keep serving instead of running one comparison")
+    args = parser.parse_args()
+
+    rag = stream_server.rag
+    rag.bedrock = FakeBedrock(lambda prompt: ANSWER, args.first_token_delay, args.token_delay)
+    context = PortfolioContext(sample_portfolio(), [])
+    rag.get_context = lambda version=None: context
+    stream_server.verify_token = lambda token: {"token_use": "id"}
+
+    if args.serve:
+        stream_server.serve(args.port)
+        return
+
+    threading.Thread(target=stream_server.serve, args=(args.port,), daemon=True).start()
+    time.sleep(0.2)
+
+    start = time.time()
+    rag.lambda_handler({"body": json.dumps({"query": args.question})}, None)
+    buffered_ms = (time.time() - start) * 1000
+
+    status, text, first_byte_ms, total_ms = stream_once(args.port, args.question)
+    print(f"\n{text}\n")
+    print(f"buffered: answer after {buffered_ms:.0f} ms")
+    print(f"streamed: HTTP {status}, first bytes after {first_byte_ms:.0f} ms, complete after {total_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
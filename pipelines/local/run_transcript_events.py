@@ -0,0 +1,108 @@
+"""Replay S3 object-created notifications through process_transcripts locally.
+
+Generated transcript files are uploaded to an in-process S3, and Bedrock and
+Snowflake are stubbed. By default one notification per uploaded file is
+synthesized, batched into SQS messages the way the event source mapping
+delivers them. --event replays a saved payload instead; its size and eTag
+fields are filled in from the stub so the objects match.
+
+    cd data-generation && python generate_transcripts.py && cd ..
+    python pipelines/local/run_transcript_events.py --files 3
+    python pipelines/local/run_transcript_events.py --event pipelines/local/events/sqs_s3_object_created.json
+"""
+import argparse
+import json
+import os
+import urllib.parse
+
+from stubs import FakeBedrock, FakeS3, FakeSnowflakeConnection, load_lambda
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BUCKET = "vantagepoint-data-lake"
+
+
+def s3_notification(bucket, key, etag, size):
+    return {
+        "eventVersion": "2.1",
+        "eventSource": "aws:s3",
+        "eventName": "ObjectCreated:Put",
+        "s3": {
+            "bucket": {"name": bucket},
+            "object": {"key": urllib.parse.quote_plus(key, safe="/"), "size": size, "eTag": etag.strip('"')}
+        }
+    }
+
+
+def synthesize_event(s3, keys, per_message):
+    records = []
+    for i in range(0, len(keys), per_message):
+        notifications = []
+        for key in keys[i:i + per_message]:
+            head = s3.head_object(Bucket=BUCKET, Key=key)
+            notifications.append(s3_notification(BUCKET, key, head["ETag"], head["ContentLength"]))
+        records.append({
+            "messageId": f"local-{i // per_message:04d}",
+            "eventSource": "aws:sqs",
+            "body": json.dumps({"Records": notifications})
+        })
+    return {"Records": records}
+
+
+def refresh_event(s3, event):
+    # saved payloads carry placeholder eTags, point them at what is actually in the stub
+    for message in event["Records"]:
+        body = json.loads(message["body"])
+        for record in body.get("Records", []):
+            key = urllib.parse.unquote_plus(record["s3"]["object"]["key"])
+            try:
+                head = s3.head_object(Bucket=record["s3"]["bucket"]["name"], Key=key)
+            except Exception:
+                continue
+            record["s3"]["object"]["eTag"] = head["ETag"].strip('"')
+            record["s3"]["object"]["size"] = head["ContentLength"]
+        message["body"] = json.dumps(body)
+    return event
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcripts-dir", default=os.path.join(ROOT, "data-generation", "transcripts"))
+    parser.add_argument("--event", help="saved SQS event payload to replay")
+    parser.add_argument("--files", type=int, default=5, help="files to notify about when synthesizing")
+    parser.add_argument("--per-message", type=int, default=1, help="S3 records per SQS message")
+    args = parser.parse_args()
+
+    s3 = FakeS3()
+    s3.upload_dir(BUCKET, "raw/transcripts/", args.transcripts_dir)
+    conn = FakeSnowflakeConnection()
+    bedrock = FakeBedrock()
+
+    process_transcripts = load_lambda(
+        "process_transcripts",
+        s3=s3,
+        bedrock=bedrock,
+        get_connection=lambda: conn
+    )
+
+    if args.event:
+        with open(args.event) as f:
+            event = refresh_event(s3, json.load(f))
+    else:
+        keys = sorted(k for b, k in s3.objects if k.startswith("raw/transcripts/"))[:args.files]
+        event = synthesize_event(s3, keys, args.per_message)
+
+    result = process_transcripts.lambda_handler(event, None)
+
+    print(json.dumps({
+        "files": len(result["files"]),
+        "records": sum(r["records_processed"] for r in result["files"]),
+        "batch_item_failures": result["batchItemFailures"],
+        "bedrock_calls": bedrock.calls,
+        "snowflake_commits": conn.commits,
+        "rows_in_interaction_transcripts": len(conn.transcripts),
+        "manifest_markers": sum(1 for b, k in s3.objects if k.startswith("manifests/"))
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""In-process stand-ins for S3, Bedrock and Snowflake so the Lambdas can run locally.
+
+FakeSnowflakeConnection only records statements; DuckDBSnowflake runs them
+against real tables. Only the calls the Lambdas make are implemented. Errors are raised as botocore
+ClientErrors with the same codes AWS returns, so the handlers' error paths run
+exactly as in production.
+"""
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import re
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda")
+
+
+def client_error(code, operation):
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class StreamingBody(io.BytesIO):
+    def iter_chunks(self, chunk_size=1024):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def _count(self, operation):
+        with self.lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def _etag(self, data):
+        return f'"{hashlib.md5(data).hexdigest()}"'
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._count("put_object")
+        data = Body.encode("utf-8") if isinstance(Body, str) else bytes(Body)
+        with self.lock:
+            self.objects[(Bucket, Key)] = data
+        return {"ETag": self._etag(data)}
+
+    def _get(self, Bucket, Key, IfMatch=None):
+        with self.lock:
+            data = self.objects.get((Bucket, Key))
+        if data is None:
+            raise client_error("NoSuchKey", "GetObject")
+        if IfMatch is not None and IfMatch != self._etag(data):
+            raise client_error("PreconditionFailed", "GetObject")
+        return data
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        self._count("get_object")
+        data = self._get(Bucket, Key, IfMatch)
+        etag = self._etag(data)
+        size = len(data)
+        if Range:
+            start, _, end = Range[len("bytes="):].partition("-")
+            start = int(start)
+            if start >= size:
+                raise client_error("InvalidRange", "GetObject")
+            data = data[start:int(end) + 1 if end else size]
+        return {"Body": StreamingBody(data), "ETag": etag, "ContentLength": len(data)}
+
+    def head_object(self, Bucket, Key, IfMatch=None):
+        self._count("head_object")
+        data = self._get(Bucket, Key, IfMatch)
+        return {"ETag": self._etag(data), "ContentLength": len(data)}
+
+    def delete_object(self, Bucket, Key):
+        self._count("delete_object")
+        with self.lock:
+            self.objects.pop((Bucket, Key), None)
+        return {}
+
+    def get_paginator(self, operation):
+        assert operation == "list_objects_v2"
+        s3 = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix=""):
+                s3._count("list_objects_v2")
+                with s3.lock:
+                    keys = sorted(k for b, k in s3.objects if b == Bucket and k.startswith(Prefix))
+                    contents = [
+                        {"Key": k, "ETag": s3._etag(s3.objects[(Bucket, k)]), "Size": len(s3.objects[(Bucket, k)])}
+                        for k in keys
+                    ]
+                for i in range(0, len(contents), 1000):
+                    yield {"Contents": contents[i:i + 1000]}
+
+        return Paginator()
+
+    def upload_dir(self, bucket, prefix, local_dir):
+        # mirrors `aws s3 cp local_dir s3://bucket/prefix --recursive`
+        for root, _, files in os.walk(local_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                key = prefix + os.path.relpath(path, local_dir).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    self.put_object(Bucket=bucket, Key=key, Body=f.read())
+
+
+class FakeBedrock:
+    """Answers classification prompts with a fixed label, or whatever `responder(prompt)` returns.
+
+    invoke_model_with_response_stream yields the same text as Nova stream events, a few
+    words per contentBlockDelta. first_token_delay and token_delay (seconds) simulate
+    model latency so time-to-first-token can be measured against the buffered call.
+    """
+
+    def __init__(self, responder=None, first_token_delay=0.0, token_delay=0.0):
+        self.responder = responder or (lambda prompt: json.dumps({"sentiment_score": 0.0, "complaint_category": "general"}))
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _respond(self, body):
+        with self.lock:
+            self.calls += 1
+        prompt = json.loads(body)["messages"][0]["content"][0]["text"]
+        return prompt, self.responder(prompt)
+
+    def invoke_model(self, modelId, body, **kwargs):
+        prompt, text = self._respond(body)
+        words = re.findall(r"\S+\s*", text)
+        time.sleep(self.first_token_delay + self.token_delay * len(words))
+        payload = {
+            "output": {"message": {"content": [{"text": text}]}},
+            "usage": {"inputTokens": len(prompt) // 4, "outputTokens": len(text) // 4}
+        }
+        return {"body": StreamingBody(json.dumps(payload).encode("utf-8"))}
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        prompt, text = self._respond(body)
+
+        def event(payload):
+            return {"chunk": {"bytes": json.dumps(payload).encode("utf-8")}}
+
+        def events():
+            yield event({"messageStart": {"role": "assistant"}})
+            time.sleep(self.first_token_delay)
+            words = re.findall(r"\S+\s*", text)
+            for i in range(0, len(words), 3):
+                time.sleep(self.token_delay * len(words[i:i + 3]))
+                yield event({"contentBlockDelta": {"delta": {"text": "".join(words[i:i + 3])}, "contentBlockIndex": 0}})
+            yield event({"contentBlockStop": {"contentBlockIndex": 0}})
+            yield event({"messageStop": {"stopReason": "end_turn"}})
+            yield event({"metadata": {"usage": {"inputTokens": len(prompt) // 4, "outputTokens": len(text) // 4}}})
+
+        return {"body": events()}
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.result = []
+        self.description = []
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(" ".join(sql.split()))
+        statement = sql.strip().upper()
+        if statement.startswith("CREATE OR REPLACE TEMPORARY TABLE"):
+            self.connection.stage = []
+        elif statement.startswith("MERGE INTO INTERACTION_TRANSCRIPTS"):
+            inserted = updated = 0
+            for row in self.connection.stage:
+                if row[0] in self.connection.transcripts:
+                    updated += 1
+                else:
+                    inserted += 1
+                self.connection.transcripts[row[0]] = row
+            self.connection.stage = []
+            self.result = [(inserted, updated)]
+        return self
+
+    def executemany(self, sql, rows):
+        self.connection.statements.append(" ".join(sql.split()))
+        self.connection.stage.extend(rows)
+        return self
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return list(self.result)
+
+    def close(self):
+        pass
+
+
+class FakeSnowflakeConnection:
+    """Keeps INTERACTION_TRANSCRIPTS in a dict keyed by INTERACTION_ID and records every statement."""
+
+    def __init__(self):
+        self.statements = []
+        self.transcripts = {}
+        self.stage = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+
+class DuckDBCursor:
+    """Snowflake cursor over a DuckDB one: %s binds, uppercase column names, MERGE row counts."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.db.cursor()
+        self.result = None
+        self.description = None
+
+    def _translate(self, sql):
+        like = re.match(r"\s*CREATE OR REPLACE TEMPORARY TABLE (\w+) LIKE (\w+)\s*$", sql, re.I)
+        if like:
+            return f"CREATE OR REPLACE TEMPORARY TABLE {like.group(1)} AS SELECT * FROM {like.group(2)} LIMIT 0"
+        return sql.replace("%s", "?")
+
+    def execute(self, sql, params=None):
+        self.connection._count(sql)
+        sql = self._translate(sql)
+        self.result = None
+        if re.match(r"\s*MERGE\b", sql, re.I):
+            # Snowflake answers a MERGE with one row of (inserted, updated) counts
+            actions = [a for (a,) in self.cursor.execute(sql + " RETURNING merge_action", params or []).fetchall()]
+            self.result = [(actions.count("INSERT"), actions.count("UPDATE"))]
+            self.description = [("number of rows inserted",), ("number of rows updated",)]
+            return self
+        self.cursor.execute(sql, params or [])
+        self.description = [(d[0].upper(),) + tuple(d[1:]) for d in self.cursor.description or []]
+        return self
+
+    def executemany(self, sql, rows):
+        self.connection._count(sql)
+        self.cursor.executemany(self._translate(sql), rows)
+        return self
+
+    def fetchone(self):
+        if self.result is not None:
+            return self.result.pop(0) if self.result else None
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        if self.result is not None:
+            rows, self.result = self.result, []
+            return rows
+        return self.cursor.fetchall()
+
+    def fetch_pandas_all(self):
+        frame = self.cursor.df()
+        frame.columns = [name.upper() for name in frame.columns]
+        return frame
+
+    def close(self):
+        self.cursor.close()
+
+
+class DuckDBSnowflake:
+    """Snowflake stand-in backed by an in-memory DuckDB database, for timing real SQL locally.
+
+    Covers the dialect the Lambdas use: %s binds, EQUAL_NULL, ILIKE ... ESCAPE,
+    QUALIFY, MERGE (answering with inserted/updated counts) and CREATE ... LIKE.
+    execute, get_connection and reset_connection stand in for the snowflake_session
+    functions of the same name. calls counts statements by their first keyword.
+    Needs duckdb, and pandas for fetch_pandas_all.
+    """
+
+    def __init__(self):
+        import duckdb
+        self.db = duckdb.connect()
+        self.db.execute("CREATE MACRO EQUAL_NULL(a, b) AS a IS NOT DISTINCT FROM b")
+        self.calls = {}
+        self.commits = 0
+        self.lock = threading.Lock()
+
+    def _count(self, sql):
+        statement = sql.split(None, 1)[0].upper() if sql.strip() else ""
+        with self.lock:
+            self.calls[statement] = self.calls.get(statement, 0) + 1
+
+    def cursor(self):
+        return DuckDBCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+    def execute(self, sql, params=None):
+        return self.cursor().execute(sql, params)
+
+    def get_connection(self):
+        return self
+
+    def reset_connection(self):
+        pass
+
+
+def load_lambda(name, **clients):
+    """Import pipelines/lambda/<name>/lambda_function.py and swap its module-level clients.
+
+    The layer directory is put on sys.path as it is under /opt/python in Lambda. Any keyword
+    argument matching a module global (s3, bedrock, get_connection, execute, ...)
+    replaces it, e.g. load_lambda("process_transcripts", s3=FakeS3(), bedrock=FakeBedrock()).
+    """
+    directory = os.path.join(LAMBDA_DIR, name)
+    layer = os.path.join(LAMBDA_DIR, "layer")
+    if layer not in sys.path:
+        sys.path.append(layer)
+    sys.path.insert(0, directory)
+    try:
+        spec = importlib.util.spec_from_file_location(f"{name}_lambda", os.path.join(directory, "lambda_function.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(directory)
+
+    for attribute, value in clients.items():
+        if not hasattr(module, attribute):
+            raise AttributeError(f"{name} has no module attribute {attribute!r}")
+        setattr(module, attribute, value)
+    return module
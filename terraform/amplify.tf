@@ -39,6 +39,7 @@ resource "aws_amplify_app" "frontend" {
 
   environment_variables = {
     AMPLIFY_MONOREPO_APP_ROOT = "frontend"
+    VITE_RAG_STREAM_URL       = aws_lambda_function_url.rag_query_stream.function_url
   }
 }
 
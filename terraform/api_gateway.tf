@@ -1,7 +1,8 @@
 # Zip Lambda code
 data "archive_file" "rag_query" {
   type        = "zip"
-  source_file = "${path.module}/../pipelines/lambda/rag_query/lambda_function.py"
+  source_dir  = "${path.module}/../pipelines/lambda/rag_query"
+  excludes    = ["rag_query.zip", "__pycache__"]
   output_path = "${path.module}/../pipelines/lambda/rag_query/rag_query.zip"
 }
 
@@ -26,11 +27,78 @@ resource "aws_lambda_function" "rag_query" {
 
   environment {
     variables = {
-      SECRET_NAME = "vantagepoint/snowflake/config"
+      SECRET_NAME              = "vantagepoint/snowflake/config"
+      DATA_LAKE_BUCKET         = aws_s3_bucket.data_lake.bucket
+      DBT_MARKER_KEY           = "markers/dbt/run_results.json"
+      DATA_VERSION_TTL_SECONDS = "30"
+      CONTEXT_TTL_SECONDS      = "300"
+      RAG_MAX_TRANSCRIPTS      = "2000"
+      RAG_CACHE_ITEMS          = "128"
+      RAG_CACHE_TTL_SECONDS    = "3600"
+      RAG_CACHE_SIMILARITY     = "0.8"
     }
   }
 }
 
+# Streaming RAG Lambda: same code, run as an HTTP server behind the Lambda Web Adapter
+# so answers stream through a function URL as Bedrock generates them
+resource "aws_lambda_function" "rag_query_stream" {
+  function_name    = "vantagepoint-rag-query-stream"
+  role             = aws_iam_role.lambda.arn
+  handler          = "run.sh"
+  runtime          = "python3.11"
+  timeout          = 120
+  memory_size      = 512
+  filename         = data.archive_file.rag_query.output_path
+  source_code_hash = data.archive_file.rag_query.output_base64sha256
+
+  layers = [
+    aws_lambda_layer_version.snowflake.arn,
+    "arn:aws:lambda:us-east-1:753240598075:layer:LambdaAdapterLayerX86:24"
+  ]
+
+  environment {
+    variables = {
+      SECRET_NAME                  = "vantagepoint/snowflake/config"
+      DATA_LAKE_BUCKET             = aws_s3_bucket.data_lake.bucket
+      DBT_MARKER_KEY               = "markers/dbt/run_results.json"
+      DATA_VERSION_TTL_SECONDS     = "30"
+      CONTEXT_TTL_SECONDS          = "300"
+      RAG_MAX_TRANSCRIPTS          = "2000"
+      RAG_CACHE_ITEMS              = "128"
+      RAG_CACHE_TTL_SECONDS        = "3600"
+      RAG_CACHE_SIMILARITY         = "0.8"
+      AWS_LAMBDA_EXEC_WRAPPER      = "/opt/bootstrap"
+      AWS_LWA_INVOKE_MODE          = "response_stream"
+      AWS_LWA_READINESS_CHECK_PATH = "/healthz"
+      PORT                         = "8080"
+      COGNITO_ISSUER               = "https://cognito-idp.us-east-1.amazonaws.com/${aws_cognito_user_pool.main.id}"
+      COGNITO_CLIENT_ID            = aws_cognito_user_pool_client.frontend.id
+    }
+  }
+}
+
+# Function URLs have no JWT authorizer, stream_server.py verifies the Cognito ID token itself
+resource "aws_lambda_function_url" "rag_query_stream" {
+  function_name      = aws_lambda_function.rag_query_stream.function_name
+  authorization_type = "NONE"
+  invoke_mode        = "RESPONSE_STREAM"
+
+  cors {
+    allow_origins = ["*"]
+    allow_methods = ["POST"]
+    allow_headers = ["authorization", "content-type"]
+    max_age       = 300
+  }
+}
+
+resource "aws_lambda_permission" "rag_query_stream_url" {
+  action                 = "lambda:InvokeFunctionUrl"
+  function_name          = aws_lambda_function.rag_query_stream.function_name
+  principal              = "*"
+  function_url_auth_type = "NONE"
+}
+
 # Dashboard Data Lambda
 resource "aws_lambda_function" "get_dashboard_data" {
   function_name    = "vantagepoint-get-dashboard-data"
@@ -38,7 +106,7 @@ resource "aws_lambda_function" "get_dashboard_data" {
   handler          = "lambda_function.lambda_handler"
   runtime          = "python3.11"
   timeout          = 30
-  memory_size      = 256
+  memory_size      = 512
   filename         = data.archive_file.get_dashboard_data.output_path
   source_code_hash = data.archive_file.get_dashboard_data.output_base64sha256
 
@@ -46,7 +114,10 @@ resource "aws_lambda_function" "get_dashboard_data" {
 
   environment {
     variables = {
-      SECRET_NAME = "vantagepoint/snowflake/config"
+      SECRET_NAME              = "vantagepoint/snowflake/config"
+      DATA_LAKE_BUCKET         = aws_s3_bucket.data_lake.bucket
+      DBT_MARKER_KEY           = "markers/dbt/run_results.json"
+      DATA_VERSION_TTL_SECONDS = "30"
     }
   }
 }
@@ -57,10 +128,11 @@ resource "aws_apigatewayv2_api" "main" {
   protocol_type = "HTTP"
 
   cors_configuration {
-    allow_origins = ["*"]
-    allow_methods = ["GET", "POST", "OPTIONS"]
-    allow_headers = ["Content-Type", "Authorization"]
-    max_age       = 3600
+    allow_origins  = ["*"]
+    allow_methods  = ["GET", "POST", "OPTIONS"]
+    allow_headers  = ["Content-Type", "Authorization", "If-None-Match"]
+    expose_headers = ["ETag"]
+    max_age        = 3600
   }
 }
 
@@ -170,6 +242,14 @@ resource "aws_apigatewayv2_route" "transcripts" {
   authorizer_id      = aws_apigatewayv2_authorizer.cognito.id
 }
 
+resource "aws_apigatewayv2_route" "transcript_body" {
+  api_id             = aws_apigatewayv2_api.main.id
+  route_key          = "GET /api/account/{account_id}/transcripts/{interaction_id}"
+  target             = "integrations/${aws_apigatewayv2_integration.transcripts.id}"
+  authorization_type = "JWT"
+  authorizer_id      = aws_apigatewayv2_authorizer.cognito.id
+}
+
 resource "aws_lambda_permission" "transcripts_apigw" {
   action        = "lambda:InvokeFunction"
   function_name = aws_lambda_function.get_account_transcripts.function_name
@@ -177,7 +257,115 @@ resource "aws_lambda_permission" "transcripts_apigw" {
   source_arn    = "${aws_apigatewayv2_api.main.execution_arn}/*/*"
 }
 
+# Account Summary Lambda (GET summary + batch precompute from Step Functions)
+data "archive_file" "account_summary" {
+  type        = "zip"
+  source_file = "${path.module}/../pipelines/lambda/account_summary/lambda_function.py"
+  output_path = "${path.module}/../pipelines/lambda/account_summary/account_summary.zip"
+}
+
+resource "aws_lambda_function" "account_summary" {
+  function_name    = "vantagepoint-account-summary"
+  role             = aws_iam_role.lambda.arn
+  handler          = "lambda_function.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 300
+  memory_size      = 256
+  filename         = data.archive_file.account_summary.output_path
+  source_code_hash = data.archive_file.account_summary.output_base64sha256
+
+  layers = [aws_lambda_layer_version.snowflake.arn]
+
+  environment {
+    variables = {
+      SECRET_NAME             = "vantagepoint/snowflake/config"
+      SUMMARY_MAX_TRANSCRIPTS = "20"
+      SUMMARY_CONCURRENCY     = "4"
+      PRECOMPUTE_MAX_ACCOUNTS = "200"
+    }
+  }
+}
+
+resource "aws_apigatewayv2_integration" "account_summary" {
+  api_id                 = aws_apigatewayv2_api.main.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = aws_lambda_function.account_summary.invoke_arn
+  payload_format_version = "2.0"
+}
+
+resource "aws_apigatewayv2_route" "account_summary" {
+  api_id             = aws_apigatewayv2_api.main.id
+  route_key          = "GET /api/account/{account_id}/summary"
+  target             = "integrations/${aws_apigatewayv2_integration.account_summary.id}"
+  authorization_type = "JWT"
+  authorizer_id      = aws_apigatewayv2_authorizer.cognito.id
+}
+
+resource "aws_lambda_permission" "account_summary_apigw" {
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.account_summary.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.main.execution_arn}/*/*"
+}
+
+# What-if scoring Lambda (health_score.py from the layer, portfolio cached per dbt data version)
+data "archive_file" "score_what_if" {
+  type        = "zip"
+  source_file = "${path.module}/../pipelines/lambda/score_what_if/lambda_function.py"
+  output_path = "${path.module}/../pipelines/lambda/score_what_if/score_what_if.zip"
+}
+
+resource "aws_lambda_function" "score_what_if" {
+  function_name    = "vantagepoint-score-what-if"
+  role             = aws_iam_role.lambda.arn
+  handler          = "lambda_function.lambda_handler"
+  runtime          = "python3.11"
+  timeout          = 30
+  memory_size      = 512
+  filename         = data.archive_file.score_what_if.output_path
+  source_code_hash = data.archive_file.score_what_if.output_base64sha256
+
+  layers = [aws_lambda_layer_version.snowflake.arn]
+
+  environment {
+    variables = {
+      SECRET_NAME              = "vantagepoint/snowflake/config"
+      DATA_LAKE_BUCKET         = aws_s3_bucket.data_lake.bucket
+      DBT_MARKER_KEY           = "markers/dbt/run_results.json"
+      DATA_VERSION_TTL_SECONDS = "30"
+      PORTFOLIO_TTL_SECONDS    = "300"
+      WHAT_IF_MAX_ACCOUNTS     = "100"
+    }
+  }
+}
+
+resource "aws_apigatewayv2_integration" "score_what_if" {
+  api_id                 = aws_apigatewayv2_api.main.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = aws_lambda_function.score_what_if.invoke_arn
+  payload_format_version = "2.0"
+}
+
+resource "aws_apigatewayv2_route" "score_what_if" {
+  api_id             = aws_apigatewayv2_api.main.id
+  route_key          = "POST /api/what-if"
+  target             = "integrations/${aws_apigatewayv2_integration.score_what_if.id}"
+  authorization_type = "JWT"
+  authorizer_id      = aws_apigatewayv2_authorizer.cognito.id
+}
+
+resource "aws_lambda_permission" "score_what_if_apigw" {
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.score_what_if.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.main.execution_arn}/*/*"
+}
+
 # Output the API URL
 output "api_url" {
   value = aws_apigatewayv2_api.main.api_endpoint
 }
+
+output "rag_stream_url" {
+  value = aws_lambda_function_url.rag_query_stream.function_url
+}
@@ -39,6 +39,19 @@ resource "aws_iam_role_policy" "glue_s3_secrets" {
           "${aws_s3_bucket.glue_scripts.arn}/*"
         ]
       },
+      {
+        Effect   = "Allow"
+        Action   = "s3:PutObject"
+        Resource = "${aws_s3_bucket.data_lake.arn}/checkpoints/glue/*"
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject",
+          "s3:DeleteObject"
+        ]
+        Resource = "${aws_s3_bucket.data_lake.arn}/curated/*"
+      },
       {
         Effect   = "Allow"
         Action   = "secretsmanager:GetSecretValue"
@@ -72,12 +85,16 @@ resource "aws_glue_job" "usage_logs_ingestion" {
   }
 
   default_arguments = {
-    "--job-language"     = "python"
-    "--extra-jars"       = "s3://${aws_s3_bucket.glue_scripts.bucket}/jars/spark-snowflake_2.12-2.16.0-spark_3.3.jar,s3://${aws_s3_bucket.glue_scripts.bucket}/jars/snowflake-jdbc-3.17.0.jar"
-    "--TempDir"          = "s3://${aws_s3_bucket.glue_scripts.bucket}/temp/"
-    "--enable-metrics"   = "true"
-    "--SECRET_NAME"      = "vantagepoint/snowflake/config"
-    "--DATA_LAKE_BUCKET" = aws_s3_bucket.data_lake.bucket
+    "--job-language"        = "python"
+    "--extra-jars"          = "s3://${aws_s3_bucket.glue_scripts.bucket}/jars/spark-snowflake_2.12-2.16.0-spark_3.3.jar,s3://${aws_s3_bucket.glue_scripts.bucket}/jars/snowflake-jdbc-3.17.0.jar"
+    "--TempDir"             = "s3://${aws_s3_bucket.glue_scripts.bucket}/temp/"
+    "--enable-metrics"      = "true"
+    "--job-bookmark-option" = "job-bookmark-enable"
+    "--SECRET_NAME"         = "vantagepoint/snowflake/config"
+    "--DATA_LAKE_BUCKET"    = aws_s3_bucket.data_lake.bucket
+    "--LOOKBACK_MONTHS"     = "1"
+    "--FULL_REFRESH"        = "false"
+    "--SOURCE_FORMAT"       = "json"
   }
 
   connections = [aws_glue_connection.snowflake.name]
@@ -86,3 +103,27 @@ resource "aws_glue_job" "usage_logs_ingestion" {
   number_of_workers = 2
   worker_type       = "G.1X"
 }
+
+# Glue Python shell job - compacts raw/ JSON lines into Parquet under curated/
+resource "aws_glue_job" "lake_compaction" {
+  name     = "vantagepoint-lake-compaction"
+  role_arn = aws_iam_role.glue.arn
+
+  command {
+    name            = "pythonshell"
+    script_location = "s3://${aws_s3_bucket.glue_scripts.bucket}/scripts/compact_to_parquet.py"
+    python_version  = "3.9"
+  }
+
+  default_arguments = {
+    "--job-language"     = "python"
+    "--library-set"      = "analytics"
+    "--DATA_LAKE_BUCKET" = aws_s3_bucket.data_lake.bucket
+    "--DATASETS"         = "usage_logs"
+    "--TARGET_FILE_MB"   = "128"
+    "--FULL_REFRESH"     = "false"
+  }
+
+  max_capacity = 1
+  timeout      = 60
+}
@@ -37,6 +37,18 @@ resource "aws_iam_role_policy" "lambda_access" {
           "${aws_s3_bucket.data_lake.arn}/*"
         ]
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject",
+          "s3:DeleteObject"
+        ]
+        Resource = [
+          "${aws_s3_bucket.data_lake.arn}/cache/*",
+          "${aws_s3_bucket.data_lake.arn}/checkpoints/*",
+          "${aws_s3_bucket.data_lake.arn}/manifests/*"
+        ]
+      },
       {
         Effect   = "Allow"
         Action   = "secretsmanager:GetSecretValue"
@@ -79,8 +91,9 @@ data "archive_file" "list_transcripts" {
 
 data "archive_file" "process_transcripts" {
   type        = "zip"
-  source_file = "${path.module}/../pipelines/lambda/process_transcripts/lambda_function.py"
+  source_dir  = "${path.module}/../pipelines/lambda/process_transcripts"
   output_path = "${path.module}/../pipelines/lambda/process_transcripts/process_transcripts.zip"
+  excludes    = ["process_transcripts.zip", "__pycache__"]
 }
 
 # Lambda - list transcripts
@@ -89,13 +102,14 @@ resource "aws_lambda_function" "list_transcripts" {
   role             = aws_iam_role.lambda.arn
   handler          = "lambda_function.lambda_handler"
   runtime          = "python3.11"
-  timeout          = 30
+  timeout          = 60
   filename         = data.archive_file.list_transcripts.output_path
   source_code_hash = data.archive_file.list_transcripts.output_base64sha256
 
   environment {
     variables = {
-      DATA_LAKE_BUCKET = aws_s3_bucket.data_lake.bucket
+      DATA_LAKE_BUCKET  = aws_s3_bucket.data_lake.bucket
+      RECORDS_PER_SHARD = "500"
     }
   }
 }
@@ -115,7 +129,12 @@ resource "aws_lambda_function" "process_transcripts" {
 
   environment {
     variables = {
-      SECRET_NAME = "vantagepoint/snowflake/config"
+      SECRET_NAME          = "vantagepoint/snowflake/config"
+      ENRICH_CONCURRENCY   = "8"
+      BEDROCK_MAX_RPS      = "10"
+      ENRICH_BATCH_SIZE    = "1"
+      STREAM_CHUNK_RECORDS = "100"
+      CACHE_BUCKET         = aws_s3_bucket.data_lake.bucket
     }
   }
 }
@@ -18,6 +18,28 @@ resource "aws_s3_bucket_server_side_encryption_configuration" "data_lake" {
   }
 }
 
+# Expire cached Bedrock enrichment results so stale prompt versions age out
+resource "aws_s3_bucket_lifecycle_configuration" "data_lake" {
+  bucket = aws_s3_bucket.data_lake.id
+
+  rule {
+    id     = "expire-enrichment-cache"
+    status = "Enabled"
+
+    filter {
+      prefix = "cache/"
+    }
+
+    expiration {
+      days = 90
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+  }
+}
+
 #S3 Bucket for Glue Scripts
 resource "aws_s3_bucket" "glue_scripts" {
   bucket = "vantagepoint-glue-scripts"
@@ -0,0 +1,77 @@
+# Event-driven transcript ingestion: S3 object-created events -> SQS -> process_transcripts micro-batches
+resource "aws_sqs_queue" "transcript_events_dlq" {
+  name                      = "vantagepoint-transcript-events-dlq"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "transcript_events" {
+  name                       = "vantagepoint-transcript-events"
+  visibility_timeout_seconds = 1800
+  message_retention_seconds  = 345600
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.transcript_events_dlq.arn
+    maxReceiveCount     = 3
+  })
+}
+
+resource "aws_sqs_queue_policy" "transcript_events" {
+  queue_url = aws_sqs_queue.transcript_events.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "s3.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.transcript_events.arn
+      Condition = {
+        ArnEquals = { "aws:SourceArn" = aws_s3_bucket.data_lake.arn }
+      }
+    }]
+  })
+}
+
+resource "aws_s3_bucket_notification" "transcripts" {
+  bucket = aws_s3_bucket.data_lake.id
+
+  queue {
+    queue_arn     = aws_sqs_queue.transcript_events.arn
+    events        = ["s3:ObjectCreated:*"]
+    filter_prefix = "raw/transcripts/"
+    filter_suffix = ".json"
+  }
+
+  depends_on = [aws_sqs_queue_policy.transcript_events]
+}
+
+# SQS buffers notifications for up to a minute (or 20 files) before invoking the Lambda
+resource "aws_lambda_event_source_mapping" "transcript_events" {
+  event_source_arn                   = aws_sqs_queue.transcript_events.arn
+  function_name                      = aws_lambda_function.process_transcripts.arn
+  batch_size                         = 20
+  maximum_batching_window_in_seconds = 60
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    maximum_concurrency = 5
+  }
+}
+
+resource "aws_iam_role_policy" "lambda_transcript_events" {
+  name = "lambda-transcript-events-sqs"
+  role = aws_iam_role.lambda.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect = "Allow"
+      Action = [
+        "sqs:ReceiveMessage",
+        "sqs:DeleteMessage",
+        "sqs:GetQueueAttributes"
+      ]
+      Resource = aws_sqs_queue.transcript_events.arn
+    }]
+  })
+}
@@ -25,7 +25,8 @@ resource "aws_iam_role_policy" "step_functions_invoke" {
       Action = "lambda:InvokeFunction"
       Resource = [
         aws_lambda_function.list_transcripts.arn,
-        aws_lambda_function.process_transcripts.arn
+        aws_lambda_function.process_transcripts.arn,
+        aws_lambda_function.account_summary.arn
       ]
     }]
   })
@@ -45,6 +46,7 @@ resource "aws_sfn_state_machine" "transcript_pipeline" {
         Resource = aws_lambda_function.list_transcripts.arn
         Next     = "ProcessFiles"
       }
+      # each item is a whole file or a newline-aligned byte-range shard of a large file
       ProcessFiles = {
         Type           = "Map"
         ItemsPath      = "$.files"
@@ -65,7 +67,27 @@ resource "aws_sfn_state_machine" "transcript_pipeline" {
             }
           }
         }
-        Next = "Done"
+        Next = "PrecomputeSummaries"
+      }
+      # refresh cached summaries of accounts that received new interactions, best effort:
+      # anything missed is generated on the next dashboard request
+      PrecomputeSummaries = {
+        Type       = "Task"
+        Resource   = aws_lambda_function.account_summary.arn
+        Parameters = {}
+        Retry = [{
+          ErrorEquals     = ["States.ALL"]
+          IntervalSeconds = 30
+          MaxAttempts     = 1
+          BackoffRate     = 2.0
+        }]
+        Catch = [{
+          ErrorEquals = ["States.ALL"]
+          ResultPath  = "$.summary_error"
+          Next        = "Done"
+        }]
+        ResultPath = "$.summaries"
+        Next       = "Done"
       }
       Done = {
         Type = "Succeed"
@@ -72,11 +72,51 @@ resource "snowflake_table" "usage_logs" {
   }
 }
 
+# each Glue run overwrites this with its batch, then MERGEs it into USAGE_LOGS
+resource "snowflake_table" "usage_logs_stage" {
+  database = snowflake_database.prod.name
+  schema   = snowflake_schema.b2bsaas.name
+  name     = "USAGE_LOGS_STAGE"
+
+  column {
+    name = "SESSION_ID"
+    type = "VARCHAR(50)"
+  }
+  column {
+    name = "ACCOUNT_ID"
+    type = "VARCHAR(50)"
+  }
+  column {
+    name = "USER_ID"
+    type = "VARCHAR(50)"
+  }
+  column {
+    name = "FEATURE_USED"
+    type = "VARCHAR(100)"
+  }
+  column {
+    name = "SESSION_DURATION_SECONDS"
+    type = "NUMBER(10,0)"
+  }
+  column {
+    name = "ERROR_CODES_ENCOUNTERED"
+    type = "VARCHAR(50)"
+  }
+  column {
+    name = "TIMESTAMP"
+    type = "TIMESTAMP_NTZ"
+  }
+}
+
 resource "snowflake_table" "interaction_transcripts" {
   database = snowflake_database.prod.name
   schema   = snowflake_schema.b2bsaas.name
   name     = "INTERACTION_TRANSCRIPTS"
 
+  # drill-downs filter on one account and read its newest interactions first;
+  # day granularity keeps the key cardinality low enough for Automatic Clustering
+  cluster_by = ["ACCOUNT_ID", "TO_DATE(TIMESTAMP)"]
+
   column {
     name = "INTERACTION_ID"
     type = "VARCHAR(50)"
@@ -145,3 +185,40 @@ resource "snowflake_table" "opportunities" {
     type = "VARCHAR(50)"
   }
 }
+
+# Cached per-account transcript summaries, one row per account. A row is current while
+# LATEST_INTERACTION_AT still equals the account's newest interaction.
+resource "snowflake_table" "account_transcript_summaries" {
+  database = snowflake_database.prod.name
+  schema   = snowflake_schema.b2bsaas.name
+  name     = "ACCOUNT_TRANSCRIPT_SUMMARIES"
+
+  column {
+    name = "ACCOUNT_ID"
+    type = "VARCHAR(50)"
+  }
+  column {
+    name = "LATEST_INTERACTION_AT"
+    type = "TIMESTAMP_NTZ"
+  }
+  column {
+    name = "TRANSCRIPT_COUNT"
+    type = "NUMBER(10,0)"
+  }
+  column {
+    name = "SUMMARY"
+    type = "VARCHAR(4000)"
+  }
+  column {
+    name = "MODEL_ID"
+    type = "VARCHAR(100)"
+  }
+  column {
+    name = "PROMPT_VERSION"
+    type = "VARCHAR(20)"
+  }
+  column {
+    name = "GENERATED_AT"
+    type = "TIMESTAMP_NTZ"
+  }
+}